@@ -0,0 +1,254 @@
+'''Benchmarking the processing modes on the same sample files'''
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+from time import perf_counter, sleep
+from argparse import ArgumentParser, Namespace
+from dataclasses import dataclass
+from src.scheduler import Scheduler
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+SPLITTER_PATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  "splitter.py")
+''' Path of the splitter script the modes are run with '''
+
+POLL_INTERVAL: float = 0.05
+''' Seconds between two memory samples of a run '''
+
+STARTUP_BUDGETS: dict[str, float] = {"help": 0.5,
+                                     "import": 1.0}
+''' Seconds allowed for `splitter.py --help` and for importing the splitter without OCR '''
+
+HEAVY_MODULES: list[str] = ["pypdf",
+                            "pdf2image",
+                            "pyzbar",
+                            "cv2",
+                            "easyocr",
+                            "torch"]
+''' Modules that must only be imported by the stage using them, not at start-up '''
+
+@dataclass(slots = True)
+class BenchmarkResult:
+    '''
+        `BenchmarkResult` class, best round of a mode
+    '''
+    mode: str
+    seconds: float
+    pages: int
+    peak_mb: float | None = None
+
+    @property
+    def pages_per_second(self) -> float:
+        '''
+            Throughput of the run
+        '''
+        return self.pages / self.seconds if self.seconds else 0.0
+
+
+@dataclass(slots = True)
+class StartupResult:
+    '''
+        `StartupResult` class, best round of a start-up check
+    '''
+    name: str
+    seconds: float
+    budget: float
+    heavy_modules: list[str]
+    error: str | None = None
+
+    @property
+    def passed(self) -> bool:
+        '''
+            Ran within the budget without importing a heavy module
+        '''
+        return self.error is None and self.seconds <= self.budget and not self.heavy_modules
+
+
+def tree_rss_mb(process: "psutil.Process") -> float:
+    '''
+        Resident memory of a process and its children in MB
+
+        :param process: :class:`psutil.Process`
+    '''
+    total: int = 0
+    for member in [process] + process.children(recursive = True):
+        try:
+            total += member.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / 1024 / 1024
+
+
+def run_once(source: str,
+             mode: str,
+             extra_args: list[str]) -> tuple[float, float | None]:
+    '''
+        Runs the splitter on a copy of the source files, returns the wall time and peak memory
+
+        :param source: :class:`str` Directory of the sample files
+        :param mode: :class:`str` Mode of operation
+        :param extra_args: :class:`list[str]` Further arguments of the splitter
+    ''' # pylint: disable=line-too-long
+    work_dir: str = tempfile.mkdtemp(prefix = "barcodescansplit_")
+    try:
+        shutil.copytree(source,
+                        os.path.join(work_dir,
+                                     "source"))
+        command: list[str] = [sys.executable, "-B", SPLITTER_PATH,
+                              "-s", os.path.join(work_dir, "source"),
+                              "-d", os.path.join(work_dir, "destination"),
+                              "-t", os.path.join(work_dir, "temp"),
+                              "-i", os.path.join(work_dir, "images"),
+                              "-l", os.path.join(work_dir, "logs"),
+                              "-m", mode] + extra_args
+        peak_mb: float | None = None
+        start: float = perf_counter()
+        with subprocess.Popen(command,
+                              stdout = subprocess.DEVNULL,
+                              stderr = subprocess.DEVNULL) as process:
+            if psutil is not None:
+                watched: psutil.Process = psutil.Process(process.pid)
+                peak_mb = 0.0
+                while process.poll() is None:
+                    peak_mb = max(peak_mb,
+                                  tree_rss_mb(watched))
+                    sleep(POLL_INTERVAL)
+            process.wait()
+        return perf_counter() - start, peak_mb
+    finally:
+        shutil.rmtree(work_dir,
+                      ignore_errors = True)
+
+
+def benchmark_mode(source: str,
+                   mode: str,
+                   pages: int,
+                   extra_args: list[str],
+                   rounds: int = 1) -> BenchmarkResult:
+    '''
+        Runs a mode `rounds` times and keeps the fastest round
+
+        :param source: :class:`str` Directory of the sample files
+        :param mode: :class:`str` Mode of operation
+        :param pages: :class:`int` Number of pages in the sample files
+        :param extra_args: :class:`list[str]` Further arguments of the splitter
+        :param rounds: :class:`Optional(int)` Number of runs. Defaults to `1`
+    '''
+    best: BenchmarkResult | None = None
+    for _ in range(max(rounds, 1)):
+        seconds, peak_mb = run_once(source,
+                                    mode,
+                                    extra_args)
+        if best is None or seconds < best.seconds:
+            best = BenchmarkResult(mode = mode,
+                                   seconds = seconds,
+                                   pages = pages,
+                                   peak_mb = peak_mb)
+    return best
+
+
+def measure_startup(rounds: int = 3) -> list[StartupResult]:
+    '''
+        Times `splitter.py --help` and importing the splitter (without running it), keeps the fastest of `rounds`
+
+        :param rounds: :class:`Optional(int)` Runs per check. Defaults to `3`
+    ''' # pylint: disable=line-too-long
+    commands: dict[str, list[str]] = {"help": [sys.executable, "-B", SPLITTER_PATH, "--help"],
+                                      "import": [sys.executable, "-B", "-c", f"import sys, src.main; print(','.join(module for module in {HEAVY_MODULES} if module in sys.modules))"]} # pylint: disable=line-too-long
+    results: list[StartupResult] = []
+    for name, command in commands.items():
+        result: StartupResult | None = None
+        for _ in range(max(rounds, 1)):
+            start: float = perf_counter()
+            completed: subprocess.CompletedProcess = subprocess.run(command,
+                                                                    cwd = os.path.dirname(SPLITTER_PATH),
+                                                                    capture_output = True,
+                                                                    text = True,
+                                                                    check = False)
+            seconds: float = perf_counter() - start
+            if result is None or seconds < result.seconds:
+                result = StartupResult(name = name,
+                                       seconds = seconds,
+                                       budget = STARTUP_BUDGETS[name],
+                                       heavy_modules = [module for module in completed.stdout.strip().split(",") if module] if name == "import" else [], # pylint: disable=line-too-long
+                                       error = None if completed.returncode == 0 else (completed.stderr.strip().splitlines() or [f"exit code {completed.returncode}"])[-1]) # pylint: disable=line-too-long
+        results.append(result)
+    return results
+
+
+def print_startup(results: list[StartupResult]) -> bool:
+    '''
+        Prints the start-up checks, returns `True` if every check passed
+
+        :param results: :class:`list[StartupResult]`
+    '''
+    print(f"{'start-up':<12}{'seconds':>10}{'budget':>10}  result")
+    for result in results:
+        details: str = result.error or ", ".join(result.heavy_modules)
+        print(f"{result.name:<12}{result.seconds:>10.2f}{result.budget:>10.2f}  {'ok' if result.passed else 'FAILED'}{f' ({details})' if details else ''}") # pylint: disable=line-too-long
+    return all(result.passed for result in results)
+
+
+def count_pages(source: str) -> int:
+    '''
+        Counts the pages of the PDF files in the directory
+
+        :param source: :class:`str` Directory of the sample files
+    '''
+    return sum(Scheduler.page_count(os.path.join(source, file)) or 0 for file in os.listdir(source) if file.lower().endswith(".pdf")) # pylint: disable=line-too-long
+
+
+def print_results(results: list[BenchmarkResult]) -> None:
+    '''
+        Prints the results as a table, fastest first
+
+        :param results: :class:`list[BenchmarkResult]`
+    '''
+    print(f"{'mode':<12}{'seconds':>10}{'pages/s':>10}{'peak MB':>10}")
+    for result in sorted(results,
+                         key = lambda result: result.seconds):
+        print(f"{result.mode:<12}{result.seconds:>10.2f}{result.pages_per_second:>10.2f}{'?' if result.peak_mb is None else f'{result.peak_mb:.0f}':>10}") # pylint: disable=line-too-long
+
+
+def main() -> None:
+    '''
+        Main function
+    '''
+    parser: ArgumentParser = ArgumentParser(
+        prog = "PDF Splitter benchmark",
+        description = "Runs the same sample files through each mode and compares wall time, throughput and peak memory" # pylint: disable=line-too-long
+    )
+    parser.add_argument("-s", "--source", type = str, help = "Directory containing the sample PDF files, it is copied for every run") # pylint: disable=line-too-long
+    parser.add_argument("-m", "--modes", type = str, default = "single,multi,threads,hybrid", help = "Modes to compare, by default is 'single,multi,threads,hybrid'") # pylint: disable=line-too-long
+    parser.add_argument("-p", "--processes", type = int, help = "Maximum number of processes, passed to the splitter") # pylint: disable=line-too-long
+    parser.add_argument("-n", "--threads", type = int, help = "Maximum number of threads, passed to the splitter") # pylint: disable=line-too-long
+    parser.add_argument("-r", "--rounds", type = int, default = 1, help = "Runs per mode, the fastest is kept, by default is 1") # pylint: disable=line-too-long
+    parser.add_argument("--startup", action = "store_true", help = "Only check the start-up budget (--help and import without OCR), exits with 1 if over budget") # pylint: disable=line-too-long
+    args: Namespace = parser.parse_args()
+    if args.startup:
+        sys.exit(0 if print_startup(measure_startup(max(args.rounds, 3))) else 1)
+    if not args.source:
+        parser.error("the following arguments are required: -s/--source")
+    extra_args: list[str] = []
+    if args.processes:
+        extra_args += ["-p", str(args.processes)]
+    if args.threads:
+        extra_args += ["-n", str(args.threads)]
+    pages: int = count_pages(args.source)
+    print(f"{pages} page{'' if pages == 1 else 's'} in '{args.source}'{'' if psutil is not None else ', install psutil to measure memory'}") # pylint: disable=line-too-long
+    print_results([benchmark_mode(source = args.source,
+                                  mode = mode.strip(),
+                                  pages = pages,
+                                  extra_args = extra_args,
+                                  rounds = args.rounds) for mode in args.modes.split(",") if mode.strip()]) # pylint: disable=line-too-long
+
+
+if __name__ == '__main__':
+    main()
@@ -47,6 +47,9 @@ DESTINATION_DIR: str = "destination"
 BACKUP_DIR: str = "backup"
 ''' Directory to backup files '''
 
+QUARANTINE_DIR: str = "quarantine"
+''' Directory for the files that got stuck, with their journal '''
+
 default_max_processes: int = os.cpu_count() or 1
 ''' Allowed default max processes to run in `multiprocess`/`multi` mode '''
 
@@ -63,3 +66,164 @@ MULTI_PROCESS_COMMANDS: list[str] = ["multiproccess",
                                      "mp",
                                      "async"]
 ''' Synonym(s) for `multiprocess` command '''
+
+DEFAULT_SYMBOLS: list[str] | None = None
+''' Allowed barcode symbologies (ex.: `["CODE128", "QRCODE"]`), `None` searches every symbology '''
+
+DEFAULT_BARCODE_PATTERN: str | None = None
+''' Regular expression the barcode data must fully match, `None` accepts any data '''
+
+DEFAULT_BARCODE_CHECKSUM: str | None = None
+''' Checksum the barcode data must pass (`luhn`, `mod10`, `mod43`), `None` skips the check '''
+
+PIPELINE_COMMANDS: list[str] = ["pipeline",
+                                "pipe",
+                                "pl",
+                                "aio"]
+''' Synonym(s) for `pipeline` command '''
+
+PIPELINE_STAGES: list[str] = ["split",
+                              "render",
+                              "decode",
+                              "write"]
+''' Stages of the `pipeline` mode in order '''
+
+default_stage_workers: dict[str, int] = {"split": 1,
+                                         "render": 2,
+                                         "decode": os.cpu_count() or 1,
+                                         "write": 2}
+''' Default number of workers per stage in `pipeline` mode '''
+
+DEFAULT_QUEUE_SIZE: int = 8
+''' Maximum number of items waiting between two stages in `pipeline` mode '''
+
+SERVER_COMMANDS: list[str] = ["server",
+                              "serve",
+                              "http"]
+''' Synonym(s) for `server` command '''
+
+DEFAULT_HOST: str = "127.0.0.1"
+''' Address the HTTP server listens on in `server` mode, localhost only by default '''
+
+DEFAULT_PORT: int = 8080
+''' Port the HTTP server listens on in `server` mode '''
+
+DEFAULT_REQUEST_TIMEOUT: float = 60.0
+''' Seconds a single upload may take in `server` mode '''
+
+MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024
+''' Largest accepted upload in bytes in `server` mode '''
+
+SCAN_COMMANDS: list[str] = ["scan",
+                            "scanonly",
+                            "manifest"]
+''' Synonym(s) for `scan` command, renders and decodes only and writes a manifest '''
+
+SPLIT_COMPRESSIONS: list[str] = ["none",
+                                 "streams"]
+''' Compression of the split pages: `none` (written as read), `streams` (compress content streams) '''
+
+DEFAULT_SPLIT_COMPRESSION: str = "none"
+''' Default compression of the split pages, the pages are written as read '''
+
+DEFAULT_BILEVEL_THRESHOLD: int | None = None
+''' Threshold (0-255) to re-encode page images as bilevel (CCITT G4), `None` keeps the images as they are '''
+
+SCHEDULE_POLICIES: list[str] = ["longest",
+                                "oldest",
+                                "fifo"]
+''' File dispatch order: `longest` (most pages first), `oldest` (oldest modification first), `fifo` (directory listing order) '''
+
+DEFAULT_SCHEDULE_POLICY: str = "longest"
+''' Default file dispatch order '''
+
+BYTES_PER_PAGE_ESTIMATE: int = 100 * 1024
+''' Estimated size of a scanned page in bytes, used when the page count can not be read '''
+
+PAGE_COUNT_TIMEOUT: float = 2.0
+''' Seconds the page count of a file may take to read while scheduling, the size estimate is used if over '''
+
+IMAGE_EXTENSIONS: list[str] = [".tif",
+                               ".tiff",
+                               ".png",
+                               ".jpg",
+                               ".jpeg"]
+''' Image files accepted as source next to PDF files, decoded frame by frame without rendering '''
+
+IMAGE_DEFAULT_DPI: float = 300.0
+''' Resolution of the image pages written to PDF if the image does not have one '''
+
+IMAGE_PDF_QUALITY: int = 90
+''' JPEG quality of the grayscale and color image pages written to PDF '''
+
+MEMORY_RESERVE_MB: int = 1024
+''' Memory (MB) kept free for the system in `multiprocess`/`multi` mode, no new worker is admitted below it '''
+
+DEFAULT_WORKER_MEMORY_MB: int = 512
+''' Estimated memory (MB) of a worker until real worker memory is measured '''
+
+MAX_LOAD_PER_CPU: float = 1.5
+''' Above this 1 minute load average per CPU thread the number of workers is not increased '''
+
+MONITOR_INTERVAL: float = 0.2
+''' Seconds between two checks of the running workers and the free memory '''
+
+THREAD_COMMANDS: list[str] = ["threads",
+                              "thread",
+                              "mt"]
+''' Synonym(s) for `threads` command, files are processed on threads of a single process '''
+
+HYBRID_COMMANDS: list[str] = ["hybrid",
+                              "hy"]
+''' Synonym(s) for `hybrid` command, files are processed on threads of multiple processes '''
+
+default_max_threads: int = os.cpu_count() or 1
+''' Allowed default threads (per process) to run in `threads`/`hybrid` mode '''
+
+BLANK_POLICIES: list[str] = ["decode",
+                             "skip",
+                             "drop",
+                             "attach"]
+''' What happens to blank pages: `decode` (no pre-check), `skip` (not decoded, filed under the temp name), `drop` (not filed), `attach` (appended to the previous page's document) '''
+
+DEFAULT_BLANK_POLICY: str = "decode"
+''' Default policy for blank pages, the pre-check is opt-in '''
+
+BLANK_INK_RATIO: float = 0.0005
+''' A page is blank if less than this ratio of its thumbnail is ink '''
+
+SEPARATOR_MAX_DISTANCE: int = 10
+''' Maximum difference (bits of the 64 bit average hash) between a page and a separator sheet template '''
+
+DEFAULT_BATCH_SIZE: int = 500
+''' Files listed from the source before they are scheduled and dispatched, the listing goes on while they are processed '''
+
+INDEX_FILE_NAME: str = "seen_index.json"
+''' Name of the index of the files already seen, in the log directory '''
+
+OCR_ID_CHARACTERS: str = "0123456789"
+''' Characters of the ID after the OCR prefix, the OCR allowlist is these and the characters of the prefixes '''
+
+OCR_MAX_WIDTH: int = 1600
+''' The OCR crop is downscaled to this width (pixels) if wider '''
+
+OCR_GPU: bool = False
+''' OCR runs on the GPU if there is one, otherwise on the CPU with the quantised models '''
+
+OCR_QUANTIZE: bool = True
+''' OCR on the CPU uses dynamically quantised (int8) models '''
+
+PROFILE_TOP_FUNCTIONS: int = 30
+''' Number of the hottest functions in the merged profile report '''
+
+STAGE_TIMEOUTS: dict[str, float] = {"split": 300.0,
+                                    "render": 120.0,
+                                    "decode": 120.0,
+                                    "write": 60.0}
+''' Seconds allowed per stage, per page except for `split`, `0` for no limit. `render` is enforced by poppler in every mode, the others by the watchdog in `multi` mode '''
+
+FILE_TIMEOUT_PER_PAGE: float = 120.0
+''' Seconds allowed for a whole file per page (on top of the `split` limit) in `multi` mode, `0` for no limit '''
+
+KILL_GRACE: float = 5.0
+''' Seconds a stuck process gets to terminate before it is killed '''
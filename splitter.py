@@ -2,8 +2,7 @@
 
 from argparse import ArgumentParser, Namespace
 from multiprocessing import freeze_support
-from config import SOURCE_DIR, DESTINATION_DIR, TEMP_DIR, IMG_DIR, LOG_DIR, BACKUP_DIR
-from src.main import PathConfig, run as run_by_arg_run
+from config import SOURCE_DIR, DESTINATION_DIR, TEMP_DIR, IMG_DIR, LOG_DIR, BACKUP_DIR, QUARANTINE_DIR
 
 parser: ArgumentParser = ArgumentParser(
     prog = "PDF Splitter",
@@ -13,37 +12,88 @@ parser: ArgumentParser = ArgumentParser(
 arg_list: list[list[any]] = [["-s","--source", str, "Directory containing PDF files"],
                              ["-d", "--destination", str, "Directory to store output files"],
                              ["-b", "--backup", str, "Directory to store backup files"],
+                             ["-q", "--quarantine", str, "Directory to move the files that got stuck to, with their journal"], # pylint: disable=line-too-long
                              ["-l", "--log", str, "Directory to store log files"],
                              ["-t", "--temp", str, "Temporary directory to store split PDF files"],
                              ["-i", "--image", str, "Temporary directory to store the images"],
-                             ["-m", "--mode", str, "Mode of operation (single|multi), by default is single"], # pylint: disable=line-too-long
-                             ["-p", "--processes", int, "Maximum number of processes to run, by default is the number of CPU threads"], # pylint: disable=line-too-long
-                             ["-f", "--prefixes", str, "Prefixes for OCR reading if barcode not found (ex.: 'KSZ,EKSZ'), if left empty then OCR won't run"], # pylint: disable=line-too-long
-                             ["-r", "--ratio", float, "Image ratio to check for OCR, only neccessary if `--text-prefixes` is given (ex.: 0.4 means it scans from top to bottom 40%% of the image)"]] # pylint: disable=line-too-long
+                             ["-m", "--mode", str, "Mode of operation (single|multi|threads|hybrid|pipeline|server|scan), by default is single"], # pylint: disable=line-too-long
+                             ["-p", "--processes", int, "Maximum number of processes to run (worker processes in server mode), by default is the number of CPU threads. In multi mode fewer run when memory is short or the system is loaded"], # pylint: disable=line-too-long
+                             ["-n", "--threads", int, "Maximum number of threads to run (per process in hybrid mode), by default is the number of CPU threads"], # pylint: disable=line-too-long
+                             ["-f", "--prefixes", str, "Prefixes for OCR reading if barcode not found (ex.: 'KSZ,EKSZ'), OCR only runs with --ocr"], # pylint: disable=line-too-long
+                             ["-r", "--ratio", float, "Image ratio to check for OCR, only neccessary if `--text-prefixes` is given (ex.: 0.4 means it scans from top to bottom 40%% of the image)"], # pylint: disable=line-too-long
+                             [None, "--ocr", bool, "Opt in to the OCR fallback of --prefixes and --ratio, off by default as a crash of the OCR models on Windows cannot be caught"], # pylint: disable=line-too-long
+                             ["-y", "--symbols", str, "Allowed barcode symbologies (ex.: 'CODE128,QRCODE'), if left empty then every symbology is searched"], # pylint: disable=line-too-long
+                             ["-x", "--pattern", str, "Regular expression the barcode data must fully match (ex.: 'KSZ\\d{6}')"], # pylint: disable=line-too-long
+                             ["-c", "--checksum", str, "Checksum the barcode data must pass (luhn|mod10|mod43)"], # pylint: disable=line-too-long
+                             ["-w", "--workers", str, "Workers per stage in pipeline mode as split,render,decode,write (ex.: '1,2,4,2')"], # pylint: disable=line-too-long
+                             [None, "--queue-size", int, "Maximum number of pages waiting between two stages in pipeline mode, or uploads waiting for a worker in server mode, by default is 8"], # pylint: disable=line-too-long
+                             [None, "--host", str, "Address to listen on in server mode, by default is 127.0.0.1"], # pylint: disable=line-too-long
+                             [None, "--port", int, "Port to listen on in server mode, by default is 8080"], # pylint: disable=line-too-long
+                             [None, "--manifest", str, "Manifest file (.jsonl or .csv) to write in scan mode, by default it is created in the log directory"], # pylint: disable=line-too-long
+                             [None, "--compression", str, "Compression of the split pages (none|streams), by default is none"], # pylint: disable=line-too-long
+                             [None, "--bilevel", int, "Re-encode the page images as bilevel (CCITT G4) with the given threshold (0-255), for black and white scans"], # pylint: disable=line-too-long
+                             ["-o", "--order", str, "Order the files are dispatched in (longest|oldest|fifo), by default is longest (most pages first)"], # pylint: disable=line-too-long
+                             [None, "--memory-reserve", int, "Memory in MB kept free in multi mode, no new process starts below it, by default is 1024"], # pylint: disable=line-too-long
+                             [None, "--blank", str, "What happens to blank pages (decode|skip|drop|attach), by default is decode (no pre-check)"], # pylint: disable=line-too-long
+                             [None, "--blank-ratio", float, "A page is blank if less than this ratio of it is ink, by default is 0.0005"], # pylint: disable=line-too-long
+                             [None, "--separators", str, "Images of separator sheets, matching pages are dropped without decoding (ex.: 'sep.png,sep2.png')"], # pylint: disable=line-too-long
+                             ["-R", "--recursive", bool, "Process the PDF files in the subdirectories of the source too"], # pylint: disable=line-too-long
+                             [None, "--include", str, "Globs of the paths (relative to the source) to process (ex.: 'scanner1/*,*.pdf')"], # pylint: disable=line-too-long
+                             [None, "--exclude", str, "Globs of the paths (relative to the source, files or directories) to skip (ex.: 'archive,*_draft.pdf')"], # pylint: disable=line-too-long
+                             [None, "--index", bool, "Keep an index of the files processed in the log directory, unchanged files are not listed again"], # pylint: disable=line-too-long
+                             [None, "--batch-size", int, "Files listed before they are dispatched, the listing goes on while they are processed, by default is 500"], # pylint: disable=line-too-long
+                             [None, "--profile", bool, "Profile every worker with cProfile, the .pstats files and the merged report of the hottest functions are written to the log directory"], # pylint: disable=line-too-long
+                             [None, "--timeouts", str, "Seconds allowed per stage as split,render,decode,write (ex.: '300,120,120,60'), per page except for split, 0 is no limit. Stuck files go to the quarantine directory"], # pylint: disable=line-too-long
+                             [None, "--inboxes", str, "JSON file of the inboxes (name, source, destination and optionally backup, prefixes, ratio, symbols, pattern, checksum, weight), served by one pool of --processes workers with weighted fair share"]] # pylint: disable=line-too-long
 
 for arg in arg_list:
-    parser.add_argument(arg[0],
-                        arg[1],
-                        type = arg[2],
+    parser.add_argument(*[flag for flag in arg[:2] if flag],
+                        **({"action": "store_true"} if arg[2] is bool else {"type": arg[2]}),
                         help = arg[3])
 
-args: Namespace = parser.parse_args()
-
 def main() -> None:
     '''
-        Main function
+        Main function, the processing modules are only imported after the arguments are parsed
     '''
+    args: Namespace = parser.parse_args()
+    from src.main import PathConfig, run as run_by_arg_run # pylint: disable=import-outside-toplevel
     path_config: PathConfig = PathConfig(source = args.source or SOURCE_DIR,
                                          destination = args.destination or DESTINATION_DIR,
                                          temp = args.temp or TEMP_DIR,
                                          image = args.image or IMG_DIR,
                                          backup = args.backup or BACKUP_DIR,
+                                         quarantine = args.quarantine or QUARANTINE_DIR,
                                          log = args.log or LOG_DIR)
     run_by_arg_run(path_config = path_config,
                    mode = args.mode,
                    max_processes = args.processes,
                    ocr_prefixes = args.prefixes,
-                   ratio = args.ratio)
+                   ratio = args.ratio,
+                   symbols = args.symbols,
+                   pattern = args.pattern,
+                   checksum = args.checksum,
+                   stage_workers = args.workers,
+                   queue_size = args.queue_size,
+                   host = args.host,
+                   port = args.port,
+                   manifest = args.manifest,
+                   compression = args.compression,
+                   bilevel_threshold = args.bilevel,
+                   order = args.order,
+                   memory_reserve = args.memory_reserve,
+                   max_threads = args.threads,
+                   blank_policy = args.blank,
+                   blank_ink_ratio = args.blank_ratio,
+                   separators = args.separators,
+                   recursive = args.recursive,
+                   include = args.include,
+                   exclude = args.exclude,
+                   use_index = args.index,
+                   batch_size = args.batch_size,
+                   profile = args.profile,
+                   timeouts = args.timeouts,
+                   inboxes = args.inboxes,
+                   use_ocr = args.ocr)
 
 
 if __name__ == '__main__':
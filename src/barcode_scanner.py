@@ -1,14 +1,19 @@
 '''barcode scanner class'''
 
 import os
+from typing import TYPE_CHECKING
 from dataclasses import dataclass
-from pyzbar.pyzbar import decode as pyz_decode, Decoded
 from PIL import Image
+from PIL.Image import Image as PilImage
 from PIL.ImageOps import grayscale
 from PIL.ImageFile import ImageFile
 from PIL.ImageEnhance import Contrast
 from PIL.ImageFilter import SHARPEN
 from villog import Logger
+from src.classes.decoder_config import DecoderConfig
+
+if TYPE_CHECKING:
+    from pyzbar.pyzbar import Decoded, ZBarSymbol
 
 @dataclass(slots = True)
 class Barcode:
@@ -17,6 +22,7 @@ class Barcode:
     '''
     type: str
     data: str
+    method: str | None = None
 
 
 class Scanner:
@@ -25,6 +31,12 @@ class Scanner:
     '''
     ENHANCE_MIN: int = 0
     ENHANCE_MAX: int = 3
+    ENHANCE_METHODS: list[str] = ["original",
+                                  "grayscale",
+                                  "increase",
+                                  "contrast",
+                                  "sharpen"]
+    ''' Name of the image state by `enhance_count` '''
 
     CONTRAST_RATIO: float = 2.0
     INCREASE_RATIO: float = 2.0
@@ -33,22 +45,30 @@ class Scanner:
                             "image_file",
                             "image",
                             "logger",
+                            "decoder_config",
+                            "symbols",
                             "barcodes",
                             "enhance_count"]
 
     def __init__(self,
                  image_path: str,
-                 logger: Logger | None = None) -> None:
+                 decoder_config: DecoderConfig | None = None,
+                 logger: Logger | None = None,
+                 image: PilImage | None = None) -> None:
         '''
             Barcode scanner class
 
-            :param image_path: :class:`str` Path to the image
+            :param image_path: :class:`str` Path to the image, only used as name if `image` is given
+            :param decoder_config: :class:`Optional(Union(DecoderConfig, None))` Allowed symbologies and data validation, accepts every barcode if not provided. Defaults to `None`
             :param logger: :class:`Optional(Union(Logger, None))` Logger object, creates one if not provided. Defaults to `None`
+            :param image: :class:`Optional(Union(Image, None))` Image already in memory, `image_path` is not opened if given. Defaults to `None`
         ''' # pylint: disable=line-too-long
         self.image_path: str = image_path
-        self.image_file: ImageFile = Image.open(self.image_path)
+        self.image_file: ImageFile | PilImage = image if image is not None else Image.open(self.image_path)
         self.image = self.image_file.copy()
         self.logger: Logger = logger or Logger(file_path = f"{os.path.dirname(__file__)}.log")
+        self.decoder_config: DecoderConfig = decoder_config or DecoderConfig()
+        self.symbols: list[ZBarSymbol] | None = self.__get_zbar_symbols()
         self.barcodes: list[Barcode] = []
         self.enhance_count: int = self.ENHANCE_MIN
 
@@ -63,6 +83,22 @@ class Scanner:
         self.logger.log(content)
 
 
+    def __get_zbar_symbols(self) -> "list[ZBarSymbol] | None":
+        '''
+            Converts the allowed symbologies of `self.decoder_config` to `ZBarSymbol`
+        '''
+        if not self.decoder_config.symbols:
+            return None
+        from pyzbar.pyzbar import ZBarSymbol # pylint: disable=import-outside-toplevel
+        symbols: list[ZBarSymbol] = []
+        for symbol in self.decoder_config.symbols:
+            try:
+                symbols.append(ZBarSymbol[symbol])
+            except KeyError:
+                self.log(f"Unknown barcode symbology: '{symbol}', ignoring")
+        return symbols or None
+
+
     def __inc_enhance_cnt(self) -> None:
         '''
             Increments enhance count
@@ -138,13 +174,33 @@ class Scanner:
         return None
 
 
-    def __decode_pyz(self) -> list[Decoded]:
+    def __get_valid_codes(self,
+                          codes: "list[Decoded]") -> "list[Decoded]":
+        '''
+            Filters out the codes not passing `self.decoder_config`
+
+            :param codes: :class:`list[Decoded]` Decoded codes
+        '''
+        valid_codes: list[Decoded] = []
+        for code in codes:
+            if self.decoder_config.is_valid(symbol = code.type,
+                                            data = code.data.decode("utf-8",
+                                                                    errors = "replace")):
+                valid_codes.append(code)
+            else:
+                self.log(f"'{self.image_path}' Ignoring invalid barcode: {code.type} - {code.data}")
+        return valid_codes
+
+
+    def __decode_pyz(self) -> "list[Decoded]":
         '''
-            Decodes barcodes from `Image` and tries to enhance if fails
+            Decodes valid barcodes from `Image` and tries to enhance if fails
         '''
+        from pyzbar.pyzbar import decode as pyz_decode # pylint: disable=import-outside-toplevel
         barcodes: list[Decoded] = []
         while self.enhance_count <= self.ENHANCE_MAX and not barcodes:
-            barcodes = pyz_decode(self.image)
+            barcodes = self.__get_valid_codes(pyz_decode(self.image,
+                                                         symbols = self.symbols))
             if barcodes:
                 break
             self.__enhance_image()
@@ -160,7 +216,9 @@ class Scanner:
             if barcodes:
                 for code in barcodes:
                     barcode: Barcode = Barcode(type = code.type,
-                                         data = code.data.decode("utf-8"))
+                                               data = code.data.decode("utf-8"),
+                                               method = self.ENHANCE_METHODS[min(self.enhance_count,
+                                                                                 len(self.ENHANCE_METHODS) - 1)]) # pylint: disable=line-too-long
                     self.log(f"'{self.image_path}' Barcode found: {barcode.type} - {barcode.data}")
                     self.barcodes.append(barcode)
             else:
@@ -0,0 +1,112 @@
+'''
+    Decoder config class
+'''
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+from config import DEFAULT_SYMBOLS, DEFAULT_BARCODE_PATTERN, DEFAULT_BARCODE_CHECKSUM
+
+MOD43_CHARSET: str = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ-. $/+%"
+''' Character values of the `Code 39` mod 43 checksum '''
+
+def luhn_checksum(data: str) -> bool:
+    '''
+        Checks the Luhn (mod 10, 2-1 weighted) check digit
+
+        :param data: :class:`str` Data with the check digit at the end
+    '''
+    if len(data) < 2 or not data.isdigit():
+        return False
+    total: int = 0
+    for i, digit in enumerate(reversed(data)):
+        value: int = int(digit)
+        if i % 2:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return total % 10 == 0
+
+
+def mod10_checksum(data: str) -> bool:
+    '''
+        Checks the GS1 (`EAN`/`UPC`/`ITF`, 3-1 weighted) check digit
+
+        :param data: :class:`str` Data with the check digit at the end
+    '''
+    if len(data) < 2 or not data.isdigit():
+        return False
+    total: int = sum(int(digit) * (3 if i % 2 == 0 else 1) for i, digit in enumerate(reversed(data[:-1]))) # pylint: disable=line-too-long
+    return (10 - total % 10) % 10 == int(data[-1])
+
+
+def mod43_checksum(data: str) -> bool:
+    '''
+        Checks the `Code 39` mod 43 check character
+
+        :param data: :class:`str` Data with the check character at the end
+    '''
+    if len(data) < 2 or any(char not in MOD43_CHARSET for char in data):
+        return False
+    return sum(MOD43_CHARSET.index(char) for char in data[:-1]) % 43 == MOD43_CHARSET.index(data[-1])
+
+
+CHECKSUMS: dict[str, Callable[[str], bool]] = {"luhn": luhn_checksum,
+                                               "mod10": mod10_checksum,
+                                               "mod43": mod43_checksum}
+''' Available checksums by name '''
+
+
+class DecoderConfigException(Exception):
+    '''
+        Decoder config exception class
+    '''
+    def __init__(self,
+                 message: str | None = None):
+        '''
+            Decoder config exception class
+
+            :param message: :class:`Optional(Union(str, None))` Message to the exception. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        super().__init__(message or "Unknown decoder config exception")
+
+
+@dataclass(slots = False)
+class DecoderConfig:
+    '''
+        `DecoderConfig` class
+    '''
+    symbols: list[str] | None = DEFAULT_SYMBOLS
+    pattern: str | None = DEFAULT_BARCODE_PATTERN
+    checksum: str | None = DEFAULT_BARCODE_CHECKSUM
+
+    def __post_init__(self) -> None:
+        '''
+            Normalizes the symbologies and compiles the pattern
+        '''
+        self.symbols = [symbol.strip().upper() for symbol in self.symbols if symbol.strip()] if self.symbols else None # pylint: disable=line-too-long
+        self.checksum = self.checksum.strip().lower() if self.checksum else None
+        if self.checksum and self.checksum not in CHECKSUMS:
+            raise DecoderConfigException(f"Unknown checksum: '{self.checksum}', options: {', '.join(CHECKSUMS)}") # pylint: disable=line-too-long
+        try:
+            self.__compiled: re.Pattern | None = re.compile(self.pattern) if self.pattern else None
+        except re.error as error:
+            raise DecoderConfigException(f"Invalid barcode pattern '{self.pattern}': {error}") from error
+
+
+    def is_valid(self,
+                 symbol: str,
+                 data: str) -> bool:
+        '''
+            Checks if a decoded barcode is allowed and its data is valid
+
+            :param symbol: :class:`str` Symbology of the barcode (ex.: `"CODE128"`)
+            :param data: :class:`str` Data of the barcode
+        '''
+        if self.symbols and symbol.upper() not in self.symbols:
+            return False
+        if self.__compiled and not self.__compiled.fullmatch(data):
+            return False
+        if self.checksum and not CHECKSUMS[self.checksum](data):
+            return False
+        return True
@@ -0,0 +1,43 @@
+'''
+    Inbox class
+'''
+import re
+from dataclasses import dataclass, field
+from src.classes.path_config import PathConfig
+from src.classes.decoder_config import DecoderConfig
+
+class InboxException(Exception):
+    '''
+        Inbox exception class
+    '''
+    def __init__(self,
+                 message: str | None = None):
+        '''
+            Inbox exception class
+
+            :param message: :class:`Optional(Union(str, None))` Message to the exception. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        super().__init__(message or "Unknown inbox exception")
+
+
+@dataclass(slots = False)
+class Inbox:
+    '''
+        `Inbox` class, a source directory with its own destination and decoding settings
+    '''
+    name: str
+    path_config: PathConfig
+    ocr_prefixes: list[str] | None = None
+    ratio: float | None = None
+    decoder_config: DecoderConfig = field(default_factory = DecoderConfig)
+    weight: float = 1.0
+
+    def __post_init__(self) -> None:
+        '''
+            Checks the name (it names the working directories of the inbox) and the weight
+        '''
+        if not isinstance(self.name, str) or not re.fullmatch(r"[\w.-]+", self.name):
+            raise InboxException(f"Invalid inbox name: '{self.name}', only letters, digits, '_', '.' and '-' are allowed") # pylint: disable=line-too-long
+        if not isinstance(self.weight, (int, float)) or self.weight <= 0:
+            raise InboxException(f"Weight of inbox '{self.name}' should be a positive number, got: {self.weight}") # pylint: disable=line-too-long
+        self.weight = float(self.weight)
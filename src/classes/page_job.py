@@ -0,0 +1,19 @@
+'''
+    Page job class
+'''
+from dataclasses import dataclass, field
+from PIL.Image import Image
+from src.barcode_scanner import Barcode
+
+@dataclass(slots = True)
+class PageJob:
+    '''
+        `PageJob` class, a single page travelling through the `pipeline` stages
+    '''
+    source: str
+    split_pdf: str
+    image: str | None = None
+    barcodes: list[Barcode] = field(default_factory = list)
+    kind: str = "content"
+    frame: int | None = None
+    page: Image | None = None
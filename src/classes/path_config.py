@@ -3,7 +3,7 @@
 '''
 import os
 from dataclasses import dataclass, fields
-from config import SOURCE_DIR, DESTINATION_DIR, TEMP_DIR, IMG_DIR, LOG_DIR
+from config import SOURCE_DIR, DESTINATION_DIR, TEMP_DIR, IMG_DIR, LOG_DIR, QUARANTINE_DIR
 
 @dataclass(slots = False)
 class PathConfig:
@@ -16,6 +16,7 @@ class PathConfig:
     image: str = IMG_DIR
     backup: str | None = None
     log: str = LOG_DIR
+    quarantine: str | None = QUARANTINE_DIR
 
     def __post_init__(self) -> None:
         '''
@@ -0,0 +1,45 @@
+'''
+    Split options class
+'''
+from dataclasses import dataclass
+from config import SPLIT_COMPRESSIONS, DEFAULT_SPLIT_COMPRESSION, DEFAULT_BILEVEL_THRESHOLD
+
+class SplitOptionsException(Exception):
+    '''
+        Split options exception class
+    '''
+    def __init__(self,
+                 message: str | None = None):
+        '''
+            Split options exception class
+
+            :param message: :class:`Optional(Union(str, None))` Message to the exception. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        super().__init__(message or "Unknown split options exception")
+
+
+@dataclass(slots = False)
+class SplitOptions:
+    '''
+        `SplitOptions` class, how the split pages are written
+    '''
+    compression: str = DEFAULT_SPLIT_COMPRESSION
+    bilevel_threshold: int | None = DEFAULT_BILEVEL_THRESHOLD
+
+    def __post_init__(self) -> None:
+        '''
+            Checks the options
+        '''
+        self.compression = str(self.compression).strip().lower()
+        if self.compression not in SPLIT_COMPRESSIONS:
+            raise SplitOptionsException(f"Unknown compression: '{self.compression}', options: {', '.join(SPLIT_COMPRESSIONS)}") # pylint: disable=line-too-long
+        if self.bilevel_threshold is not None and not 0 <= self.bilevel_threshold <= 255:
+            raise SplitOptionsException(f"Bilevel threshold should be between 0 and 255, got: {self.bilevel_threshold}") # pylint: disable=line-too-long
+
+
+    @property
+    def compress_streams(self) -> bool:
+        '''
+            Content streams of the pages are compressed
+        '''
+        return self.compression != "none"
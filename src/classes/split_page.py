@@ -0,0 +1,15 @@
+'''
+    Split page class
+'''
+from dataclasses import dataclass, field
+from src.barcode_scanner import Barcode
+
+@dataclass(slots = True)
+class SplitPage:
+    '''
+        `SplitPage` class, a single page split in memory
+    '''
+    page: int
+    name: str
+    data: bytes
+    barcodes: list[Barcode] = field(default_factory = list)
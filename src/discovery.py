@@ -0,0 +1,281 @@
+'''
+    Source discovery module
+'''
+
+import os
+import json
+from fnmatch import fnmatch
+from collections.abc import Iterator
+from villog import Logger
+from config import DEFAULT_BATCH_SIZE
+
+class SourceDiscoveryException(Exception):
+    '''
+        Source discovery exception class
+    '''
+    def __init__(self,
+                 message: str | None = None):
+        '''
+            Source discovery exception class
+
+            :param message: :class:`Optional(Union(str, None))` Message to the exception. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        super().__init__(message or "Unknown source discovery exception")
+
+
+class SourceDiscovery:
+    '''
+        Lists the source directory with `os.scandir` and yields the files in batches, so work can start before the listing completes
+    ''' # pylint: disable=line-too-long
+    DONE_EXTENSION: str = ".done"
+    ''' Extension of the log next to the index the processed files are appended to, merged into the index on the next listing '''
+
+    __slots__: list[str] = ["recursive",
+                            "include",
+                            "exclude",
+                            "index_path",
+                            "batch_size",
+                            "logger"]
+
+    def __init__(self,
+                 recursive: bool = False,
+                 include: list[str] | None = None,
+                 exclude: list[str] | None = None,
+                 index_path: str | None = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 logger: Logger | None = None) -> None:
+        '''
+            Source discovery class
+
+            :param recursive: :class:`Optional(bool)` Lists the subdirectories too. Defaults to `False`
+            :param include: :class:`Optional(Union(list[str], None))` Globs of the relative paths to list, every file if empty. Defaults to `None`
+            :param exclude: :class:`Optional(Union(list[str], None))` Globs of the relative paths (files or directories) to skip. Defaults to `None`
+            :param index_path: :class:`Optional(Union(str, None))` JSON file of the files already processed, unchanged files (same modification time and size) are not listed again. Defaults to `None`
+            :param batch_size: :class:`Optional(int)` Number of files per batch. Defaults to `DEFAULT_BATCH_SIZE`
+            :param logger: :class:`Optional(Union(Logger, None))` Logger class, creates one if not provided. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise SourceDiscoveryException("'batch_size' should be a positive integer")
+        self.recursive: bool = recursive
+        self.include: list[str] = [pattern.replace("\\", "/") for pattern in include or [] if pattern]
+        self.exclude: list[str] = [pattern.replace("\\", "/") for pattern in exclude or [] if pattern]
+        self.index_path: str | None = index_path
+        self.batch_size: int = batch_size
+        self.logger: Logger = logger or Logger(file_path = f"{os.path.dirname(__file__)}.log")
+
+
+    def log(self,
+            content: str) -> None:
+        '''
+            Logs content
+
+            :param content: :class:`str` Content to log
+        '''
+        self.logger.log(content)
+
+
+    def __is_excluded(self,
+                      relative_path: str) -> bool:
+        '''
+            The relative path matches an exclude glob
+
+            :param relative_path: :class:`str` Path relative to the source, separated by `/`
+        '''
+        return any(fnmatch(relative_path, pattern) for pattern in self.exclude)
+
+
+    def __is_included(self,
+                      relative_path: str) -> bool:
+        '''
+            The relative path matches an include glob, or there are none
+
+            :param relative_path: :class:`str` Path relative to the source, separated by `/`
+        '''
+        return not self.include or any(fnmatch(relative_path, pattern) for pattern in self.include)
+
+
+    @staticmethod
+    def signature(path: str) -> list[float] | None:
+        '''
+            `[mtime, size]` of the file as stored in the index, `None` if it can not be read
+
+            :param path: :class:`str` File path
+        '''
+        try:
+            stat: os.stat_result = os.stat(path)
+            return [stat.st_mtime, stat.st_size]
+        except OSError:
+            return None
+
+
+    def load_index(self) -> dict[str, list[float]]:
+        '''
+            Reads the index of the files already processed with the ones appended since, `[mtime, size]` by path
+        ''' # pylint: disable=line-too-long
+        if not self.index_path:
+            return {}
+        index: dict = {}
+        if os.path.exists(self.index_path):
+            try:
+                with open(file = self.index_path,
+                          mode = "r",
+                          encoding = "utf-8") as index_file:
+                    index = json.load(index_file)
+                if not isinstance(index, dict):
+                    index = {}
+            except Exception as error: # pylint: disable=broad-exception-caught
+                self.log(f"Error reading index '{self.index_path}', listing every file: {error}")
+                index = {}
+        done_path: str = f"{self.index_path}{self.DONE_EXTENSION}"
+        if os.path.exists(done_path):
+            try:
+                with open(file = done_path,
+                          mode = "r",
+                          encoding = "utf-8") as done_file:
+                    for line in done_file:
+                        try:
+                            path, mtime, size = json.loads(line)
+                            index[path] = [mtime, size]
+                        except ValueError:
+                            # a line cut by a killed worker
+                            continue
+            except OSError as error:
+                self.log(f"Error reading '{done_path}': {error}")
+        return index
+
+
+    def mark_done(self,
+                  path: str,
+                  signature: list[float] | None) -> None:
+        '''
+            Appends a processed file to the index, the line is written at once so processes and threads can append side by side
+
+            :param path: :class:`str` File path as listed
+            :param signature: :class:`Union(list[float], None)` `[mtime, size]` of the file before it was processed, nothing is written if `None`
+        ''' # pylint: disable=line-too-long
+        if not self.index_path or signature is None:
+            return
+        try:
+            if os.path.dirname(self.index_path):
+                os.makedirs(os.path.dirname(self.index_path),
+                            exist_ok = True)
+            with open(file = f"{self.index_path}{self.DONE_EXTENSION}",
+                      mode = "a",
+                      encoding = "utf-8") as done_file:
+                done_file.write(f"{json.dumps([path] + signature)}\n")
+        except Exception as error: # pylint: disable=broad-exception-caught
+            self.log(f"Error adding {path} to the index: {error}")
+
+
+    def save_index(self,
+                   index: dict[str, list[float]]) -> bool:
+        '''
+            Writes the index of the files processed, replacing the previous one at once, returns if it was written
+
+            :param index: :class:`dict[str, list[float]]` `[mtime, size]` by path
+        '''
+        if not self.index_path:
+            return False
+        try:
+            if os.path.dirname(self.index_path):
+                os.makedirs(os.path.dirname(self.index_path),
+                            exist_ok = True)
+            temp_path: str = f"{self.index_path}.tmp"
+            with open(file = temp_path,
+                      mode = "w",
+                      encoding = "utf-8") as index_file:
+                json.dump(index,
+                          index_file)
+            os.replace(temp_path,
+                       self.index_path)
+            return True
+        except Exception as error: # pylint: disable=broad-exception-caught
+            self.log(f"Error writing index '{self.index_path}': {error}")
+            return False
+
+
+    def __remove_done_log(self) -> None:
+        '''
+            Removes the log of the processed files once it is merged into the index
+        '''
+        try:
+            os.remove(f"{self.index_path}{self.DONE_EXTENSION}")
+        except OSError as error:
+            self.log(f"Error removing '{self.index_path}{self.DONE_EXTENSION}': {error}")
+
+
+    def walk(self,
+             source: str,
+             extensions: list[str],
+             skip_dirs: list[str] | None = None) -> Iterator[tuple[str, os.stat_result]]:
+        '''
+            Yields the matching files of the source and their stat, the name is checked before any stat call
+
+            :param source: :class:`str` Source directory
+            :param extensions: :class:`list[str]` Accepted extensions, lowercase with the dot (ex.: `[".pdf"]`)
+            :param skip_dirs: :class:`Optional(Union(list[str], None))` Directories never entered (ex.: the destination inside the source). Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        skipped: set[str] = {os.path.realpath(directory) for directory in skip_dirs or [] if directory}
+        directories: list[tuple[str, str]] = [(source, "")]
+        while directories:
+            directory, relative_dir = directories.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        relative_path: str = f"{relative_dir}{entry.name}"
+                        try:
+                            if entry.is_dir(follow_symlinks = False):
+                                if self.recursive and not self.__is_excluded(relative_path) and os.path.realpath(entry.path) not in skipped: # pylint: disable=line-too-long
+                                    directories.append((entry.path,
+                                                        f"{relative_path}/"))
+                                continue
+                            if not entry.name.lower().endswith(tuple(extensions)):
+                                continue
+                            if self.__is_excluded(relative_path) or not self.__is_included(relative_path): # pylint: disable=line-too-long
+                                continue
+                            yield entry.path, entry.stat()
+                        except OSError as error:
+                            self.log(f"Error reading {entry.path}: {error}")
+            except OSError as error:
+                self.log(f"Error listing {directory}: {error}")
+
+
+    def batches(self,
+                source: str,
+                extensions: list[str],
+                skip_dirs: list[str] | None = None) -> Iterator[list[str]]:
+        '''
+            Yields the new or changed files of the source in batches of `self.batch_size`.
+            A file only gets into the index through `mark_done`, failed and locked files are listed again on the next run.
+
+            :param source: :class:`str` Source directory
+            :param extensions: :class:`list[str]` Accepted extensions, lowercase with the dot (ex.: `[".pdf"]`)
+            :param skip_dirs: :class:`Optional(Union(list[str], None))` Directories never entered. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        index: dict[str, list[float]] = self.load_index()
+        if self.index_path and os.path.exists(f"{self.index_path}{self.DONE_EXTENSION}"):
+            # the appended files are merged before any worker of this run appends again
+            if self.save_index(index):
+                self.__remove_done_log()
+        kept: dict[str, list[float]] = {}
+        batch: list[str] = []
+        unchanged: int = 0
+        for path, stat in self.walk(source,
+                                    extensions,
+                                    skip_dirs):
+            signature: list[float] = [stat.st_mtime, stat.st_size]
+            if index.get(path) == signature:
+                kept[path] = signature
+                unchanged += 1
+                continue
+            batch.append(path)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+        if unchanged:
+            self.log(f"Skipped {unchanged} unchanged file{'' if unchanged == 1 else 's'} already in the index") # pylint: disable=line-too-long
+        # files no longer in the source or changed since drop out of the index
+        if len(kept) != len(index):
+            self.save_index(kept)
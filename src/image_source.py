@@ -0,0 +1,186 @@
+'''
+    Image source module
+'''
+
+import os
+from pathlib import Path
+from threading import Lock
+from collections.abc import Iterator
+from PIL import ImageSequence
+from PIL.Image import Image, new as new_image, open as open_image
+from villog import Logger
+from src.classes.split_options import SplitOptions
+from config import IMAGE_EXTENSIONS, IMAGE_DEFAULT_DPI, IMAGE_PDF_QUALITY
+
+class ImageSource:
+    '''
+        Multi-page TIFF, PNG or JPEG source, its frames are read lazily and decoded without a PDF round-trip
+    ''' # pylint: disable=line-too-long
+    __slots__: list[str] = ["image_path",
+                            "logger",
+                            "image",
+                            "lock"]
+
+    def __init__(self,
+                 image_path: str,
+                 logger: Logger | None = None) -> None:
+        '''
+            Image source class
+
+            :param image_path: :class:`str` File path
+            :param logger: :class:`Optional(Union(Logger, None))` Logger class, creates one if not provided. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        self.image_path: str = image_path
+        self.logger: Logger = logger or Logger(file_path = f"{os.path.dirname(__file__)}.log")
+        self.image: Image | None = None
+        self.lock: Lock = Lock()
+
+
+    def log(self,
+            content: str) -> None:
+        '''
+            Logs content
+
+            :param content: :class:`str` Content to log
+        '''
+        self.logger.log(content)
+
+
+    @staticmethod
+    def is_image(path: str) -> bool:
+        '''
+            The file has an extension of `IMAGE_EXTENSIONS`
+
+            :param path: :class:`str` File path
+        '''
+        return path.lower().endswith(tuple(IMAGE_EXTENSIONS))
+
+
+    def page_count(self) -> int:
+        '''
+            Number of frames, read from the file structure without decoding them
+        '''
+        with open_image(self.image_path) as image:
+            return getattr(image, "n_frames", 1)
+
+
+    def page_path(self,
+                  output_dir: str,
+                  index: int,
+                  name: str | None = None) -> str:
+        '''
+            Path of the PDF the frame is written to, named like the pages of `PdfSplitter` with the extension of the image kept (`scan.tif_0.pdf`), so the pages of `scan.tif` and `scan.pdf` do not collide
+
+            :param output_dir: :class:`str` Directory of the page
+            :param index: :class:`int` Frame number, from 0
+            :param name: :class:`Optional(Union(str, None))` Name of the page before the extension, the file name without extension if not provided. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        return os.path.join(output_dir,
+                            f"{name or Path(self.image_path).stem}{Path(self.image_path).suffix}_{index}.pdf") # pylint: disable=line-too-long
+
+
+    def frames(self) -> Iterator[tuple[int, Image]]:
+        '''
+            Yields the frames one by one with their number, a frame is only decoded when it is used and is valid until the next one
+        ''' # pylint: disable=line-too-long
+        with open_image(self.image_path) as image:
+            count: int = getattr(image, "n_frames", 1)
+            self.log(f"{self.image_path} is {count} page{'s' if count > 1 else ''}")
+            for index, frame in enumerate(ImageSequence.Iterator(image)):
+                yield index, frame
+
+
+    def open(self) -> "ImageSource":
+        '''
+            Keeps the file open until `close`, so `frame` seeks in it instead of opening the file and walking to the frame every time
+        ''' # pylint: disable=line-too-long
+        with self.lock:
+            if self.image is None:
+                self.image = open_image(self.image_path)
+        return self
+
+
+    def close(self) -> None:
+        '''
+            Closes the file kept open by `open`
+        '''
+        with self.lock:
+            if self.image is not None:
+                self.image.close()
+                self.image = None
+
+
+    def frame(self,
+              index: int) -> Image:
+        '''
+            Decodes a single frame, from the file kept open by `open` (one frame at a time) or from the file opened and closed now
+
+            :param index: :class:`int` Frame number, from 0
+        ''' # pylint: disable=line-too-long
+        with self.lock:
+            if self.image is not None:
+                # the position of the frames already passed is kept, so a seek does not start from the first one
+                self.image.seek(index)
+                self.image.load()
+                return self.image.copy()
+        with open_image(self.image_path) as image:
+            image.seek(index)
+            image.load()
+            return image.copy()
+
+
+    @staticmethod
+    def __to_8bit(frame: Image) -> Image:
+        '''
+            Scales a 16 bit, 32 bit or float grayscale frame to `L`, a plain conversion would clip every value over 255
+
+            :param frame: :class:`Image` Frame of mode `I;16`, `I;16L`, `I;16B`, `I` or `F`
+        ''' # pylint: disable=line-too-long
+        page: Image = frame if frame.mode in ("I", "F") else frame.convert("I")
+        _, maximum = page.getextrema()
+        if page.mode == "F" and maximum <= 1.0:
+            # float images are usually 0.0 - 1.0
+            scale: float = 255.0
+        elif maximum <= 255:
+            scale = 1.0
+        else:
+            scale = 255.0 / (65535 if maximum <= 65535 else maximum)
+        return page.point(lambda value: value * scale).convert("L")
+
+
+    @staticmethod
+    def write_page(frame: Image,
+                   pdf_path: str,
+                   split_options: SplitOptions | None = None) -> int:
+        '''
+            Writes the frame as a single page PDF at its own resolution, returns the size of the file.
+            Bilevel frames (or every frame if `split_options.bilevel_threshold` is set) are saved with CCITT G4, the others as JPEG.
+
+            :param frame: :class:`Image`
+            :param pdf_path: :class:`str` File path of the PDF
+            :param split_options: :class:`Optional(Union(SplitOptions, None))` How the pages are written. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        page: Image = frame
+        if page.mode in ("RGBA", "LA", "PA") or (page.mode == "P" and "transparency" in page.info):
+            # transparent scans are put on white paper, not on black
+            page = page.convert("RGBA")
+            paper: Image = new_image("RGB",
+                                     page.size,
+                                     "white")
+            paper.paste(page,
+                        mask = page.getchannel("A"))
+            page = paper
+        elif page.mode.startswith("I") or page.mode == "F":
+            page = ImageSource.__to_8bit(page)
+        elif page.mode not in ("1", "L", "RGB", "CMYK"):
+            page = page.convert("RGB" if page.mode == "P" else "L")
+        if split_options is not None and split_options.bilevel_threshold is not None and page.mode != "1": # pylint: disable=line-too-long
+            threshold: int = split_options.bilevel_threshold
+            page = page.convert("L").point(lambda value: 255 if value >= threshold else 0,
+                                           mode = "1")
+        dpi: tuple[float, ...] = frame.info.get("dpi") or (IMAGE_DEFAULT_DPI,)
+        page.save(pdf_path,
+                  "PDF",
+                  resolution = float(dpi[0]) or IMAGE_DEFAULT_DPI,
+                  **({} if page.mode == "1" else {"quality": IMAGE_PDF_QUALITY}))
+        return os.path.getsize(pdf_path)
@@ -1,9 +1,11 @@
 '''imager class '''
 
 import os
-from pdf2image import convert_from_path
+from tempfile import TemporaryDirectory
+from collections.abc import Iterator
 from PIL.Image import Image
 from villog import Logger
+from src.watchdog import StageTimeoutException
 
 class Pdf2Img:
     '''
@@ -12,21 +14,25 @@ class Pdf2Img:
     __slots__: list[str] = ["pdf_path",
                             "output_path",
                             "logger",
+                            "timeout",
                             "image_path"]
     def __init__(self,
                  pdf_path: str,
                  output_path: str,
-                 logger: Logger | None = None) -> None:
+                 logger: Logger | None = None,
+                 timeout: float | None = None) -> None:
         '''
             Pdf2Img class
 
             :param pdf_path: :class:`str` Path to the .pdf file
             :param output_path: :class:`str` Path to the output directory
             :param logger: :class:`Optional(Union(logger, None))` Logger object, creates on if not provided. Defaults to `None`
+            :param timeout: :class:`Optional(Union(float, None))` Seconds poppler may render for, raises `StageTimeoutException` if over. Defaults to `None`
         ''' # pylint: disable=line-too-long
         self.pdf_path: str = pdf_path
         self.output_path: str = output_path
         self.logger: Logger = logger or Logger(file_path = f"{os.path.dirname(__file__)}.log")
+        self.timeout: float | None = timeout
         self.image_path: list[str] | str = []
 
 
@@ -40,11 +46,52 @@ class Pdf2Img:
         self.logger.log(content)
 
 
+    def __render(self,
+                 pdf_path: str,
+                 page_number: int | None = None) -> list[Image]:
+        '''
+            Renders the PDF file, or a single page of it, within `self.timeout`
+
+            :param pdf_path: :class:`str` File path
+            :param page_number: :class:`Optional(Union(int, None))` Page to render, from 1, every page if `None`. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        from pdf2image import convert_from_path # pylint: disable=import-outside-toplevel
+        from pdf2image.exceptions import PDFPopplerTimeoutError # pylint: disable=import-outside-toplevel
+        try:
+            return convert_from_path(pdf_path,
+                                     first_page = page_number,
+                                     last_page = page_number,
+                                     timeout = self.timeout)
+        except PDFPopplerTimeoutError as error:
+            page: str = "" if page_number is None else f" page {page_number} of"
+            raise StageTimeoutException(f"Rendering{page} {self.pdf_path} took over {self.timeout:.0f}s") from error # pylint: disable=line-too-long
+
+
+    def __render_pages(self,
+                       pdf_path: str) -> Iterator[Image]:
+        '''
+            Renders the PDF file one page at a time, each within `self.timeout`
+
+            :param pdf_path: :class:`str` File path
+        '''
+        from pdf2image import pdfinfo_from_path # pylint: disable=import-outside-toplevel
+        from pdf2image.exceptions import PDFPopplerTimeoutError # pylint: disable=import-outside-toplevel
+        try:
+            count: int = int(pdfinfo_from_path(pdf_path,
+                                               timeout = self.timeout)["Pages"])
+        except PDFPopplerTimeoutError as error:
+            raise StageTimeoutException(f"Reading the pages of {self.pdf_path} took over {self.timeout:.0f}s") from error # pylint: disable=line-too-long
+        self.log(f"Rendering {self.pdf_path} ({count} page{'' if count == 1 else 's'}) one page at a time") # pylint: disable=line-too-long
+        for page_number in range(1, count + 1):
+            yield from self.__render(pdf_path,
+                                     page_number)
+
+
     def convert(self) -> str:
         '''
             Convert to image
         '''
-        images: list[Image] = convert_from_path(self.pdf_path)
+        images: list[Image] = self.__render(self.pdf_path)
         pdf_path_name: str = os.path.basename(self.pdf_path).replace(".pdf", "").replace(".PDF", "")
         for i, image in enumerate(images):
             image_path: str = os.path.join(self.output_path,
@@ -54,6 +101,26 @@ class Pdf2Img:
             self.log(f"Converted {self.pdf_path} to {image_path}")
         return self.image_path
 
+    def pages(self,
+              pdf_data: bytes | None = None) -> Iterator[Image]:
+        '''
+            Yields the pages as images in memory one at a time, so only one page is held however long the document is.
+            `self.timeout` applies per page, nothing is saved to `self.output_path`
+
+            :param pdf_data: :class:`Optional(Union(bytes, None))` Content of the PDF file, written once to a system temporary file, `self.pdf_path` is rendered if `None`. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        if pdf_data is None:
+            yield from self.__render_pages(self.pdf_path)
+            return
+        with TemporaryDirectory() as directory:
+            pdf_path: str = os.path.join(directory,
+                                         "upload.pdf")
+            with open(file = pdf_path,
+                      mode = "wb") as pdf_file:
+                pdf_file.write(pdf_data)
+            yield from self.__render_pages(pdf_path)
+
+
     def convert_and_get_file(self) -> str:
         '''
             Convert file to image and get path
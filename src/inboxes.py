@@ -0,0 +1,440 @@
+'''
+    Inboxes module, several source directories served by one worker pool
+'''
+
+import os
+import json
+from time import perf_counter
+from queue import SimpleQueue, Empty
+from collections import deque
+from collections.abc import Iterator
+from dataclasses import dataclass
+from multiprocessing import Pool, Queue, freeze_support
+from multiprocessing.queues import Queue as ProcessQueue
+from villog import Logger
+from src.classes.path_config import PathConfig
+from src.classes.decoder_config import DecoderConfig
+from src.classes.inbox import Inbox, InboxException
+from src.manager import PdfManager
+from src.scheduler import Scheduler, ScheduledFile
+from src.discovery import SourceDiscovery
+from src.watchdog import Watchdog, own_process_group, kill_worker
+from config import MONITOR_INTERVAL
+
+inbox_managers: dict[str, PdfManager] = {}
+''' `PdfManager` by inbox name in the current pool worker, set by `init_inbox_worker` '''
+inbox_jobs: ProcessQueue | None = None
+''' Queue the pool worker reports `(file path, pid)` to when it starts a file, so a stuck worker can be killed '''
+
+def init_inbox_worker(managers: dict[str, PdfManager],
+                      jobs: ProcessQueue | None = None) -> None:
+    '''
+        Sets the `PdfManager`s of a pool worker, in a process group of its own so a stuck worker is killed with its subprocesses
+
+        :param managers: :class:`dict[str, PdfManager]` `PdfManager` by inbox name
+        :param jobs: :class:`Optional(Union(Queue, None))` Queue of the started files. Defaults to `None`
+    '''
+    global inbox_managers, inbox_jobs # pylint: disable=global-statement
+    own_process_group()
+    inbox_managers = managers
+    inbox_jobs = jobs
+
+
+def process_inbox_file(name: str,
+                       pdf_file: str,
+                       pages: int | None) -> tuple[int, float]:
+    '''
+        Processes a file of an inbox on a pool worker, returns its pages and the seconds it took
+
+        :param name: :class:`str` Name of the inbox
+        :param pdf_file: :class:`str` File path
+        :param pages: :class:`Union(int, None)` Pages of the file, counted here if `None`
+    '''
+    if inbox_jobs is not None:
+        inbox_jobs.put((pdf_file,
+                        os.getpid()))
+    start: float = perf_counter()
+    if pages is None:
+        pages = Scheduler.page_count(pdf_file) or 0
+    inbox_managers[name].process_file(pdf_file)
+    return pages, perf_counter() - start
+
+
+def split_list(value: str | list[str] | None) -> list[str] | None:
+    '''
+        A comma separated string or a list of strings as a list, `None` if empty
+
+        :param value: :class:`Union(str, list[str], None)`
+    '''
+    if isinstance(value, str):
+        value = value.split(",")
+    items: list[str] = [str(item).strip() for item in value or [] if str(item).strip()]
+    return items or None
+
+
+def load_inboxes(path: str,
+                 path_config: PathConfig,
+                 ocr_prefixes: list[str] | None = None,
+                 ratio: float | None = None,
+                 decoder_config: DecoderConfig | None = None) -> list[Inbox]:
+    '''
+        Reads the inbox definitions, a JSON list (or `{"inboxes": [...]}`) of objects with `name`, `source`, `destination` and optionally `backup`, `prefixes`, `ratio`, `symbols`, `pattern`, `checksum`, `weight`.
+        Settings not given fall back to the arguments, the temp, image, backup and quarantine directories get a subdirectory per inbox.
+
+        :param path: :class:`str` Path of the JSON file
+        :param path_config: :class:`PathConfig` Shared directories
+        :param ocr_prefixes: :class:`Optional(Union(list[str], None))` Default OCR prefixes. Defaults to `None`
+        :param ratio: :class:`Optional(Union(float, None))` Default OCR ratio. Defaults to `None`
+        :param decoder_config: :class:`Optional(Union(DecoderConfig, None))` Default decoder settings. Defaults to `None`
+    ''' # pylint: disable=line-too-long
+    try:
+        with open(file = path,
+                  mode = "r",
+                  encoding = "utf-8") as inbox_file:
+            definitions: list | dict = json.load(inbox_file)
+    except (OSError, json.JSONDecodeError) as error:
+        raise InboxException(f"Error reading inboxes '{path}': {error}") from error
+    if isinstance(definitions, dict):
+        definitions = definitions.get("inboxes")
+    if not isinstance(definitions, list) or not definitions:
+        raise InboxException(f"No inboxes defined in '{path}'")
+    decoder_config = decoder_config or DecoderConfig()
+    inboxes: list[Inbox] = []
+    for definition in definitions:
+        if not isinstance(definition, dict) or not definition.get("source") or not definition.get("destination"): # pylint: disable=line-too-long
+            raise InboxException(f"Every inbox needs a 'name', a 'source' and a 'destination': {definition}") # pylint: disable=line-too-long
+        name: str = str(definition.get("name", ""))
+        if name in [inbox.name for inbox in inboxes]:
+            raise InboxException(f"Inbox '{name}' is defined more than once")
+        inboxes.append(Inbox(name = name,
+                             path_config = PathConfig(source = definition["source"],
+                                                      destination = definition["destination"],
+                                                      temp = os.path.join(path_config.temp, name),
+                                                      image = os.path.join(path_config.image, name), # pylint: disable=line-too-long
+                                                      backup = definition.get("backup") or (os.path.join(path_config.backup, name) if path_config.backup else None), # pylint: disable=line-too-long
+                                                      log = path_config.log,
+                                                      quarantine = os.path.join(path_config.quarantine, name) if path_config.quarantine else None), # pylint: disable=line-too-long
+                             ocr_prefixes = split_list(definition["prefixes"]) if "prefixes" in definition else ocr_prefixes, # pylint: disable=line-too-long
+                             ratio = definition.get("ratio", ratio),
+                             decoder_config = DecoderConfig(symbols = split_list(definition["symbols"]) if "symbols" in definition else decoder_config.symbols, # pylint: disable=line-too-long
+                                                            pattern = definition.get("pattern", decoder_config.pattern), # pylint: disable=line-too-long
+                                                            checksum = definition.get("checksum", decoder_config.checksum)), # pylint: disable=line-too-long
+                             weight = definition.get("weight", 1.0)))
+    return inboxes
+
+
+@dataclass(slots = True)
+class InboxStats:
+    '''
+        `InboxStats` class, throughput of an inbox
+    '''
+    name: str
+    weight: float = 1.0
+    files: int = 0
+    pages: int = 0
+    busy_seconds: float = 0.0
+    first_start: float | None = None
+    last_finish: float | None = None
+
+    @property
+    def wall_seconds(self) -> float:
+        '''
+            Seconds from the first file started to the last finished
+        '''
+        if self.first_start is None or self.last_finish is None:
+            return 0.0
+        return self.last_finish - self.first_start
+
+
+    @property
+    def pages_per_second(self) -> float:
+        '''
+            Throughput of the inbox
+        '''
+        return self.pages / self.wall_seconds if self.wall_seconds else 0.0
+
+
+class FairShare:
+    '''
+        Weighted fair-share queue of the inboxes (start-time fair queueing).
+        Each inbox has a virtual time, advanced by the pages it is given divided by its weight, and the next file comes from the inbox with the lowest one, so a flood in one inbox cannot starve the others.
+    ''' # pylint: disable=line-too-long
+    __slots__: list[str] = ["weights",
+                            "virtual_times",
+                            "queues"]
+
+    def __init__(self,
+                 weights: dict[str, float]) -> None:
+        '''
+            Fair-share queue class
+
+            :param weights: :class:`dict[str, float]` Weight by inbox name
+        '''
+        self.weights: dict[str, float] = weights
+        self.virtual_times: dict[str, float] = {name: 0.0 for name in weights}
+        self.queues: dict[str, deque[ScheduledFile]] = {name: deque() for name in weights}
+
+
+    def pending(self,
+                name: str) -> int:
+        '''
+            Number of files waiting in the inbox
+
+            :param name: :class:`str` Name of the inbox
+        '''
+        return len(self.queues[name])
+
+
+    def push(self,
+             name: str,
+             scheduled_files: list[ScheduledFile]) -> None:
+        '''
+            Adds files to the inbox, an idle inbox starts from the lowest virtual time of the busy ones instead of its own, so idling does not earn credit
+
+            :param name: :class:`str` Name of the inbox
+            :param scheduled_files: :class:`list[ScheduledFile]` Files in dispatch order
+        ''' # pylint: disable=line-too-long
+        if not scheduled_files:
+            return
+        if not self.queues[name]:
+            busy: list[float] = [self.virtual_times[other] for other, queue in self.queues.items() if queue] # pylint: disable=line-too-long
+            if busy:
+                self.virtual_times[name] = max(self.virtual_times[name],
+                                               min(busy))
+        self.queues[name].extend(scheduled_files)
+
+
+    def next(self) -> tuple[str, ScheduledFile] | None:
+        '''
+            Takes the next file of the inbox with the lowest virtual time, `None` if every inbox is empty
+        ''' # pylint: disable=line-too-long
+        names: list[str] = [name for name, queue in self.queues.items() if queue]
+        if not names:
+            return None
+        name: str = min(names,
+                        key = lambda name: self.virtual_times[name])
+        scheduled_file: ScheduledFile = self.queues[name].popleft()
+        self.virtual_times[name] += scheduled_file.cost / self.weights[name]
+        return name, scheduled_file
+
+
+class InboxPool:
+    '''
+        Serves every inbox from one pool of worker processes, the files are dispatched by `FairShare` when a worker is free and a stuck worker is killed by the watchdog of its inbox
+    ''' # pylint: disable=line-too-long
+    __slots__: list[str] = ["inboxes",
+                            "managers",
+                            "logger"]
+
+    def __init__(self,
+                 pdf_manager: PdfManager,
+                 inboxes: list[Inbox],
+                 logger: Logger | None = None) -> None:
+        '''
+            Inbox pool class, a `PdfManager` is made per inbox from the settings of `pdf_manager`
+
+            :param pdf_manager: :class:`PdfManager` Shared settings (splitting, scheduling, page classifier, profiler, limits)
+            :param inboxes: :class:`list[Inbox]`
+            :param logger: :class:`Optional(Union(Logger, None))` Logger class, the logger of `pdf_manager` if not provided. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        if not inboxes:
+            raise InboxException("No inboxes given")
+        self.inboxes: list[Inbox] = inboxes
+        self.logger: Logger = logger or pdf_manager.logger
+        self.managers: dict[str, PdfManager] = {inbox.name: self.__manager(pdf_manager, inbox) for inbox in inboxes} # pylint: disable=line-too-long
+
+
+    def log(self,
+            content: str) -> None:
+        '''
+            Logs content
+
+            :param content: :class:`str` Content to log
+        '''
+        self.logger.log(content)
+
+
+    def __manager(self,
+                  pdf_manager: PdfManager,
+                  inbox: Inbox) -> PdfManager:
+        '''
+            `PdfManager` of the inbox, the index of the files seen and the quarantine are kept per inbox
+
+            :param pdf_manager: :class:`PdfManager` Shared settings
+            :param inbox: :class:`Inbox`
+        '''
+        index_path: str | None = pdf_manager.discovery.index_path
+        if index_path:
+            root, extension = os.path.splitext(index_path)
+            index_path = f"{root}_{inbox.name}{extension}"
+        return PdfManager(path_config = inbox.path_config,
+                          ocr_prefixes = inbox.ocr_prefixes,
+                          ratio = inbox.ratio,
+                          decoder_config = inbox.decoder_config,
+                          logger = self.logger,
+                          split_options = pdf_manager.split_options,
+                          scheduler = pdf_manager.scheduler,
+                          resource_monitor = pdf_manager.resource_monitor,
+                          page_classifier = pdf_manager.page_classifier,
+                          discovery = SourceDiscovery(recursive = pdf_manager.discovery.recursive,
+                                                      include = pdf_manager.discovery.include,
+                                                      exclude = pdf_manager.discovery.exclude,
+                                                      index_path = index_path,
+                                                      batch_size = pdf_manager.discovery.batch_size, # pylint: disable=line-too-long
+                                                      logger = self.logger),
+                          profiler = pdf_manager.profiler,
+                          watchdog = Watchdog(stage_timeouts = pdf_manager.watchdog.stage_timeouts,
+                                              file_timeout_per_page = pdf_manager.watchdog.file_timeout_per_page, # pylint: disable=line-too-long
+                                              quarantine_dir = inbox.path_config.quarantine,
+                                              logger = self.logger),
+                          use_ocr = pdf_manager.use_ocr)
+
+
+    def log_stats(self,
+                  stats: dict[str, InboxStats]) -> None:
+        '''
+            Logs the throughput of every inbox and its share of the pages
+
+            :param stats: :class:`dict[str, InboxStats]` Stats by inbox name
+        '''
+        total_pages: int = sum(inbox_stats.pages for inbox_stats in stats.values())
+        for inbox_stats in stats.values():
+            share: float = inbox_stats.pages / total_pages * 100 if total_pages else 0.0
+            self.log(f"Inbox '{inbox_stats.name}' (weight {inbox_stats.weight:g}): {inbox_stats.files} file{'' if inbox_stats.files == 1 else 's'}, {inbox_stats.pages} page{'' if inbox_stats.pages == 1 else 's'} in {inbox_stats.wall_seconds:.1f}s, {inbox_stats.pages_per_second:.2f} pages/s, {inbox_stats.busy_seconds:.1f} worker seconds, {share:.0f}% of the pages") # pylint: disable=line-too-long
+
+
+    def __kill_expired(self,
+                       in_flight: dict[str, tuple[str, ScheduledFile, float]],
+                       pids: dict[str, int],
+                       jobs: ProcessQueue) -> None:
+        '''
+            Kills the workers over the limits of the watchdog of their inbox and quarantines their files, the pool starts new workers in their place
+
+            :param in_flight: :class:`dict[str, tuple[str, ScheduledFile, float]]` Inbox name, file and dispatch time by file path, the killed files are removed
+            :param pids: :class:`dict[str, int]` Pid of the worker by file path, updated from `jobs`
+            :param jobs: :class:`Queue` Queue of the started files
+        ''' # pylint: disable=line-too-long
+        while True:
+            try:
+                path, pid = jobs.get_nowait()
+            except Empty:
+                break
+            if path in in_flight:
+                pids[path] = pid
+        for path, (name, scheduled_file, start) in list(in_flight.items()):
+            reason: str | None = self.managers[name].expired(scheduled_file,
+                                                             perf_counter() - start)
+            pid: int | None = pids.get(path)
+            # a worker that started another file has finished this one, its result is on the way
+            if reason is None or pid is None or [other for other, other_pid in pids.items() if other_pid == pid] != [path]: # pylint: disable=line-too-long
+                continue
+            self.log(f"Killing the worker of {path} of inbox '{name}': {reason}")
+            try:
+                kill_worker(pid)
+            except OSError as error:
+                self.log(f"Error killing worker {pid}: {error}")
+            in_flight.pop(path)
+            pids.pop(path)
+            self.managers[name].quarantine(path,
+                                           reason)
+
+
+    def __finish(self,
+                 item: tuple[str, str, tuple[int, float] | None, BaseException | None],
+                 in_flight: dict[str, tuple[str, ScheduledFile, float]],
+                 pids: dict[str, int],
+                 stats: dict[str, InboxStats]) -> None:
+        '''
+            Records a file a worker finished
+
+            :param item: :class:`tuple[str, str, Union(tuple[int, float], None), Union(BaseException, None)]` Inbox name, file path, pages and seconds, error
+            :param in_flight: :class:`dict[str, tuple[str, ScheduledFile, float]]` Inbox name, file and dispatch time by file path, the file is removed
+            :param pids: :class:`dict[str, int]` Pid of the worker by file path, the file is removed
+            :param stats: :class:`dict[str, InboxStats]` Stats by inbox name
+        ''' # pylint: disable=line-too-long
+        name, path, result, error = item
+        in_flight.pop(path, None)
+        pids.pop(path, None)
+        stats[name].last_finish = perf_counter()
+        if error is not None:
+            self.log(f"Error processing {path} of inbox '{name}': {error}")
+            return
+        pages, seconds = result
+        stats[name].files += 1
+        stats[name].pages += pages
+        stats[name].busy_seconds += seconds
+        self.log(f"Finished {path} of inbox '{name}' in {seconds:.1f}s")
+
+
+    def run(self,
+            workers: int = 2) -> dict[str, InboxStats]:
+        '''
+            Processes the files of every inbox, a file is only dispatched when a worker is free so the fair share holds while new batches are listed, returns the stats by inbox name
+
+            :param workers: :class:`Optional(int)` Number of worker processes. Defaults to `2`
+        ''' # pylint: disable=line-too-long
+        workers = max(workers, 1)
+        self.log(f"Serving {len(self.inboxes)} inbox{'' if len(self.inboxes) == 1 else 'es'} ({', '.join(f'{inbox.name}: {inbox.path_config.source}' for inbox in self.inboxes)}) using {workers} process{'' if workers == 1 else 'es'}") # pylint: disable=line-too-long
+        fair_share: FairShare = FairShare({inbox.name: inbox.weight for inbox in self.inboxes})
+        stats: dict[str, InboxStats] = {inbox.name: InboxStats(name = inbox.name,
+                                                               weight = inbox.weight) for inbox in self.inboxes} # pylint: disable=line-too-long
+        listings: dict[str, Iterator[list[ScheduledFile]]] = {name: manager.scheduled_file_batches(workers) for name, manager in self.managers.items()} # pylint: disable=line-too-long
+        finished: SimpleQueue = SimpleQueue()
+        jobs: ProcessQueue = Queue()
+        in_flight: dict[str, tuple[str, ScheduledFile, float]] = {}
+        pids: dict[str, int] = {}
+        last_check: float = perf_counter()
+        run_start: float = perf_counter()
+        freeze_support()
+        # imported once here, the forked workers inherit them
+        for manager in self.managers.values():
+            manager.preload()
+        with Pool(processes = workers,
+                  initializer = init_inbox_worker,
+                  initargs = (self.managers,
+                              jobs)) as pool:
+            while True:
+                # the next batch of an inbox is only listed when its queue runs empty
+                for name in list(listings):
+                    if not fair_share.pending(name):
+                        fair_share.push(name,
+                                        next(listings[name], None) or [])
+                        if not fair_share.pending(name):
+                            listings.pop(name)
+                while len(in_flight) < workers:
+                    item: tuple[str, ScheduledFile] | None = fair_share.next()
+                    if item is None:
+                        break
+                    name, scheduled_file = item
+                    if stats[name].first_start is None:
+                        stats[name].first_start = perf_counter()
+                    # a journal left by an earlier run would expire the file at once
+                    self.managers[name].journal(scheduled_file.path).remove()
+                    in_flight[scheduled_file.path] = (name,
+                                                      scheduled_file,
+                                                      perf_counter())
+                    pool.apply_async(process_inbox_file,
+                                     (name,
+                                      scheduled_file.path,
+                                      scheduled_file.pages),
+                                     callback = lambda result, name = name, path = scheduled_file.path: finished.put((name, path, result, None)), # pylint: disable=line-too-long
+                                     error_callback = lambda error, name = name, path = scheduled_file.path: finished.put((name, path, None, error))) # pylint: disable=line-too-long
+                if not in_flight:
+                    break
+                # waiting for a worker to be free
+                try:
+                    self.__finish(finished.get(timeout = MONITOR_INTERVAL),
+                                  in_flight,
+                                  pids,
+                                  stats)
+                except Empty:
+                    pass
+                # the stuck workers are looked for even while the others keep finishing files
+                if perf_counter() - last_check >= MONITOR_INTERVAL:
+                    self.__kill_expired(in_flight,
+                                        pids,
+                                        jobs)
+                    last_check = perf_counter()
+        self.log(f"All inboxes finished, makespan: {perf_counter() - run_start:.1f}s")
+        self.log_stats(stats)
+        return stats
@@ -3,36 +3,170 @@
 '''
 
 import os
-from villog import Logger
-from src.slave import date_string
+from src.safe_logger import SafeLogger
+from src.slave import date_string, datetime_string
 from src.classes.path_config import PathConfig
+from src.classes.decoder_config import DecoderConfig
+from src.classes.split_options import SplitOptions
 from src.manager import PdfManager
-from config import default_max_processes, SINGLE_PROCESS_COMMANDS, MULTI_PROCESS_COMMANDS
+from src.scheduler import Scheduler
+from src.resource_monitor import ResourceMonitor
+from src.page_classifier import PageClassifier
+from src.discovery import SourceDiscovery
+from src.profiler import Profiler
+from src.watchdog import Watchdog
+from src.inboxes import InboxPool, load_inboxes
+from config import default_max_processes, default_max_threads, SINGLE_PROCESS_COMMANDS, MULTI_PROCESS_COMMANDS, THREAD_COMMANDS, HYBRID_COMMANDS, PIPELINE_COMMANDS, PIPELINE_STAGES, default_stage_workers, DEFAULT_QUEUE_SIZE, SERVER_COMMANDS, DEFAULT_HOST, DEFAULT_PORT, SCAN_COMMANDS, DEFAULT_SPLIT_COMPRESSION, DEFAULT_BILEVEL_THRESHOLD, DEFAULT_SCHEDULE_POLICY, MEMORY_RESERVE_MB, DEFAULT_SYMBOLS, DEFAULT_BARCODE_PATTERN, DEFAULT_BARCODE_CHECKSUM, DEFAULT_BLANK_POLICY, BLANK_INK_RATIO, DEFAULT_BATCH_SIZE, INDEX_FILE_NAME, STAGE_TIMEOUTS # pylint: disable=line-too-long
+
+def parse_stage_workers(stage_workers: str | None) -> dict[str, int]:
+    '''
+        Parses the workers per pipeline stage (ex.: `"1,2,4,2"` for `split,render,decode,write`), missing or invalid values fall back to `default_stage_workers`
+
+        :param stage_workers: :class:`Union(str, None)`
+    ''' # pylint: disable=line-too-long
+    workers: dict[str, int] = dict(default_stage_workers)
+    if not stage_workers or not isinstance(stage_workers,
+                                           str):
+        return workers
+    for stage, value in zip(PIPELINE_STAGES,
+                            stage_workers.strip().replace(" ", "").split(",")):
+        if value.isdigit() and int(value) > 0:
+            workers[stage] = int(value)
+    return workers
+
+
+def parse_stage_timeouts(stage_timeouts: str | None) -> dict[str, float]:
+    '''
+        Parses the seconds allowed per stage (ex.: `"300,120,120,60"` for `split,render,decode,write`), `0` is no limit, missing or invalid values fall back to `STAGE_TIMEOUTS`
+
+        :param stage_timeouts: :class:`Union(str, None)`
+    ''' # pylint: disable=line-too-long
+    timeouts: dict[str, float] = dict(STAGE_TIMEOUTS)
+    if not stage_timeouts or not isinstance(stage_timeouts,
+                                            str):
+        return timeouts
+    for stage, value in zip(PIPELINE_STAGES,
+                            stage_timeouts.strip().replace(" ", "").split(",")):
+        try:
+            if float(value) >= 0:
+                timeouts[stage] = float(value)
+        except ValueError:
+            pass
+    return timeouts
+
 
 def run(path_config: PathConfig | None = None,
         mode: str = "single",
         max_processes: int = default_max_processes,
         ocr_prefixes: str | None = None,
-        ratio: float | None = None) -> None:
+        ratio: float | None = None,
+        symbols: str | None = None,
+        pattern: str | None = None,
+        checksum: str | None = None,
+        stage_workers: str | None = None,
+        queue_size: int | None = None,
+        host: str | None = None,
+        port: int | None = None,
+        manifest: str | None = None,
+        compression: str | None = None,
+        bilevel_threshold: int | None = None,
+        order: str | None = None,
+        memory_reserve: int | None = None,
+        max_threads: int | None = None,
+        blank_policy: str | None = None,
+        blank_ink_ratio: float | None = None,
+        separators: str | None = None,
+        recursive: bool = False,
+        include: str | None = None,
+        exclude: str | None = None,
+        use_index: bool = False,
+        batch_size: int | None = None,
+        profile: bool = False,
+        timeouts: str | None = None,
+        inboxes: str | None = None,
+        use_ocr: bool = False) -> None:
     '''
         Main function for the splitter
     
         :param path_config: :class:`Optional(Union(PathConfig, None))` Defaults to `None`
-        :param mode: :class:`Optional(str)` Mode of operation. Defaults to `"single"`. Options: `"single"`, `"multi"`
+        :param mode: :class:`Optional(str)` Mode of operation. Defaults to `"single"`. Options: `"single"`, `"multi"`, `"threads"`, `"hybrid"`, `"pipeline"`, `"server"`, `"scan"`
         :param max_processes: :class:`Optional(int)` Maximum number of processes to run. Defaults to `default_max_processes`
         :param ocr_prefixes: :class:`Optional(Union(str, None))` defaults to `None`
         :param ratio: :class:`Optional(Union(float, None))` defaults to `None`
+        :param symbols: :class:`Optional(Union(str, None))` Allowed barcode symbologies (ex.: `"CODE128,QRCODE"`). Defaults to `None`
+        :param pattern: :class:`Optional(Union(str, None))` Regular expression the barcode data must fully match. Defaults to `None`
+        :param checksum: :class:`Optional(Union(str, None))` Checksum the barcode data must pass. Defaults to `None`
+        :param stage_workers: :class:`Optional(Union(str, None))` Workers per stage in `pipeline` mode (ex.: `"1,2,4,2"` for `split,render,decode,write`). Defaults to `None`
+        :param queue_size: :class:`Optional(Union(int, None))` Maximum number of pages waiting between two stages in `pipeline` mode, or uploads waiting for a worker in `server` mode. Defaults to `None`
+        :param host: :class:`Optional(Union(str, None))` Address to listen on in `server` mode. Defaults to `None`
+        :param port: :class:`Optional(Union(int, None))` Port to listen on in `server` mode. Defaults to `None`
+        :param manifest: :class:`Optional(Union(str, None))` Manifest file (`.jsonl` or `.csv`) in `scan` mode, created in the log directory if not given. Defaults to `None`
+        :param compression: :class:`Optional(Union(str, None))` Compression of the split pages (`none`, `streams`). Defaults to `None`
+        :param bilevel_threshold: :class:`Optional(Union(int, None))` Threshold (0-255) to re-encode page images as bilevel. Defaults to `None`
+        :param order: :class:`Optional(Union(str, None))` File dispatch order (`longest`, `oldest`, `fifo`). Defaults to `None`
+        :param memory_reserve: :class:`Optional(Union(int, None))` Memory (MB) kept free in multi-process mode, no new process starts below it. Defaults to `None`
+        :param max_threads: :class:`Optional(Union(int, None))` Maximum number of threads (per process) in `threads`/`hybrid` mode. Defaults to `None`
+        :param blank_policy: :class:`Optional(Union(str, None))` What happens to blank pages (`decode`, `skip`, `drop`, `attach`). Defaults to `None`
+        :param blank_ink_ratio: :class:`Optional(Union(float, None))` A page is blank below this ratio of ink. Defaults to `None`
+        :param separators: :class:`Optional(Union(str, None))` Images of the separator sheets, dropped without decoding (ex.: `"sep.png,sep2.png"`). Defaults to `None`
+        :param recursive: :class:`Optional(bool)` Lists the subdirectories of the source too. Defaults to `False`
+        :param include: :class:`Optional(Union(str, None))` Globs of the relative paths to process (ex.: `"scanner1/*,*.pdf"`). Defaults to `None`
+        :param exclude: :class:`Optional(Union(str, None))` Globs of the relative paths (files or directories) to skip (ex.: `"archive,*_draft.pdf"`). Defaults to `None`
+        :param use_index: :class:`Optional(bool)` Keeps an index of the files processed in the log directory, unchanged files are not listed again. Defaults to `False`
+        :param batch_size: :class:`Optional(Union(int, None))` Files listed before they are dispatched. Defaults to `None`
+        :param profile: :class:`Optional(bool)` Profiles every worker, the `.pstats` files and their merged report are written to the log directory. Defaults to `False`
+        :param timeouts: :class:`Optional(Union(str, None))` Seconds allowed per stage (ex.: `"300,120,120,60"` for `split,render,decode,write`, `0` is no limit), stuck files go to the quarantine directory. Defaults to `None`
+        :param inboxes: :class:`Optional(Union(str, None))` JSON file of the inbox definitions, every inbox is served by one pool of `max_processes` workers, `mode` is not used. Defaults to `None`
+        :param use_ocr: :class:`Optional(bool)` Opts in to the OCR fallback of `ocr_prefixes` and `ratio`, off by default as a crash of torch/EasyOCR on Windows cannot be caught. Defaults to `False`
     ''' # pylint: disable=line-too-long
     path_config = path_config or PathConfig()
+    logger: SafeLogger = SafeLogger(file_path = os.path.join(path_config.log,
+                                                             f"{date_string()}.log"))
     ocr_prefix_list: list[str] | None = None if not ocr_prefixes or not isinstance(ocr_prefixes,
                                                                                    str) else ocr_prefixes.strip().replace(" ", "").split(",")
+    if ocr_prefix_list and not use_ocr:
+        logger.log("OCR prefixes given without 'use_ocr', the OCR fallback does not run")
+    decoder_config: DecoderConfig = DecoderConfig(symbols = symbols.strip().replace(" ", "").split(",") if symbols else DEFAULT_SYMBOLS, # pylint: disable=line-too-long
+                                                  pattern = pattern or DEFAULT_BARCODE_PATTERN,
+                                                  checksum = checksum or DEFAULT_BARCODE_CHECKSUM)
     pdf_manager: PdfManager = PdfManager(path_config = path_config,
                                          ocr_prefixes = ocr_prefix_list,
                                          ratio = ratio,
-                                         logger = Logger(file_path = os.path.join(path_config.log,
-                                                                                  f"{date_string()}.log")))
+                                         decoder_config = decoder_config,
+                                         logger = logger,
+                                         split_options = SplitOptions(compression = compression or DEFAULT_SPLIT_COMPRESSION,
+                                                                      bilevel_threshold = bilevel_threshold if bilevel_threshold is not None else DEFAULT_BILEVEL_THRESHOLD), # pylint: disable=line-too-long
+                                         scheduler = Scheduler(policy = order or DEFAULT_SCHEDULE_POLICY,
+                                                               logger = logger),
+                                         resource_monitor = ResourceMonitor(reserve_mb = memory_reserve if isinstance(memory_reserve, int) and memory_reserve >= 0 else MEMORY_RESERVE_MB, # pylint: disable=line-too-long
+                                                                            logger = logger),
+                                         page_classifier = PageClassifier(blank_policy = blank_policy or DEFAULT_BLANK_POLICY,
+                                                                          blank_ink_ratio = blank_ink_ratio if isinstance(blank_ink_ratio, float) and blank_ink_ratio >= 0 else BLANK_INK_RATIO, # pylint: disable=line-too-long
+                                                                          separator_templates = [separator for separator in separators.split(",") if separator.strip()] if separators else None, # pylint: disable=line-too-long
+                                                                          logger = logger),
+                                         discovery = SourceDiscovery(recursive = bool(recursive),
+                                                                     include = include.split(",") if include else None, # pylint: disable=line-too-long
+                                                                     exclude = exclude.split(",") if exclude else None, # pylint: disable=line-too-long
+                                                                     index_path = os.path.join(path_config.log, INDEX_FILE_NAME) if use_index else None, # pylint: disable=line-too-long
+                                                                     batch_size = batch_size if isinstance(batch_size, int) and batch_size > 0 else DEFAULT_BATCH_SIZE, # pylint: disable=line-too-long
+                                                                     logger = logger),
+                                         profiler = Profiler(directory = os.path.join(path_config.log, f"profile_{datetime_string()}") if profile else None, # pylint: disable=line-too-long
+                                                             logger = logger),
+                                         watchdog = Watchdog(stage_timeouts = parse_stage_timeouts(timeouts),
+                                                             quarantine_dir = path_config.quarantine,
+                                                             logger = logger),
+                                         use_ocr = bool(use_ocr))
     mode = str(mode).lower()
-    if mode in MULTI_PROCESS_COMMANDS:
+    if inboxes:
+        workers: int = max_processes if isinstance(max_processes, int) and max_processes > 0 else default_max_processes # pylint: disable=line-too-long
+        pdf_manager.log(f"Running in inbox mode from '{inboxes}'")
+        InboxPool(pdf_manager = pdf_manager,
+                  inboxes = load_inboxes(path = inboxes,
+                                         path_config = path_config,
+                                         ocr_prefixes = ocr_prefix_list,
+                                         ratio = ratio,
+                                         decoder_config = decoder_config)).run(workers = workers)
+    elif mode in MULTI_PROCESS_COMMANDS:
         pdf_manager.log("Running in multi-process mode")
         if not isinstance(max_processes, int) or max_processes <= 1:
             if max_processes is None:
@@ -41,6 +175,37 @@ def run(path_config: PathConfig | None = None,
                 pdf_manager.log(f"Invalid value for 'max_processes': {max_processes}, using default value: {default_max_processes} (no. of CPU threads)") # pylint: disable=line-too-long
             max_processes: int = default_max_processes
         pdf_manager.multi_process_all(max_processes = max_processes or default_max_processes)
+    elif mode in THREAD_COMMANDS:
+        threads: int = max_threads if isinstance(max_threads, int) and max_threads > 0 else default_max_threads # pylint: disable=line-too-long
+        pdf_manager.log("Running in multi-thread mode")
+        pdf_manager.thread_process_all(max_threads = threads)
+    elif mode in HYBRID_COMMANDS:
+        threads: int = max_threads if isinstance(max_threads, int) and max_threads > 0 else default_max_threads # pylint: disable=line-too-long
+        processes: int = max_processes if isinstance(max_processes, int) and max_processes > 0 else max(default_max_processes // threads, 1) # pylint: disable=line-too-long
+        pdf_manager.log("Running in hybrid (processes x threads) mode")
+        pdf_manager.hybrid_process_all(max_processes = processes,
+                                       max_threads = threads)
+    elif mode in PIPELINE_COMMANDS:
+        pdf_manager.log("Running in pipeline mode")
+        if max_processes:
+            pdf_manager.log(f"Max processes is not used in pipeline mode, ignoring value: {max_processes}") # pylint: disable=line-too-long
+        pdf_manager.pipeline_process_all(stage_workers = parse_stage_workers(stage_workers),
+                                         queue_size = queue_size if isinstance(queue_size, int) and queue_size > 0 else DEFAULT_QUEUE_SIZE) # pylint: disable=line-too-long
+    elif mode in SCAN_COMMANDS:
+        pdf_manager.log("Running in scan-only mode")
+        pdf_manager.scan_all(manifest_path = manifest or os.path.join(path_config.log,
+                                                                      f"manifest_{datetime_string()}.jsonl"), # pylint: disable=line-too-long
+                             max_processes = max_processes if isinstance(max_processes, int) and max_processes > 0 else default_max_processes) # pylint: disable=line-too-long
+    elif mode in SERVER_COMMANDS:
+        # imported here so the other modes don't pay for the HTTP server
+        from src.server import SplitServer # pylint: disable=import-outside-toplevel
+        workers: int = max_processes if isinstance(max_processes, int) and max_processes > 0 else default_max_processes # pylint: disable=line-too-long
+        pdf_manager.log(f"Running in server mode with {workers} worker{'' if workers == 1 else 's'}")
+        SplitServer(pdf_manager = pdf_manager,
+                    host = host or DEFAULT_HOST,
+                    port = port or DEFAULT_PORT,
+                    workers = workers,
+                    queue_size = queue_size if isinstance(queue_size, int) and queue_size >= 0 else DEFAULT_QUEUE_SIZE).serve() # pylint: disable=line-too-long
     else:
         if mode.lower() not in SINGLE_PROCESS_COMMANDS and mode.lower() in MULTI_PROCESS_COMMANDS:
             pdf_manager.log(f"Unknown mode: '{mode}', anyway...")
@@ -48,4 +213,5 @@ def run(path_config: PathConfig | None = None,
             pdf_manager.log(f"Max processes is not used in single-process mode, ignoring value: {max_processes}") # pylint: disable=line-too-long
         pdf_manager.log("Running in single-process mode")
         pdf_manager.process_all()
+    pdf_manager.profiler.report()
     pdf_manager.log("PDF splitter finished")
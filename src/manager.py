@@ -3,14 +3,34 @@
 '''
 
 import os
+from hashlib import sha1
+from importlib import import_module
+from time import perf_counter, sleep
 from pathlib import Path
-from multiprocessing import Process, freeze_support
+from threading import Lock, Thread
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Process, Pool, Value, freeze_support
+from multiprocessing.sharedctypes import Synchronized
+from collections.abc import Iterator
+from PIL.Image import Image, open as open_image
 from villog import Logger
 from src.classes.path_config import PathConfig
+from src.classes.decoder_config import DecoderConfig
+from src.classes.split_options import SplitOptions
+from src.classes.page_job import PageJob
+from src.classes.split_page import SplitPage
+from src.manifest import ManifestRow, ManifestWriter
+from src.scheduler import Scheduler, ScheduledFile
+from src.resource_monitor import ResourceMonitor
+from src.page_classifier import PageClassifier
+from src.discovery import SourceDiscovery
+from src.profiler import Profiler
+from src.watchdog import Watchdog, Journal, StageTimeoutException, run_in_process_group, kill_worker
+from config import MONITOR_INTERVAL, KILL_GRACE, IMAGE_EXTENSIONS
 from src.pdf_splitter import PdfSplitter
 from src.imager import Pdf2Img
+from src.image_source import ImageSource
 from src.barcode_scanner import Scanner, Barcode
-from src.ocr_reader import ImgData, OcrReader
 
 class PdfManagerException(Exception):
     '''
@@ -31,28 +51,69 @@ class PdfManager:
         Pdf manager class
     '''
     EXTENSION: str = ".pdf"
+    STAGE_MODULES: list[str] = ["pypdf",
+                                "pdf2image",
+                                "pyzbar.pyzbar"]
+    ''' Dependencies of the split, render and decode stages, imported at first use '''
 
     __slots__ = ["config",
                  "ocr_prefixes",
                  "ratio",
+                 "use_ocr",
+                 "decoder_config",
+                 "split_options",
+                 "scheduler",
+                 "resource_monitor",
+                 "page_classifier",
+                 "discovery",
+                 "profiler",
+                 "watchdog",
                  "logger"]
     def __init__(self,
                  path_config: PathConfig,
                  ocr_prefixes: list[str] | None = None,
                  ratio: float | None = None,
-                 logger: Logger | None = None) -> None:
+                 decoder_config: DecoderConfig | None = None,
+                 logger: Logger | None = None,
+                 split_options: SplitOptions | None = None,
+                 scheduler: Scheduler | None = None,
+                 resource_monitor: ResourceMonitor | None = None,
+                 page_classifier: PageClassifier | None = None,
+                 discovery: SourceDiscovery | None = None,
+                 profiler: Profiler | None = None,
+                 watchdog: Watchdog | None = None,
+                 use_ocr: bool = False) -> None:
         '''
             PDF manager class
 
             :param path_config: :class:`PathConfig`
             :param ocr_prefixes: class:`Optional(Union(list[str], None))` Defaults to `None`
             :param ratio: :class:`Optional(Union(float, None))` Defaults to `None`
+            :param decoder_config: :class:`Optional(Union(DecoderConfig, None))` Allowed symbologies and data validation. Defaults to `None`
             :param logger: :class:`Optional(Union(Logger, None))` Logger class, creates one if not provided. Defaults to `None`
+            :param split_options: :class:`Optional(Union(SplitOptions, None))` Compression and image re-encoding of the split pages. Defaults to `None`
+            :param scheduler: :class:`Optional(Union(Scheduler, None))` Orders the files before dispatching, longest first if not provided. Defaults to `None`
+            :param resource_monitor: :class:`Optional(Union(ResourceMonitor, None))` Admits new processes by free memory and load in multi-process mode. Defaults to `None`
+            :param page_classifier: :class:`Optional(Union(PageClassifier, None))` Finds blank pages and separator sheets before decoding. Defaults to `None`
+            :param discovery: :class:`Optional(Union(SourceDiscovery, None))` Lists the source in batches (recursion, globs, index of the files seen), the top level of the source if not provided. Defaults to `None`
+            :param profiler: :class:`Optional(Union(Profiler, None))` Profiles every file (page in pipeline mode) on the worker processing it, disabled if not provided. Defaults to `None`
+            :param watchdog: :class:`Optional(Union(Watchdog, None))` Time limits per stage and per file, stuck files go to the quarantine directory. Defaults to `None`
+            :param use_ocr: :class:`Optional(bool)` Opts in to the OCR fallback (needs `ocr_prefixes` and `ratio` too). Off by default: OCR crashed the worker silently on Windows, a native crash in torch/EasyOCR that cannot be caught and logged. Defaults to `False`
         ''' # pylint: disable=line-too-long
         self.config: PathConfig = path_config
         self.ocr_prefixes: list[str] | None = ocr_prefixes
         self.ratio: list[float] | None = ratio
+        self.use_ocr: bool = use_ocr
+        self.decoder_config: DecoderConfig = decoder_config or DecoderConfig()
+        self.split_options: SplitOptions = split_options or SplitOptions()
         self.logger: Logger = logger or Logger(file_path = f"{os.path.dirname(__file__)}.log")
+        self.scheduler: Scheduler = scheduler or Scheduler(logger = self.logger)
+        self.resource_monitor: ResourceMonitor = resource_monitor or ResourceMonitor(logger = self.logger)
+        self.page_classifier: PageClassifier = page_classifier or PageClassifier(logger = self.logger)
+        self.discovery: SourceDiscovery = discovery or SourceDiscovery(logger = self.logger)
+        self.profiler: Profiler = profiler or Profiler(logger = self.logger)
+        self.watchdog: Watchdog = watchdog or Watchdog(quarantine_dir = self.config.quarantine,
+                                                       logger = self.logger)
 
 
     def log(self,
@@ -65,35 +126,164 @@ class PdfManager:
         self.logger.log(content)
 
 
-    def __files_in_dir(self) -> list[str]:
+    def ocr_enabled(self) -> bool:
         '''
-            Get the list of PDF files in {pdf_dir} with the extension of {EXTENSION}
+            Whether the OCR fallback runs: opted in with `use_ocr`, with prefixes and a ratio given
         '''
-        files_in_dir: list[str] = []
-        for file in os.listdir(self.config.source):
-            if file.lower().endswith(self.EXTENSION):
-                files_in_dir.append(os.path.join(self.config.source,
-                                                 file))
-        return files_in_dir
+        return self.use_ocr and self.ratio is not None and bool(self.ocr_prefixes)
+
+
+    def preload(self) -> None:
+        '''
+            Imports the stage dependencies now instead of at first use, for long-running workers forked from a threaded process
+        ''' # pylint: disable=line-too-long
+        modules: list[str] = self.STAGE_MODULES + (["src.ocr_reader"] if self.ocr_enabled() else []) # pylint: disable=line-too-long
+        for module in modules:
+            try:
+                import_module(module)
+            except Exception as error: # pylint: disable=broad-exception-caught
+                self.log(f"Error importing {module}: {error}")
+
+
+    def __file_batches(self) -> Iterator[list[str]]:
+        '''
+            Yields the PDF files of {pdf_dir} with the extension of {EXTENSION} (and the image files of `IMAGE_EXTENSIONS`) in batches of `self.discovery`, the output directories are never listed
+        ''' # pylint: disable=line-too-long
+        found: int = 0
+        for batch in self.discovery.batches(source = self.config.source,
+                                            extensions = [self.EXTENSION] + IMAGE_EXTENSIONS,
+                                            skip_dirs = [self.config.destination,
+                                                         self.config.temp,
+                                                         self.config.image,
+                                                         self.config.backup,
+                                                         self.config.quarantine,
+                                                         self.config.log]):
+            found += len(batch)
+            self.log(f"Found {len(batch)} file{'' if len(batch) < 2 else 's'} ({found} so far)")
+            yield batch
+        if not found:
+            self.log("No files found")
+
+
+    def __relative_path(self,
+                        file_path: str) -> str:
+        '''
+            Path of the file relative to the source, the file name if it is not in the source
+
+            :param file_path: :class:`str` File path
+        '''
+        try:
+            relative_path: str = os.path.relpath(file_path,
+                                                 self.config.source)
+        except ValueError:
+            # on another drive (Windows)
+            return os.path.basename(file_path)
+        return os.path.basename(file_path) if relative_path.startswith(os.pardir) else relative_path
+
+
+    def work_name(self,
+                  file_path: str) -> str:
+        '''
+            Name of the temporary files of a source file: its stem at the top of the source, otherwise its path relative to the source without the extension,
+            the directories joined by `_` and followed by a short hash of the relative path, so `sub/a.pdf` and `sub_a.pdf` get different pages, images and journals.
+
+            :param file_path: :class:`str` File path
+        ''' # pylint: disable=line-too-long
+        relative_path: Path = Path(self.__relative_path(file_path))
+        if len(relative_path.parts) == 1:
+            return relative_path.stem
+        digest: str = sha1(relative_path.as_posix().encode("utf-8")).hexdigest()[:8]
+        return f"{'_'.join(relative_path.with_suffix('').parts)}_{digest}"
+
+
+    def __scheduled_batches(self,
+                            workers: int = 1) -> Iterator[list[str]]:
+        '''
+            Yields the batches of `__file_batches`, each ordered by `self.scheduler`
+
+            :param workers: :class:`Optional(int)` Number of workers the files are dispatched to. Defaults to `1`
+        ''' # pylint: disable=line-too-long
+        for batch in self.__file_batches():
+            yield self.__schedule(batch,
+                                  workers)
+
+
+    def __scheduled_files(self,
+                          workers: int = 1) -> Iterator[str]:
+        '''
+            Yields the files of `__scheduled_batches` one by one, the next batch is listed when the previous one is consumed
+
+            :param workers: :class:`Optional(int)` Number of workers the files are dispatched to. Defaults to `1`
+        ''' # pylint: disable=line-too-long
+        for batch in self.__scheduled_batches(workers):
+            yield from batch
+
+
+    def scheduled_file_batches(self,
+                               workers: int = 1) -> Iterator[list[ScheduledFile]]:
+        '''
+            Yields the batches of `__file_batches` as `ScheduledFile`s, each ordered by `self.scheduler`, for dispatchers outside of the manager
+
+            :param workers: :class:`Optional(int)` Number of workers the files are dispatched to. Defaults to `1`
+        ''' # pylint: disable=line-too-long
+        for batch in self.__file_batches():
+            yield self.__schedule_files(batch,
+                                        workers)
+
+
+    def __schedule_files(self,
+                         files: list[str],
+                         workers: int = 1) -> list[ScheduledFile]:
+        '''
+            Orders the files by `self.scheduler` and logs the schedule
+
+            :param files: :class:`list[str]` File paths
+            :param workers: :class:`Optional(int)` Number of workers the files are dispatched to. Defaults to `1`
+        ''' # pylint: disable=line-too-long
+        if len(files) < 2:
+            return [self.scheduler.describe(file) for file in files]
+        scheduled_files: list[ScheduledFile] = self.scheduler.order(files)
+        self.scheduler.log_schedule(scheduled_files = scheduled_files,
+                                    workers = workers,
+                                    listed_files = files)
+        return scheduled_files
+
+
+    def __schedule(self,
+                   files: list[str],
+                   workers: int = 1) -> list[str]:
+        '''
+            Orders the file paths by `self.scheduler` and logs the schedule
+
+            :param files: :class:`list[str]` File paths
+            :param workers: :class:`Optional(int)` Number of workers the files are dispatched to. Defaults to `1`
+        ''' # pylint: disable=line-too-long
+        if len(files) < 2:
+            return files
+        return [scheduled_file.path for scheduled_file in self.__schedule_files(files,
+                                                                                workers)]
 
 
     def __create_lock_file(self,
                            file_path: str,
-                           encoding: str = "utf-8-sig") -> None:
+                           encoding: str = "utf-8-sig") -> bool:
         '''
-            Create a lock file for the file
+            Create a lock file for the file, `False` if another thread or process created it first
 
             :param file_path: :class:`str` .lock file to create
             :param encoding: :class:`Optional(str)` Encoding of the file. Defaults to `"utf-8-sig`
-        '''
+        ''' # pylint: disable=line-too-long
         try:
             with open(file = f"{file_path}.lock",
-                      mode = "w",
+                      mode = "x",
                       encoding = encoding) as lock_file:
                 lock_file.write("LOCKED")
             self.log(f"Lock file created for {file_path}")
+        except FileExistsError:
+            return False
         except Exception as error: #pylint: disable=broad-exception-caught
             self.log(f"Error creating lock file for {file_path}: {error}")
+        return True
 
 
     def __check_lock_file(self,
@@ -116,9 +306,8 @@ class PdfManager:
             :param encoding: :class:`Optional(str)` Encoding of the file. Defaults to `"utf-8-sig"`
         '''
         if not self.__check_lock_file(file_path):
-            self.__create_lock_file(file_path,
-                                    encoding)
-            return False
+            return not self.__create_lock_file(file_path,
+                                               encoding)
         return True
 
 
@@ -145,7 +334,9 @@ class PdfManager:
         '''
         return PdfSplitter(pdf_path = pdf_path,
                            output_dir = self.config.temp,
-                           logger = self.logger).split_and_get_files()
+                           logger = self.logger,
+                           split_options = self.split_options,
+                           name = self.work_name(pdf_path)).split_and_get_files()
 
 
     def __convert_pdf_to_images(self,
@@ -157,18 +348,23 @@ class PdfManager:
         '''
         return Pdf2Img(pdf_path = pdf_path,
                        output_path = self.config.image,
-                       logger = self.logger).convert_and_get_file()
+                       logger = self.logger,
+                       timeout = self.watchdog.limit("render")).convert_and_get_file()
 
 
     def __check_barcode_on_image(self,
-                                 image_path: str) -> list[Barcode]:
+                                 image_path: str,
+                                 image: Image | None = None) -> list[Barcode]:
         '''
             Check for barcodes on the image
 
             :param image_path: :class:`str` File path
-        '''
+            :param image: :class:`Optional(Union(Image, None))` Image in memory, `image_path` is only used as name if given. Defaults to `None`
+        ''' # pylint: disable=line-too-long
         return Scanner(image_path = image_path,
-                       logger = self.logger).get_barcodes()
+                       decoder_config = self.decoder_config,
+                       logger = self.logger,
+                       image = image).get_barcodes()
 
 
     def __get_enum_for_ocr(self,
@@ -178,34 +374,142 @@ class PdfManager:
 
             :param base_name: :class:`str`
         '''
-        output_path: str = os.path.join(self.config.destination,
-                                        f"{base_name}.pdf")
-        path: Path = Path(output_path)
         i: int = 1
-        path = path.with_stem(f"{path.stem}_{i}")
-        while os.path.exists(str(path)):
+        while os.path.exists(os.path.join(self.config.destination,
+                                          f"{base_name}_{i}.pdf")):
             i += 1
-            path.stem[-1] = str(i)
-            path = path.with_stem(f"{path.stem[:-1]}_{i}")
-        return path.stem
+        return f"{base_name}_{i}"
 
 
     def __get_prefixed_text_from_image(self,
-                                       image_path: str) -> list[Barcode]:
+                                       image_path: str,
+                                       image: Image | None = None) -> list[Barcode]:
         '''
-            Gets first `self.ocr_prefixed` text from image, if found
+            Gets first `self.ocr_prefixed` text from image, if found, OCR errors are logged and nothing is returned
 
-            :param image_data: :class:`str`
-        '''
-        ocr_reader: OcrReader = OcrReader(image_data = ImgData(path = image_path,
-                                                               ratio = self.ratio),
-                                          prefixes = self.ocr_prefixes,
-                                          logger = self.logger)
+            :param image_path: :class:`str` File path
+            :param image: :class:`Optional(Union(Image, None))` Image in memory, `image_path` is only used as name if given. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        try:
+            from src.ocr_reader import ImgData, OcrReader # pylint: disable=import-outside-toplevel
+            ocr_reader: OcrReader = OcrReader(image_data = ImgData(path = image_path,
+                                                                   ratio = self.ratio,
+                                                                   image = image),
+                                              prefixes = self.ocr_prefixes,
+                                              logger = self.logger)
+            texts: list[str] = ocr_reader.get_texts()
+        except Exception as error: #pylint: disable=broad-exception-caught
+            self.log(f"Error OCR reading {image_path}: {error}")
+            return []
         barcodes: list[Barcode] = [Barcode(type = "ocr_reader",
-                                           data = self.__get_enum_for_ocr(text)) for text in ocr_reader.get_texts()] # pylint: disable=line-too-long
+                                           data = self.__get_enum_for_ocr(text),
+                                           method = "ocr") for text in texts]
         return barcodes
 
 
+    def __read_barcodes(self,
+                        image_path: str,
+                        image: Image | None = None) -> list[Barcode]:
+        '''
+            Reads the barcodes on the image, tries OCR if none found
+
+            :param image_path: :class:`str` File path
+            :param image: :class:`Optional(Union(Image, None))` Image in memory, `image_path` is only used as name if given. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        barcodes: list[Barcode] = self.__check_barcode_on_image(image_path,
+                                                                image)
+        if not barcodes and self.ocr_enabled():
+            self.log(f"Trying to OCR read '{image_path}'")
+            barcodes = self.__get_prefixed_text_from_image(image_path,
+                                                           image)
+        return barcodes
+
+
+    def __classify_page(self,
+                        image_path: str,
+                        image: Image | None = None) -> str:
+        '''
+            Cheap check of the page before decoding, `PageClassifier.CONTENT` if disabled or failed
+
+            :param image_path: :class:`str` File path
+            :param image: :class:`Optional(Union(Image, None))` Image in memory, `image_path` is only used as name if given. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        if not self.page_classifier.enabled:
+            return PageClassifier.CONTENT
+        try:
+            if image is not None:
+                return self.page_classifier.classify(image,
+                                                     image_path)
+            with open_image(image_path) as page_image:
+                return self.page_classifier.classify(page_image,
+                                                     image_path)
+        except Exception as error: #pylint: disable=broad-exception-caught
+            self.log(f"Error classifying {image_path}: {error}")
+            return PageClassifier.CONTENT
+
+
+    def __read_page(self,
+                    image_path: str,
+                    image: Image | None = None) -> tuple[str, list[Barcode]]:
+        '''
+            Classifies the page and reads its barcodes, blank pages and separator sheets are not decoded
+
+            :param image_path: :class:`str` File path
+            :param image: :class:`Optional(Union(Image, None))` Image in memory, `image_path` is only used as name if given. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        kind: str = self.__classify_page(image_path,
+                                         image)
+        if kind != PageClassifier.CONTENT:
+            return kind, []
+        return kind, self.__read_barcodes(image_path,
+                                          image)
+
+
+    def __file_split_pdf(self,
+                         split_pdf_file: str,
+                         barcodes: list[Barcode],
+                         kind: str = PageClassifier.CONTENT,
+                         previous_file: str | None = None,
+                         page: Image | None = None) -> str | None:
+        '''
+            Copies the split page to the destination named by its first barcode, then removes it.
+            Separator sheets and dropped blank pages are only removed, attached blank pages are appended to `previous_file`.
+            Returns the document the next blank page would be attached to
+
+            :param split_pdf_file: :class:`str` File path
+            :param barcodes: :class:`list[Barcode]` Barcodes found on the page
+            :param kind: :class:`Optional(str)` Kind of the page by `PageClassifier`. Defaults to `PageClassifier.CONTENT`
+            :param previous_file: :class:`Optional(Union(str, None))` Destination of the previous page of the same source. Defaults to `None`
+            :param page: :class:`Optional(Union(Image, None))` Frame of an image source, written to `split_pdf_file` only if the page is kept. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        dropped: bool = kind == PageClassifier.SEPARATOR or (kind == PageClassifier.BLANK and self.page_classifier.blank_policy == "drop") # pylint: disable=line-too-long
+        if page is not None and not dropped:
+            size: int = ImageSource.write_page(page,
+                                               split_pdf_file,
+                                               self.split_options)
+            self.log(f"Page saved to {split_pdf_file} ({size} bytes)")
+        output_file: str | None = os.path.join(self.config.destination,
+                                               f"{barcodes[0].data}.pdf" if barcodes else os.path.basename(split_pdf_file)) # pylint: disable=line-too-long
+        if kind == PageClassifier.SEPARATOR:
+            self.log(f"Dropped separator sheet {split_pdf_file}")
+            output_file = None
+        elif kind == PageClassifier.BLANK and self.page_classifier.blank_policy == "drop":
+            self.log(f"Dropped blank page {split_pdf_file}")
+            output_file = previous_file
+        elif kind == PageClassifier.BLANK and self.page_classifier.blank_policy == "attach" and previous_file and os.path.exists(previous_file): # pylint: disable=line-too-long
+            if not PdfSplitter(pdf_path = split_pdf_file,
+                               output_dir = self.config.temp,
+                               logger = self.logger).append_to(previous_file):
+                self.__copy_file_as(split_pdf_file,
+                                    output_file)
+            output_file = previous_file
+        else:
+            self.__copy_file_as(split_pdf_file,
+                                output_file)
+        if page is None or not dropped:
+            self.__remove_file(split_pdf_file)
+        return output_file
+
 
     def __copy_file_as(self,
                        file_path: str,
@@ -263,9 +567,13 @@ class PdfManager:
         backup_dir = backup_dir or self.config.backup
         if backup_dir:
             if os.path.exists(backup_dir):
+                # the subdirectories of the source are kept, so same-named files do not overwrite each other
+                backup_path: str = os.path.join(backup_dir,
+                                                self.__relative_path(file_path))
+                os.makedirs(os.path.dirname(backup_path),
+                            exist_ok = True)
                 self.__copy_file_as(file_path = file_path,
-                                    new_file_path = os.path.join(backup_dir,
-                                                                 os.path.basename(file_path)))
+                                    new_file_path = backup_path)
                 self.log(f"Backed up {file_path} to {backup_dir}")
                 return True
         return False
@@ -282,89 +590,332 @@ class PdfManager:
             :param i: :class:`Optional(Union(int, None))` Enumerate. Defaults to `None`
             :param length: :class:`Optional(Union(int, None))` Length for enumerate. Default to `None`
         ''' # pylint: disable=line-too-long
+        self.profiler.call(self.__process_file,
+                           pdf_file,
+                           i,
+                           length)
+
+
+    def __process_file(self,
+                       pdf_file: str,
+                       i: int | None = None,
+                       length: int | None = None) -> None:
+        '''
+            Body of `process_file`
+
+            :param pdf_file: :class:`str` File path
+            :param i: :class:`Optional(Union(int, None))` Enumerate. Defaults to `None`
+            :param length: :class:`Optional(Union(int, None))` Length for enumerate. Default to `None`
+        ''' # pylint: disable=line-too-long
         pcs: str = f"{str(i + 1)}/{str(length)}." if i and length else ""
+        # every stage is journaled before it starts, the watchdog reads where a stuck file is
+        journal: Journal = self.journal(pdf_file)
+        locked: bool = False
         try:
             self.log(f"{pcs} Processing {pdf_file}")
             if not self.__check_and_create_lock_file(pdf_file):
+                locked = True
+                signature: list[float] | None = self.discovery.signature(pdf_file)
                 self.__backup_file(pdf_file)
-                split_files: list[str] = self.__split_pdf(pdf_file)
-                for cnt, split_pdf_file in enumerate(split_files):
-                    self.log(f"{cnt + 1}/{len(split_files)}.: {pdf_file} -> {split_pdf_file}")
-                    for split_image_file in self.__convert_pdf_to_images(split_pdf_file):
-                        barcodes: list[Barcode] = self.__check_barcode_on_image(split_image_file)
-                        # TODO: fix silent error on windows
-                        if not barcodes and self.ratio is not None and self.ocr_prefixes and False:
-                            self.log(f"Trying to OCR read '{split_image_file}'")
-                            barcodes = self.__get_prefixed_text_from_image(split_image_file)
-                        self.__remove_file(split_image_file)
-                        self.__copy_file_as(split_pdf_file,
-                                            os.path.join(self.config.destination,
-                                                        f"{barcodes[0].data}.pdf" if barcodes else os.path.basename(split_pdf_file))) # pylint: disable=line-too-long
-                        self.__remove_file(split_pdf_file)
+                if ImageSource.is_image(pdf_file):
+                    self.__process_image_frames(pdf_file,
+                                                journal)
+                else:
+                    self.__process_pdf_pages(pdf_file,
+                                             journal)
                 self.__remove_file_and_lock_file(pdf_file)
+                journal.remove()
+                # only a filed file gets into the index, a failed one is listed again
+                self.discovery.mark_done(pdf_file,
+                                         signature)
         except Exception as error: #pylint: disable=broad-exception-caught
-            self.log(f"Error processing {pdf_file}: {error}")
+            self.log(f"{'Timeout' if isinstance(error, StageTimeoutException) else 'Error'} processing {pdf_file}: {error}") # pylint: disable=line-too-long
+            if locked:
+                # a half processed file is not retried, its pages not filed yet go with it
+                self.quarantine(pdf_file,
+                                str(error))
+            else:
+                journal.remove()
+
+
+    def __process_pdf_pages(self,
+                            pdf_file: str,
+                            journal: Journal) -> None:
+        '''
+            Splits the PDF file, then renders, decodes and files its pages one by one
+
+            :param pdf_file: :class:`str` File path
+            :param journal: :class:`Journal` Journal of the file
+        '''
+        # the prefix finds the pages of a split that does not finish, the list the ones of a split that did
+        journal.write("split",
+                      prefix = f"{os.path.join(self.config.temp, self.work_name(pdf_file))}_")
+        split_files: list[str] = self.__split_pdf(pdf_file)
+        journal.write("split",
+                      pdfs = split_files)
+        previous_file: str | None = None
+        for cnt, split_pdf_file in enumerate(split_files):
+            self.log(f"{cnt + 1}/{len(split_files)}.: {pdf_file} -> {split_pdf_file}")
+            journal.write("render",
+                          page = cnt + 1,
+                          pdf = split_pdf_file)
+            for split_image_file in self.__convert_pdf_to_images(split_pdf_file):
+                journal.write("decode",
+                              page = cnt + 1,
+                              image = split_image_file)
+                kind, barcodes = self.__read_page(split_image_file)
+                self.__remove_file(split_image_file)
+                journal.write("write",
+                              page = cnt + 1)
+                previous_file = self.__file_split_pdf(split_pdf_file,
+                                                      barcodes,
+                                                      kind,
+                                                      previous_file)
+
+
+    def __process_image_frames(self,
+                               image_file: str,
+                               journal: Journal) -> None:
+        '''
+            Decodes the frames of the image file directly, a page is only written to PDF when it is filed
+
+            :param image_file: :class:`str` File path
+            :param journal: :class:`Journal` Journal of the file
+        '''
+        image_source: ImageSource = ImageSource(image_path = image_file,
+                                                logger = self.logger)
+        previous_file: str | None = None
+        for index, frame in image_source.frames():
+            split_pdf_file: str = image_source.page_path(self.config.temp,
+                                                         index,
+                                                         self.work_name(image_file))
+            self.log(f"{index + 1}.: {image_file} -> {split_pdf_file}")
+            journal.write("decode",
+                          page = index + 1)
+            kind, barcodes = self.__read_page(split_pdf_file,
+                                              frame)
+            journal.write("write",
+                          page = index + 1,
+                          pdf = split_pdf_file)
+            previous_file = self.__file_split_pdf(split_pdf_file,
+                                                  barcodes,
+                                                  kind,
+                                                  previous_file,
+                                                  frame)
+
+
+    def process_bytes(self,
+                      pdf_data: bytes,
+                      name: str = "upload.pdf") -> list[SplitPage]:
+        '''
+            Process a single PDF in memory, nothing is read from or written to the configured directories
+
+            :param pdf_data: :class:`bytes` Content of the PDF file
+            :param name: :class:`Optional(str)` Name of the PDF file, used for logging and naming pages without barcode. Defaults to `"upload.pdf"`
+        ''' # pylint: disable=line-too-long
+        return self.profiler.call(self.__process_bytes,
+                                  pdf_data,
+                                  name)
+
+
+    def __process_bytes(self,
+                        pdf_data: bytes,
+                        name: str) -> list[SplitPage]:
+        '''
+            Body of `process_bytes`
+
+            :param pdf_data: :class:`bytes` Content of the PDF file
+            :param name: :class:`str` Name of the PDF file
+        '''
+        self.log(f"Processing {name} in memory")
+        pages: list[bytes] = PdfSplitter(pdf_path = name,
+                                         output_dir = self.config.temp,
+                                         logger = self.logger,
+                                         split_options = self.split_options).split_to_bytes(pdf_data)
+        render_limit: float | None = self.watchdog.limit("render")
+        images: Iterator[Image] = Pdf2Img(pdf_path = name,
+                                          output_path = self.config.image,
+                                          logger = self.logger,
+                                          timeout = render_limit).pages(pdf_data) if pages else iter([]) # pylint: disable=line-too-long
+        stem: str = Path(name).stem
+        names: set[str] = set()
+        split_pages: list[SplitPage] = []
+        previous_page: SplitPage | None = None
+        for page_number, page_data in enumerate(pages):
+            image: Image | None = next(images, None)
+            kind, barcodes = self.__read_page(f"{stem}_{page_number}",
+                                              image) if image is not None else (PageClassifier.CONTENT, []) # pylint: disable=line-too-long
+            if kind == PageClassifier.SEPARATOR:
+                previous_page = None
+                continue
+            if kind == PageClassifier.BLANK and self.page_classifier.blank_policy == "drop":
+                continue
+            if kind == PageClassifier.BLANK and self.page_classifier.blank_policy == "attach" and previous_page is not None: # pylint: disable=line-too-long
+                previous_page.data = PdfSplitter.join_bytes([previous_page.data,
+                                                             page_data])
+                continue
+            page_stem: str = barcodes[0].data if barcodes else f"{stem}_{page_number}"
+            page_name: str = f"{page_stem}.pdf"
+            i: int = 1
+            while page_name in names:
+                page_name = f"{page_stem}_{i}.pdf"
+                i += 1
+            names.add(page_name)
+            previous_page = SplitPage(page = page_number + 1,
+                                      name = page_name,
+                                      data = page_data,
+                                      barcodes = barcodes)
+            split_pages.append(previous_page)
+        return split_pages
 
 
     def process_all(self) -> None:
         '''
             Process the PDF files in the directory
         '''
-        self.log(f"Processing '{self.config.source}'")
-        files: list[str] = self.__files_in_dir()
-        if not files:
-            self.log("No files found")
-            return
-        self.log(f"Processing {len(files)} file{'' if len(files) < 2 else 's'} using single process") # pylint: disable=line-too-long
-        for i, pdf in enumerate(files):
-            self.process_file(pdf_file = pdf,
-                                i = i,
-                                length = len(files))
+        self.log(f"Processing '{self.config.source}' using single process")
+        for files in self.__scheduled_batches():
+            for i, pdf in enumerate(files):
+                self.process_file(pdf_file = pdf,
+                                  i = i,
+                                  length = len(files))
+
+
+    def journal(self,
+                pdf_file: str) -> Journal:
+        '''
+            Journal of the file in the temp directory
+
+            :param pdf_file: :class:`str` File path
+        '''
+        return self.watchdog.journal(self.config.temp,
+                                     pdf_file)
+
+
+    def expired(self,
+                scheduled_file: ScheduledFile,
+                elapsed: float) -> str | None:
+        '''
+            Returns why the file is over the limits of the watchdog, `None` if it is not
+
+            :param scheduled_file: :class:`ScheduledFile` File being processed
+            :param elapsed: :class:`float` Seconds since the file started
+        '''
+        return self.watchdog.expired(self.journal(scheduled_file.path),
+                                     elapsed = elapsed,
+                                     pages = scheduled_file.cost)
+
+
+    def quarantine(self,
+                   pdf_file: str,
+                   reason: str) -> None:
+        '''
+            Moves the file of a killed worker to the quarantine with its journal and removes its lock file
+
+            :param pdf_file: :class:`str` File path
+            :param reason: :class:`str` Why the worker was killed
+        '''
+        self.watchdog.quarantine(pdf_file,
+                                 self.journal(pdf_file),
+                                 reason)
+        self.__remove_lock_file(pdf_file)
+
+
+    def __kill_process(self,
+                       process: Process,
+                       scheduled_file: ScheduledFile,
+                       reason: str) -> None:
+        '''
+            Kills a stuck process and quarantines its file with the journal
+
+            :param process: :class:`Process`
+            :param scheduled_file: :class:`ScheduledFile` File of the process
+            :param reason: :class:`str` Why the process is killed
+        '''
+        self.log(f"Killing the process of {scheduled_file.path}: {reason}")
+        try:
+            # with its process group, a poppler subprocess would keep rendering otherwise
+            kill_worker(process.pid)
+            process.join(KILL_GRACE)
+            if process.is_alive():
+                kill_worker(process.pid,
+                            force = True)
+        except OSError as error:
+            self.log(f"Error killing the process of {scheduled_file.path}: {error}")
+        if process.is_alive():
+            process.kill()
+        process.join()
+        self.quarantine(scheduled_file.path,
+                        reason)
 
 
     def __remove_dead_processes(self,
-                                processes: list[Process]) -> list[Process]:
+                                processes: list[Process],
+                                started: dict[str, tuple[ScheduledFile, float]] | None = None) -> list[Process]: # pylint: disable=line-too-long
         '''
-            Remove dead processes from the list
+            Remove dead processes from the list, processes over the limits of the watchdog are killed first
 
             :param processes: :class:`list[Process]` Remove dead processes.
-        '''
-        for process in processes:
+            :param started: :class:`Optional(Union(dict[str, tuple[ScheduledFile, float]], None))` File and start time by process name, the run time is logged and the limits are checked if given. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        for process in list(processes):
+            if process.is_alive() and started and process.name in started:
+                scheduled_file, start = started[process.name]
+                reason: str | None = self.expired(scheduled_file,
+                                                  perf_counter() - start)
+                if reason is not None:
+                    started.pop(process.name)
+                    self.__kill_process(process,
+                                        scheduled_file,
+                                        reason)
             if not process.is_alive():
-                processes.remove(process) #pylint: disable = modified-iterating-list
+                processes.remove(process)
+                self.resource_monitor.finished(process.pid)
+                if started and process.name in started:
+                    scheduled_file, start = started.pop(process.name)
+                    self.log(f"Finished {scheduled_file.path} in {perf_counter() - start:.1f}s")
         return processes
 
 
-    def __wait_if_process_on_limit(self,
-                                   processes: list[Process],
-                                   max_processes: int) -> None:
+    def __next_admitted_file(self,
+                             processes: list[Process],
+                             pending: list[ScheduledFile],
+                             max_processes: int,
+                             started: dict[str, tuple[ScheduledFile, float]]) -> ScheduledFile:
         '''
-            Wait if the number of processes is greater than max_processes
+            Waits until a pending file can be admitted and removes it from `pending`.
+            The first file in schedule order that fits is taken, so a large document waiting for headroom does not hold back the smaller ones.
 
-            :param processes: :class:`list[Process]` List of processes to wait for
-            :param max_processes: :class:`int` Maximum number of processes.
-        '''
+            :param processes: :class:`list[Process]` Running processes
+            :param pending: :class:`list[ScheduledFile]` Files not started yet, in schedule order
+            :param max_processes: :class:`int` Maximum number of processes
+            :param started: :class:`dict[str, tuple[ScheduledFile, float]]` File and start time by process name
+        ''' # pylint: disable=line-too-long
         wait: bool = True
-        while len(processes) >= max_processes:
+        while True:
+            self.__remove_dead_processes(processes,
+                                         started)
+            self.resource_monitor.sample([process.pid for process in processes])
+            for scheduled_file in pending:
+                if self.resource_monitor.admit(running = len(processes),
+                                               ceiling = max_processes,
+                                               file_size = scheduled_file.size):
+                    pending.remove(scheduled_file)
+                    return scheduled_file
             if wait:
                 self.log("Waiting for processes to finish")
                 wait = False
-            processes = self.__remove_dead_processes(processes)
-        return processes
+            sleep(MONITOR_INTERVAL)
 
 
     def multi_process_all(self,
                           max_processes: int = 2) -> None:
         '''
-            Process the PDF files in the directory using multiprocessing
+            Process the PDF files in the directory using multiprocessing.
+            The number of processes follows the free memory and the system load, `max_processes` is the ceiling.
 
             :param max_processes: :class:`Optional(int)` Max processes to run. Defaults to `4`
-        '''
-        self.log(f"Processing '{self.config.source}'")
-        files: list[str] = self.__files_in_dir()
-        if not files:
-            self.log("No files found in")
-            return
+        ''' # pylint: disable=line-too-long
         if not isinstance(max_processes, int):
             if isinstance(max_processes, float):
                 self.log("'max_processes' is float, rounding it")
@@ -374,24 +925,368 @@ class PdfManager:
                 raise PdfManagerException("'max_processes' should be an integer")
         if max_processes < 1:
             raise PdfManagerException("'max_processes' minimum value is 1")
-        # looping pdf files
-        self.log(f"Processing {len(files)} file{'' if len(files) < 2 else 's'} using {max_processes} processes") # pylint: disable=line-too-long
+        self.log(f"Processing '{self.config.source}' using up to {max_processes} processes")
         # starting the multiprocessing
         freeze_support()
+        run_start: float = perf_counter()
+        started: dict[str, tuple[ScheduledFile, float]] = {}
         processes: list[Process] = []
-        for i, pdf in enumerate(files):
-            # creating a process for each pdf file
-            process: Process = Process(target = self.process_file,
-                                       args = (pdf,
-                                               i,
-                                               len(files)))
-            # adding the process to the list
-            processes.append(process)
-            # starting the process
-            process.start()
-            # wait if the number of processes is greater than max_processes
-            self.__wait_if_process_on_limit(processes = processes,
-                                            max_processes = max_processes)
-        for process in processes:
-            process.join()
-        self.log("All processes finished")
+        # looping pdf files, the next batch is listed while the processes of the previous one run
+        for files in self.__file_batches():
+            pending: list[ScheduledFile] = self.__schedule_files(files,
+                                                                 max_processes)
+            for i in range(len(files)):
+                # waiting for a file that fits in the free memory
+                scheduled_file: ScheduledFile = self.__next_admitted_file(processes = processes,
+                                                                          pending = pending,
+                                                                          max_processes = max_processes, # pylint: disable=line-too-long
+                                                                          started = started)
+                # creating a process for the pdf file
+                process: Process = Process(target = run_in_process_group,
+                                           args = (self.process_file,
+                                                   scheduled_file.path,
+                                                   i,
+                                                   len(files)))
+                # a journal left by an earlier run would expire the new process at once
+                self.journal(scheduled_file.path).remove()
+                # adding the process to the list
+                processes.append(process)
+                # starting the process
+                process.start()
+                started[process.name] = (scheduled_file,
+                                         perf_counter())
+        while processes:
+            self.resource_monitor.sample([process.pid for process in processes])
+            self.__remove_dead_processes(processes,
+                                         started)
+            sleep(MONITOR_INTERVAL)
+        self.log(f"All processes finished, makespan: {perf_counter() - run_start:.1f}s")
+
+
+    def thread_process_all(self,
+                           max_threads: int = 2) -> None:
+        '''
+            Process the PDF files in the directory on threads of this process.
+            Rendering (poppler), decoding (ZBar) and the image filters run outside of the GIL, so threads share the work at a fraction of the memory of processes.
+
+            :param max_threads: :class:`Optional(int)` Max threads to run. Defaults to `2`
+        ''' # pylint: disable=line-too-long
+        if not isinstance(max_threads, int) or max_threads < 1:
+            raise PdfManagerException("'max_threads' should be a positive integer")
+        self.log(f"Processing '{self.config.source}' using {max_threads} thread{'' if max_threads == 1 else 's'}") # pylint: disable=line-too-long
+        run_start: float = perf_counter()
+        with ThreadPoolExecutor(max_workers = max_threads,
+                                thread_name_prefix = "splitter") as executor:
+            for files in self.__scheduled_batches(max_threads):
+                for i, pdf in enumerate(files):
+                    executor.submit(self.process_file,
+                                    pdf,
+                                    i,
+                                    len(files))
+        self.log(f"All threads finished, makespan: {perf_counter() - run_start:.1f}s")
+
+
+    def thread_process_shared(self,
+                              files: list[str],
+                              next_index: Synchronized,
+                              max_threads: int) -> None:
+        '''
+            Process the files on threads of this process, taking the next file from an index shared with the other processes
+
+            :param files: :class:`list[str]` File paths in schedule order
+            :param next_index: :class:`Synchronized` Index of the next file to process, shared between processes
+            :param max_threads: :class:`int` Max threads to run in this process
+        ''' # pylint: disable=line-too-long
+        def worker() -> None:
+            while True:
+                with next_index.get_lock():
+                    i: int = next_index.value
+                    next_index.value += 1
+                if i >= len(files):
+                    return
+                self.process_file(pdf_file = files[i],
+                                  i = i,
+                                  length = len(files))
+
+        threads: list[Thread] = [Thread(target = worker,
+                                        name = f"splitter_{i}") for i in range(max_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+    def hybrid_process_all(self,
+                           max_processes: int = 2,
+                           max_threads: int = 2) -> None:
+        '''
+            Process the PDF files in the directory on `max_processes` processes with `max_threads` threads each.
+            Fewer processes start if the free memory is short.
+
+            :param max_processes: :class:`Optional(int)` Max processes to run. Defaults to `2`
+            :param max_threads: :class:`Optional(int)` Max threads to run per process. Defaults to `2`
+        ''' # pylint: disable=line-too-long
+        if not isinstance(max_processes, int) or max_processes < 1:
+            raise PdfManagerException("'max_processes' should be a positive integer")
+        if not isinstance(max_threads, int) or max_threads < 1:
+            raise PdfManagerException("'max_threads' should be a positive integer")
+        self.log(f"Processing '{self.config.source}'")
+        freeze_support()
+        run_start: float = perf_counter()
+        # the file list is shared by index, so each batch gets its own processes
+        for files in self.__file_batches():
+            processes_to_run: int = min(self.resource_monitor.allowed_workers(running = 0,
+                                                                              ceiling = max_processes),
+                                        -(-len(files) // max_threads))
+            self.log(f"Processing {len(files)} file{'' if len(files) < 2 else 's'} using {processes_to_run} process{'' if processes_to_run == 1 else 'es'} x {max_threads} thread{'' if max_threads == 1 else 's'}") # pylint: disable=line-too-long
+            files = self.__schedule(files,
+                                    processes_to_run * max_threads)
+            next_index: Synchronized = Value("i", 0)
+            processes: list[Process] = [Process(target = self.thread_process_shared,
+                                                args = (files,
+                                                        next_index,
+                                                        max_threads)) for _ in range(processes_to_run)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+        self.log(f"All processes finished, makespan: {perf_counter() - run_start:.1f}s")
+
+
+    def pipeline_process_all(self,
+                             stage_workers: dict[str, int] | None = None,
+                             queue_size: int = 8) -> None:
+        '''
+            Process the PDF files in the directory as an async pipeline of
+            `split` -> `render` -> `decode` -> `write` stages
+
+            :param stage_workers: :class:`Optional(Union(dict[str, int], None))` Workers per stage, `1` for a missing stage. Defaults to `None`
+            :param queue_size: :class:`Optional(int)` Maximum number of pages waiting between two stages. Defaults to `8`
+        ''' # pylint: disable=line-too-long
+        self.log(f"Processing '{self.config.source}' using pipeline")
+        from src.pipeline import AsyncPipeline, PipelineStage # pylint: disable=import-outside-toplevel
+        stage_workers = stage_workers or {}
+        if self.page_classifier.blank_policy == "attach":
+            self.log("Pages are written out of order in pipeline mode, blank pages are skipped instead of attached") # pylint: disable=line-too-long
+        remaining: dict[str, int] = {}
+        signatures: dict[str, list[float] | None] = {}
+        # sources quarantined after a page failed, their other pages are dropped
+        failed: set[str] = set()
+        # one open reader per image source, so a frame is not found by opening the file and walking to it again
+        image_sources: dict[str, ImageSource] = {}
+        remaining_lock: Lock = Lock()
+
+        def finish_pages(source: str,
+                         count: int) -> None:
+            with remaining_lock:
+                remaining[source] = remaining.get(source, 0) + count
+                done: bool = remaining[source] <= 0
+                image_source: ImageSource | None = image_sources.pop(source, None) if done else None
+            if image_source is not None:
+                image_source.close()
+            if done:
+                self.__remove_file_and_lock_file(source)
+                self.journal(source).remove()
+                self.discovery.mark_done(source,
+                                         signatures.pop(source, None))
+
+        def fail(source: str,
+                 error: Exception) -> None:
+            with remaining_lock:
+                if source in failed:
+                    return
+                failed.add(source)
+                image_source: ImageSource | None = image_sources.pop(source, None)
+            if image_source is not None:
+                image_source.close()
+            self.log(f"{'Timeout' if isinstance(error, StageTimeoutException) else 'Error'} processing {source}: {error}") # pylint: disable=line-too-long
+            # only a source locked by this run is moved
+            if source in signatures:
+                self.quarantine(source,
+                                str(error))
+
+        def guard(function: callable) -> callable:
+            def run_stage(item: str | PageJob) -> list[PageJob] | None:
+                source: str = item if isinstance(item, str) else item.source
+                if source in failed:
+                    if isinstance(item, PageJob) and item.image:
+                        self.__remove_file(item.image)
+                    return []
+                try:
+                    return function(item)
+                except Exception as error: #pylint: disable=broad-exception-caught
+                    fail(source,
+                         error)
+                    return []
+            return run_stage
+
+        def split(pdf_file: str) -> list[PageJob]:
+            if self.__check_and_create_lock_file(pdf_file):
+                return []
+            journal: Journal = self.journal(pdf_file)
+            signatures[pdf_file] = self.discovery.signature(pdf_file)
+            self.__backup_file(pdf_file)
+            if ImageSource.is_image(pdf_file):
+                # the frames are decoded straight from the image, nothing to split or render
+                image_source: ImageSource = ImageSource(image_path = pdf_file,
+                                                        logger = self.logger)
+                count: int = image_source.page_count()
+                name: str = self.work_name(pdf_file)
+                with remaining_lock:
+                    image_sources[pdf_file] = image_source.open()
+                finish_pages(pdf_file,
+                             count)
+                return [PageJob(source = pdf_file,
+                                split_pdf = image_source.page_path(self.config.temp, index, name),
+                                frame = index) for index in range(count)]
+            # the split pages are listed in the journal, so a failed source is quarantined with them
+            journal.write("split",
+                          prefix = f"{os.path.join(self.config.temp, self.work_name(pdf_file))}_")
+            split_files: list[str] = self.__split_pdf(pdf_file)
+            journal.write("split",
+                          pdfs = split_files)
+            finish_pages(pdf_file,
+                         len(split_files))
+            return [PageJob(source = pdf_file,
+                            split_pdf = split_pdf_file) for split_pdf_file in split_files]
+
+        def render(job: PageJob) -> list[PageJob]:
+            if job.frame is not None:
+                return [job]
+            images: list[str] = self.__convert_pdf_to_images(job.split_pdf)
+            for image in images:
+                self.journal(job.source).write("decode",
+                                               image = image)
+            finish_pages(job.source,
+                         max(len(images), 1) - 1)
+            return [PageJob(source = job.source,
+                            split_pdf = job.split_pdf,
+                            image = image) for image in images] or [job]
+
+        def decode(job: PageJob) -> list[PageJob]:
+            if job.frame is not None:
+                with remaining_lock:
+                    image_source: ImageSource = image_sources[job.source]
+                job.page = image_source.frame(job.frame)
+                job.kind, job.barcodes = self.__read_page(job.split_pdf,
+                                                          job.page)
+            elif job.image:
+                job.kind, job.barcodes = self.__read_page(job.image)
+                self.__remove_file(job.image)
+            return [job]
+
+        def write(job: PageJob) -> None:
+            self.__file_split_pdf(job.split_pdf,
+                                  job.barcodes,
+                                  job.kind,
+                                  page = job.page)
+            finish_pages(job.source,
+                         -1)
+
+        functions: dict[str, callable] = {"split": split,
+                                          "render": render,
+                                          "decode": decode,
+                                          "write": write}
+        try:
+            AsyncPipeline(stages = [PipelineStage(name = name,
+                                                  function = self.profiler.wrap(guard(function)),
+                                                  workers = max(stage_workers.get(name, 1), 1)) for name, function in functions.items()], # pylint: disable=line-too-long
+                          queue_size = queue_size,
+                          logger = self.logger).run(self.__scheduled_files(max(stage_workers.get("split", 1), 1))) # pylint: disable=line-too-long
+        finally:
+            # the sources of failed pages are still open
+            for image_source in image_sources.values():
+                image_source.close()
+        self.log("Pipeline finished")
+
+
+    def scan_file(self,
+                  pdf_file: str,
+                  manifest: ManifestWriter | None = None) -> list[ManifestRow]:
+        '''
+            Renders and decodes the pages of a PDF file one at a time without splitting, moving or locking it
+
+            :param pdf_file: :class:`str` File path
+            :param manifest: :class:`Optional(Union(ManifestWriter, None))` Manifest to write each row to as soon as its page is decoded, the rows are returned instead if `None`. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        return self.profiler.call(self.__scan_file,
+                                  pdf_file,
+                                  manifest)
+
+
+    def __scan_file(self,
+                    pdf_file: str,
+                    manifest: ManifestWriter | None = None) -> list[ManifestRow]:
+        '''
+            Body of `scan_file`
+
+            :param pdf_file: :class:`str` File path
+            :param manifest: :class:`Optional(Union(ManifestWriter, None))` Manifest to write the rows to. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        rows: list[ManifestRow] = []
+        try:
+            signature: list[float] | None = self.discovery.signature(pdf_file)
+            rendered: bool = not ImageSource.is_image(pdf_file)
+            if not rendered:
+                # frames are decoded one by one while scanning, there is no render stage
+                images: Iterator[Image] = (frame for _, frame in ImageSource(image_path = pdf_file,
+                                                                             logger = self.logger).frames()) # pylint: disable=line-too-long
+            else:
+                # only the page being decoded is held in memory, the render limit applies per page
+                images: Iterator[Image] = Pdf2Img(pdf_path = pdf_file,
+                                                  output_path = self.config.image,
+                                                  logger = self.logger,
+                                                  timeout = self.watchdog.limit("render")).pages()
+            page_number: int = 0
+            start: float = perf_counter()
+            for image in images:
+                page_number += 1
+                render_ms: float = (perf_counter() - start) * 1000 if rendered else 0.0
+                start = perf_counter()
+                kind: str = self.__classify_page(f"{pdf_file}#{page_number}",
+                                                 image)
+                barcodes: list[Barcode] = self.__check_barcode_on_image(f"{pdf_file}#{page_number}", # pylint: disable=line-too-long
+                                                                        image) if kind == PageClassifier.CONTENT else [] # pylint: disable=line-too-long
+                row: ManifestRow = ManifestRow(source = pdf_file,
+                                               page = page_number,
+                                               barcodes = barcodes,
+                                               kind = kind,
+                                               render_ms = render_ms,
+                                               decode_ms = (perf_counter() - start) * 1000)
+                if manifest is not None:
+                    manifest.write(row)
+                else:
+                    rows.append(row)
+                start = perf_counter()
+            self.discovery.mark_done(pdf_file,
+                                     signature)
+        except Exception as error: #pylint: disable=broad-exception-caught
+            self.log(f"Error scanning {pdf_file}: {error}")
+        return rows
+
+
+    def scan_all(self,
+                 manifest_path: str,
+                 max_processes: int = 1) -> None:
+        '''
+            Scans the PDF files in the directory and streams the page -> barcode manifest, the source files are left untouched
+
+            :param manifest_path: :class:`str` Path of the manifest, `.csv` or JSON lines (`.jsonl`)
+            :param max_processes: :class:`Optional(int)` Max processes to scan with. Defaults to `1`
+        ''' # pylint: disable=line-too-long
+        max_processes = max(max_processes, 1)
+        self.log(f"Scanning '{self.config.source}' using {max_processes} process{'' if max_processes == 1 else 'es'} to '{manifest_path}'") # pylint: disable=line-too-long
+        with ManifestWriter(manifest_path) as manifest:
+            if max_processes == 1:
+                for pdf_file in self.__scheduled_files():
+                    self.scan_file(pdf_file,
+                                   manifest)
+            else:
+                freeze_support()
+                with Pool(processes = max_processes) as pool:
+                    # the pool takes the files while the next batch is listed
+                    for rows in pool.imap_unordered(self.scan_file,
+                                                    self.__scheduled_files(max_processes)):
+                        for row in rows:
+                            manifest.write(row)
+        self.log(f"Manifest written with {manifest.rows} page{'' if manifest.rows == 1 else 's'}")
@@ -0,0 +1,121 @@
+'''
+    Manifest writer module
+'''
+
+import os
+import csv
+import json
+from typing import TextIO
+from dataclasses import dataclass, field, asdict
+from src.barcode_scanner import Barcode
+
+@dataclass(slots = True)
+class ManifestRow:
+    '''
+        `ManifestRow` class, the scan result of a single page
+    '''
+    source: str
+    page: int
+    barcodes: list[Barcode] = field(default_factory = list)
+    render_ms: float = 0.0
+    decode_ms: float = 0.0
+    kind: str = "content"
+
+
+class ManifestWriter:
+    '''
+        Writes manifest rows as they come, `.csv` by extension, JSON lines otherwise
+    '''
+    CSV_EXTENSION: str = ".csv"
+    CSV_SEPARATOR: str = "|"
+    ''' Separator of multiple barcodes in a single `.csv` cell '''
+    FIELDS: list[str] = ["source",
+                         "page",
+                         "barcodes",
+                         "symbology",
+                         "method",
+                         "render_ms",
+                         "decode_ms",
+                         "kind"]
+
+    __slots__: list[str] = ["path",
+                            "encoding",
+                            "file",
+                            "csv_writer",
+                            "rows"]
+
+    def __init__(self,
+                 path: str,
+                 encoding: str = "utf-8") -> None:
+        '''
+            Manifest writer class
+
+            :param path: :class:`str` Path of the manifest file
+            :param encoding: :class:`Optional(str)` Encoding of the file. Defaults to `"utf-8"`
+        '''
+        self.path: str = path
+        self.encoding: str = encoding
+        self.file: TextIO | None = None
+        self.csv_writer: csv.DictWriter | None = None
+        self.rows: int = 0
+
+
+    def __enter__(self) -> "ManifestWriter":
+        self.open()
+        return self
+
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+    def open(self) -> None:
+        '''
+            Opens the manifest file, writes the header for `.csv`
+        '''
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path),
+                        exist_ok = True)
+        self.file = open(file = self.path, # pylint: disable=consider-using-with
+                         mode = "w",
+                         encoding = self.encoding,
+                         newline = "")
+        if self.path.lower().endswith(self.CSV_EXTENSION):
+            self.csv_writer = csv.DictWriter(self.file,
+                                             fieldnames = self.FIELDS)
+            self.csv_writer.writeheader()
+
+
+    def write(self,
+              row: ManifestRow) -> None:
+        '''
+            Writes and flushes a row
+
+            :param row: :class:`ManifestRow`
+        '''
+        if self.csv_writer is not None:
+            self.csv_writer.writerow({"source": row.source,
+                                      "page": row.page,
+                                      "barcodes": self.CSV_SEPARATOR.join(barcode.data for barcode in row.barcodes), # pylint: disable=line-too-long
+                                      "symbology": self.CSV_SEPARATOR.join(barcode.type for barcode in row.barcodes), # pylint: disable=line-too-long
+                                      "method": self.CSV_SEPARATOR.join(barcode.method or "" for barcode in row.barcodes), # pylint: disable=line-too-long
+                                      "render_ms": round(row.render_ms, 1),
+                                      "decode_ms": round(row.decode_ms, 1),
+                                      "kind": row.kind})
+        else:
+            content: dict = asdict(row)
+            content["render_ms"] = round(row.render_ms, 1)
+            content["decode_ms"] = round(row.decode_ms, 1)
+            self.file.write(json.dumps(content,
+                                       ensure_ascii = False) + "\n")
+        self.file.flush()
+        self.rows += 1
+
+
+    def close(self) -> None:
+        '''
+            Closes the manifest file
+        '''
+        if self.file is not None:
+            self.file.close()
+            self.file = None
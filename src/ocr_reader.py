@@ -3,12 +3,17 @@
 '''
 
 import os
+import re
 from logging import getLogger, ERROR
 from warnings import filterwarnings
+from threading import Lock
 from dataclasses import dataclass
 import cv2
+from numpy import asarray
+from PIL.Image import Image
 from easyocr import Reader
 from villog import Logger
+from config import OCR_ID_CHARACTERS, OCR_MAX_WIDTH, OCR_GPU, OCR_QUANTIZE
 
 getLogger("easyocr").setLevel(ERROR)
 getLogger("torch").setLevel(ERROR)
@@ -16,6 +21,30 @@ getLogger("torch").setLevel(ERROR)
 filterwarnings("ignore",
                message = ".*pin_memory.*no accelerator is found.*")
 
+readers: dict[tuple[tuple[str, ...], bool, bool], Reader] = {}
+''' `Reader` by languages, GPU and quantisation, loading the models once per process '''
+readers_lock: Lock = Lock()
+
+def get_reader(languages: list[str],
+               gpu: bool = OCR_GPU,
+               quantize: bool = OCR_QUANTIZE) -> Reader:
+    '''
+        Returns the `Reader` of the process, created at first use
+
+        :param languages: :class:`list[str]`
+        :param gpu: :class:`Optional(bool)` Runs on the GPU if there is one. Defaults to `OCR_GPU`
+        :param quantize: :class:`Optional(bool)` Dynamically quantised models on the CPU. Defaults to `OCR_QUANTIZE`
+    '''
+    key: tuple[tuple[str, ...], bool, bool] = (tuple(languages), gpu, quantize)
+    with readers_lock:
+        if key not in readers:
+            readers[key] = Reader(languages,
+                                  gpu = gpu,
+                                  quantize = quantize,
+                                  verbose = False)
+        return readers[key]
+
+
 @dataclass(slots = True)
 class ImgData:
     '''
@@ -23,19 +52,24 @@ class ImgData:
     '''
     path: str
     ratio: float = 1.0
+    image: Image | None = None
+    ''' Image in memory, read instead of `path` if given '''
 
 
 class OcrReader:
     '''
         OCR reader class
     '''
-    REPLACES: list[str] = [["O","0"],
-                           ["l", "1"]]
+    REPLACES: dict[int, str] = str.maketrans({"O": "0",
+                                              "l": "1"})
+    ''' Misread characters of the ID after the prefix '''
     def __init__(self, # pylint: disable=dangerous-default-value
                  image_data: ImgData,
                  prefixes: list[str],
                  languages: list[str] = ["hu", "en"],
-                 logger: Logger | None = None) -> None:
+                 logger: Logger | None = None,
+                 gpu: bool = OCR_GPU,
+                 quantize: bool = OCR_QUANTIZE) -> None:
         '''
             OCR reader class
 
@@ -43,13 +77,26 @@ class OcrReader:
             :param prefixes: :class:`list[str]`
             :param languages: :class:`Optional(list[str])` defaults to `["hu", "en"]`
             :param logger: :class:`Optional(Union(Logger, None))` Defaults to `None`
+            :param gpu: :class:`Optional(bool)` Runs on the GPU if there is one. Defaults to `OCR_GPU`
+            :param quantize: :class:`Optional(bool)` Dynamically quantised models on the CPU. Defaults to `OCR_QUANTIZE`
         ''' # pylint: disable=line-too-long
         self.image_data: ImgData = image_data
-        self.prefixes: list[str] = prefixes
+        self.prefixes: list[str] = [prefix for prefix in prefixes if prefix]
         self.languages: list[str] = languages
+        self.gpu: bool = gpu
+        self.quantize: bool = quantize
         self.logger: Logger = logger or Logger(file_path = f"{os.path.dirname(__file__)}.log")
-        self.image = cv2.imread(self.image_data.path) # pylint: disable=no-member
-        self.__crop_to_ratio()
+        # longest first, so a prefix of another prefix does not win
+        self.prefix_pattern: re.Pattern = re.compile("|".join(re.escape(prefix) for prefix in sorted(self.prefixes, key = len, reverse = True))) # pylint: disable=line-too-long
+        self.allowlist: str = "".join(sorted(set("".join(self.prefixes) + OCR_ID_CHARACTERS + "".join(chr(key) for key in self.REPLACES)))) # pylint: disable=line-too-long
+        if self.image_data.image is not None:
+            self.image = asarray(self.image_data.image.convert("L"))
+        else:
+            self.image = cv2.imread(self.image_data.path, # pylint: disable=no-member
+                                    cv2.IMREAD_GRAYSCALE) # pylint: disable=no-member
+        if self.image is not None:
+            self.__crop_to_ratio()
+            self.__downscale()
 
 
     def __log(self,
@@ -75,46 +122,59 @@ class OcrReader:
                                 :width]
 
 
-    def __read_file_text(self) -> list[str]:
+    def __downscale(self) -> None:
         '''
-            Reads text on given file on the given ratio
+            Downscales the image to `OCR_MAX_WIDTH` if wider
         '''
-        reader: Reader = Reader(self.languages,
-                                gpu = True)
-        results = reader.readtext(self.image)
-
-        return [text for _, text, _ in results]
+        height, width = self.image.shape[:2]
+        if width > OCR_MAX_WIDTH:
+            self.image = cv2.resize(self.image, # pylint: disable=no-member
+                                    (OCR_MAX_WIDTH,
+                                     max(int(height * OCR_MAX_WIDTH / width), 1)),
+                                    interpolation = cv2.INTER_AREA) # pylint: disable=no-member
 
 
-    def __get_file_prefix_text(self) -> list[str]:
-        '''
-            Reads text on file and returns if it is prefix
+    def __get_prefixed_text(self,
+                            text: str) -> str | None:
         '''
-        prefix_text: list[str] = []
-        for text in self.__read_file_text():
-            for prefix in self.prefixes:
-                if prefix in text:
-                    prefix_text.append(text)
-        return prefix_text
+            Returns the text from the prefix with the misread characters of the ID fixed, `None` if there is no prefix
+
+            :param text: :class:`str` Recognized text
+        ''' # pylint: disable=line-too-long
+        match: re.Match | None = self.prefix_pattern.search(text.replace(" ", ""))
+        if match is None:
+            return None
+        return match.group(0) + match.string[match.end():].translate(self.REPLACES)
 
 
-    def __convert_prefixed_text(self) -> list[str]:
-        '''
-            Convert missmatched characters like 'O' to '0'
+    def __read_first_prefixed_text(self) -> str | None:
         '''
-        texts: list[str] = []
-        for text in self.__get_file_prefix_text():
-            temp_text: str = text
-            for replace in self.REPLACES:
-                if replace[0] in temp_text:
-                    temp_text.replace(replace[0],
-                                      replace[1])
-            texts.append(temp_text)
-        return texts
+            Detects the text boxes, then recognizes them top to bottom with the allowlist until one has a prefix
+        ''' # pylint: disable=line-too-long
+        if not self.prefixes or self.image is None or not self.image.size:
+            return None
+        reader: Reader = get_reader(self.languages,
+                                    self.gpu,
+                                    self.quantize)
+        horizontal_list, _ = reader.detect(self.image)
+        boxes: list[list[int]] = sorted(horizontal_list[0] if horizontal_list else [],
+                                        key = lambda box: (box[2], box[0]))
+        for box in boxes:
+            for text in reader.recognize(self.image,
+                                         horizontal_list = [box],
+                                         free_list = [],
+                                         allowlist = self.allowlist,
+                                         detail = 0,
+                                         paragraph = False):
+                prefixed_text: str | None = self.__get_prefixed_text(text)
+                if prefixed_text:
+                    return prefixed_text
+        return None
 
 
     def get_texts(self) -> list[str]:
         '''
-            Gets first no text
+            Gets the first prefixed text, empty if none found
         '''
-        return self.__convert_prefixed_text()
+        text: str | None = self.__read_first_prefixed_text()
+        return [text] if text else []
@@ -0,0 +1,179 @@
+'''
+    Page classifier module
+'''
+
+import os
+from PIL import Image
+from PIL.Image import Image as PilImage
+from villog import Logger
+from config import BLANK_POLICIES, DEFAULT_BLANK_POLICY, BLANK_INK_RATIO, SEPARATOR_MAX_DISTANCE
+
+class PageClassifierException(Exception):
+    '''
+        Page classifier exception class
+    '''
+    def __init__(self,
+                 message: str | None = None):
+        '''
+            Page classifier exception class
+
+            :param message: :class:`Optional(Union(str, None))` Message to the exception. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        super().__init__(message or "Unknown page classifier exception")
+
+
+class PageClassifier:
+    '''
+        Cheap check on a thumbnail before decoding: blank pages and separator sheets don't need the barcode scanner
+    '''
+    CONTENT: str = "content"
+    BLANK: str = "blank"
+    SEPARATOR: str = "separator"
+
+    THUMBNAIL_SIZE: int = 512
+    ''' Longer side of the thumbnail in pixels, box-averaged so thin strokes still count as ink '''
+    MARGIN_RATIO: float = 0.03
+    ''' Border cropped from every side, scanner edges and shadows are not ink '''
+    INK_CONTRAST: int = 40
+    ''' A pixel is ink if it is this much darker than the paper '''
+    HASH_SIZE: int = 8
+    ''' Average hash of `HASH_SIZE` x `HASH_SIZE` bits '''
+
+    __slots__: list[str] = ["blank_policy",
+                            "blank_ink_ratio",
+                            "separator_hashes",
+                            "separator_distance",
+                            "logger"]
+
+    def __init__(self,
+                 blank_policy: str = DEFAULT_BLANK_POLICY,
+                 blank_ink_ratio: float = BLANK_INK_RATIO,
+                 separator_templates: list[str] | None = None,
+                 separator_distance: int = SEPARATOR_MAX_DISTANCE,
+                 logger: Logger | None = None) -> None:
+        '''
+            Page classifier class
+
+            :param blank_policy: :class:`Optional(str)` `decode`, `skip`, `drop` or `attach`. Defaults to `DEFAULT_BLANK_POLICY`
+            :param blank_ink_ratio: :class:`Optional(float)` A page is blank below this ink ratio. Defaults to `BLANK_INK_RATIO`
+            :param separator_templates: :class:`Optional(Union(list[str], None))` Images of the separator sheets. Defaults to `None`
+            :param separator_distance: :class:`Optional(int)` Maximum hash difference to a separator template. Defaults to `SEPARATOR_MAX_DISTANCE`
+            :param logger: :class:`Optional(Union(Logger, None))` Logger class, creates one if not provided. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        self.blank_policy: str = str(blank_policy).strip().lower()
+        if self.blank_policy not in BLANK_POLICIES:
+            raise PageClassifierException(f"Unknown blank page policy: '{self.blank_policy}', options: {', '.join(BLANK_POLICIES)}") # pylint: disable=line-too-long
+        self.blank_ink_ratio: float = blank_ink_ratio
+        self.separator_distance: int = separator_distance
+        self.logger: Logger = logger or Logger(file_path = f"{os.path.dirname(__file__)}.log")
+        self.separator_hashes: list[int] = []
+        for template in separator_templates or []:
+            try:
+                with Image.open(template) as template_image:
+                    self.separator_hashes.append(self.average_hash(self.thumbnail(template_image)))
+            except Exception as error: # pylint: disable=broad-exception-caught
+                raise PageClassifierException(f"Can not read separator template '{template}': {error}") from error # pylint: disable=line-too-long
+
+
+    def log(self,
+            content: str) -> None:
+        '''
+            Logs content
+
+            :param content: :class:`str` Content to log
+        '''
+        self.logger.log(content)
+
+
+    @property
+    def enabled(self) -> bool:
+        '''
+            Pages are checked before decoding
+        '''
+        return self.blank_policy != "decode" or bool(self.separator_hashes)
+
+
+    def thumbnail(self,
+                  image: PilImage) -> PilImage:
+        '''
+            Grayscale, box-averaged thumbnail without the margins
+
+            :param image: :class:`Image`
+        '''
+        width, height = image.size
+        margin_x: int = int(width * self.MARGIN_RATIO)
+        margin_y: int = int(height * self.MARGIN_RATIO)
+        thumbnail: PilImage = image.crop((margin_x,
+                                          margin_y,
+                                          width - margin_x,
+                                          height - margin_y)).convert("L")
+        thumbnail.thumbnail((self.THUMBNAIL_SIZE,
+                             self.THUMBNAIL_SIZE),
+                            Image.Resampling.BOX)
+        return thumbnail
+
+
+    def ink_ratio(self,
+                  thumbnail: PilImage) -> float:
+        '''
+            Ratio of the thumbnail darker than the paper by `INK_CONTRAST`, from its histogram
+
+            :param thumbnail: :class:`Image` Grayscale thumbnail
+        '''
+        histogram: list[int] = thumbnail.histogram()
+        total: int = sum(histogram)
+        if not total:
+            return 0.0
+        # the paper is the brightest level covering at least half of the page
+        count: int = 0
+        paper: int = 255
+        for level in range(255, -1, -1):
+            count += histogram[level]
+            if count * 2 >= total:
+                paper = level
+                break
+        return sum(histogram[:max(paper - self.INK_CONTRAST, 0)]) / total
+
+
+    def average_hash(self,
+                     thumbnail: PilImage) -> int:
+        '''
+            64 bit average hash of the thumbnail, a bit is set where the cell is brighter than the mean
+
+            :param thumbnail: :class:`Image` Grayscale thumbnail
+        '''
+        pixels: list[int] = list(thumbnail.resize((self.HASH_SIZE,
+                                                   self.HASH_SIZE),
+                                                  Image.Resampling.BOX).getdata())
+        mean: float = sum(pixels) / len(pixels)
+        value: int = 0
+        for pixel in pixels:
+            value = (value << 1) | int(pixel > mean)
+        return value
+
+
+    def classify(self,
+                 image: PilImage,
+                 name: str = "") -> str:
+        '''
+            Returns `CONTENT`, `BLANK` or `SEPARATOR`
+
+            :param image: :class:`Image`
+            :param name: :class:`Optional(str)` Name of the page for logging. Defaults to `""`
+        '''
+        if not self.enabled:
+            return self.CONTENT
+        thumbnail: PilImage = self.thumbnail(image)
+        ink_ratio: float = self.ink_ratio(thumbnail)
+        if ink_ratio < self.blank_ink_ratio:
+            # a flat page hashes close to anything, it is never a separator
+            if self.blank_policy == "decode":
+                return self.CONTENT
+            self.log(f"'{name}' is blank (ink: {ink_ratio:.4%})")
+            return self.BLANK
+        if self.separator_hashes:
+            page_hash: int = self.average_hash(thumbnail)
+            if any((page_hash ^ separator_hash).bit_count() <= self.separator_distance for separator_hash in self.separator_hashes): # pylint: disable=line-too-long
+                self.log(f"'{name}' is a separator sheet")
+                return self.SEPARATOR
+        return self.CONTENT
@@ -3,8 +3,14 @@
 '''
 
 import os
-from pypdf import PdfReader, PdfWriter
+from io import BytesIO
+from typing import BinaryIO, TYPE_CHECKING
+from collections.abc import Iterator
 from villog import Logger
+from src.classes.split_options import SplitOptions
+
+if TYPE_CHECKING:
+    from pypdf import PdfWriter, PageObject
 
 class PdfSplitter:
     '''
@@ -13,20 +19,28 @@ class PdfSplitter:
     __slots__: list[str] = ["pdf_path",
                             "output_dir",
                             "logger",
+                            "split_options",
+                            "name",
                             "output_files"]
     def __init__(self,
                  pdf_path: str,
                  output_dir: str,
-                 logger: Logger | None = None) -> None:
+                 logger: Logger | None = None,
+                 split_options: SplitOptions | None = None,
+                 name: str | None = None) -> None:
         '''
             Splitter class
 
             :param pdf_path: :class:`str` File path
             :param output_path: :class:`str` Output path
             :param logger: :class:`Optional(Union(Logger, None))` Logger class, creates one if not provided. Defaults to `None`
+            :param split_options: :class:`Optional(Union(SplitOptions, None))` How the pages are written, uses the config defaults if not provided. Defaults to `None`
+            :param name: :class:`Optional(Union(str, None))` Name of the pages before their number, the file name without extension if not provided. Defaults to `None`
         ''' # pylint: disable=line-too-long
         self.pdf_path: str = pdf_path
         self.output_dir: str = output_dir
+        self.split_options: SplitOptions = split_options or SplitOptions()
+        self.name: str | None = name
         self.logger: Logger = logger or Logger(file_path = os.path.join(os.path.dirname(__file__),
                                                                         "log.log"))
         self.output_files: list[str] = []
@@ -42,33 +56,138 @@ class PdfSplitter:
         self.logger.log(content)
 
 
+    def __bilevel_images(self,
+                         page: "PageObject") -> None:
+        '''
+            Re-encodes the images of the page as bilevel, saved with CCITT G4 by Pillow (if built with libtiff)
+
+            :param page: :class:`PageObject` Page already added to a writer
+        ''' # pylint: disable=line-too-long
+        threshold: int = self.split_options.bilevel_threshold
+        for image in page.images:
+            try:
+                if image.image is None or image.image.mode == "1":
+                    continue
+                image.replace(image.image.convert("L").point(lambda value: 255 if value >= threshold else 0, # pylint: disable=line-too-long
+                                                             mode = "1"))
+            except Exception as error: # pylint: disable=broad-exception-caught
+                self.log(f"Error re-encoding image '{image.name}' of {self.pdf_path}: {error}")
+
+
+    def __optimize_page(self,
+                        page: "PageObject") -> None:
+        '''
+            Applies `self.split_options` to the page
+
+            :param page: :class:`PageObject` Page already added to a writer
+        '''
+        if self.split_options.bilevel_threshold is not None:
+            self.__bilevel_images(page)
+        if self.split_options.compress_streams:
+            page.compress_content_streams()
+
+
+    def __page_writers(self,
+                       pdf_file: BinaryIO) -> "Iterator[tuple[int, PdfWriter]]":
+        '''
+            Yields a writer holding a single page for every page of the PDF
+
+            :param pdf_file: :class:`BinaryIO` Opened PDF file
+        '''
+        from pypdf import PdfReader, PdfWriter # pylint: disable=import-outside-toplevel
+        pages: list[PageObject] = list(PdfReader(pdf_file).pages)
+        self.log(f"{self.pdf_path} is {str(len(pages))} page{'s' if len(pages) > 1 else ''}") # pylint: disable=line-too-long
+        for page_number, page in enumerate(pages):
+            writer: PdfWriter = PdfWriter()
+            self.__optimize_page(writer.add_page(page))
+            yield page_number, writer
+
+
     def split(self) -> list[str]:
         '''
             Split the PDF file into individual pages
         '''
         self.log(f"Splitting {self.pdf_path}")
         base_name: str = os.path.basename(self.pdf_path)
+        name_without_ext: str = self.name or base_name.replace(".pdf", "").replace(".PDF", "")
         try:
             with open(file = self.pdf_path,
                       mode = "rb") as pdf_file:
-                reader: PdfReader = PdfReader(pdf_file)
-                self.log(f"{self.pdf_path} is {str(len(reader.pages))} page{'s' if len(reader.pages) > 1 else ''}") # pylint: disable=line-too-long
-                for page_number, _ in enumerate(reader.pages):
-                    writer: PdfWriter = PdfWriter()
-                    writer.add_page(reader.pages[page_number])
-                    name_without_ext: str = base_name.replace(".pdf", "").replace(".PDF", "")
+                for page_number, writer in self.__page_writers(pdf_file):
                     output_pdf_path: str = os.path.join(self.output_dir,
                                                         f"{name_without_ext}_{page_number}.pdf")
                     with open(file = output_pdf_path,
                               mode = "wb") as output_pdf:
                         writer.write(output_pdf)
-                    self.log(f"Page {page_number + 1} saved to {output_pdf_path}")
+                        size: int = output_pdf.tell()
+                    self.log(f"Page {page_number + 1} saved to {output_pdf_path} ({size} bytes)")
                     self.output_files.append(output_pdf_path)
         except Exception as error: # pylint: disable=broad-exception-caught
             self.log(f"Error splitting {base_name}: {error}")
         return self.output_files
 
 
+    def split_to_bytes(self,
+                       pdf_data: bytes) -> list[bytes]:
+        '''
+            Split the PDF data into individual pages in memory, `self.output_dir` is not used
+
+            :param pdf_data: :class:`bytes` Content of the PDF file
+        ''' # pylint: disable=line-too-long
+        self.log(f"Splitting {self.pdf_path} in memory")
+        pages: list[bytes] = []
+        try:
+            for _, writer in self.__page_writers(BytesIO(pdf_data)):
+                output_pdf: BytesIO = BytesIO()
+                writer.write(output_pdf)
+                pages.append(output_pdf.getvalue())
+        except Exception as error: # pylint: disable=broad-exception-caught
+            self.log(f"Error splitting {os.path.basename(self.pdf_path)}: {error}")
+        return pages
+
+
+    @staticmethod
+    def join_bytes(pdf_data: list[bytes]) -> bytes:
+        '''
+            Joins PDF documents in memory, in the given order
+
+            :param pdf_data: :class:`list[bytes]` Content of the PDF files
+        '''
+        from pypdf import PdfWriter # pylint: disable=import-outside-toplevel
+        writer: PdfWriter = PdfWriter()
+        for data in pdf_data:
+            writer.append(BytesIO(data))
+        output_pdf: BytesIO = BytesIO()
+        writer.write(output_pdf)
+        return output_pdf.getvalue()
+
+
+    def append_to(self,
+                  document_path: str) -> bool:
+        '''
+            Appends the pages of `self.pdf_path` to the end of an existing PDF file
+
+            :param document_path: :class:`str` File path of the document to extend
+        '''
+        try:
+            with open(file = document_path,
+                      mode = "rb") as document:
+                document_data: bytes = document.read()
+            with open(file = self.pdf_path,
+                      mode = "rb") as pdf_file:
+                pdf_data: bytes = pdf_file.read()
+            joined: bytes = self.join_bytes([document_data,
+                                             pdf_data])
+            with open(file = document_path,
+                      mode = "wb") as document:
+                document.write(joined)
+            self.log(f"Appended {self.pdf_path} to {document_path}")
+            return True
+        except Exception as error: # pylint: disable=broad-exception-caught
+            self.log(f"Error appending {self.pdf_path} to {document_path}: {error}")
+            return False
+
+
     def split_and_get_files(self) -> list[str]:
         '''
             Split files and return their paths
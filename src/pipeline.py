@@ -0,0 +1,146 @@
+'''
+    Async pipeline module
+'''
+
+import os
+import asyncio
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from villog import Logger
+
+@dataclass(slots = True)
+class PipelineStage:
+    '''
+        `PipelineStage` class
+
+        `function` takes one item and returns the items for the next stage
+    '''
+    name: str
+    function: Callable[[any], list[any] | None]
+    workers: int = 1
+
+
+class AsyncPipeline:
+    '''
+        Runs blocking stages in executors connected by bounded queues,
+        so the I/O of one item overlaps the CPU work of another
+    '''
+    SENTINEL: object = object()
+
+    __slots__: list[str] = ["stages",
+                            "queue_size",
+                            "logger"]
+
+    def __init__(self,
+                 stages: list[PipelineStage],
+                 queue_size: int = 8,
+                 logger: Logger | None = None) -> None:
+        '''
+            Async pipeline class
+
+            :param stages: :class:`list[PipelineStage]` Stages in order
+            :param queue_size: :class:`Optional(int)` Maximum number of items waiting between two stages. Defaults to `8`
+            :param logger: :class:`Optional(Union(Logger, None))` Logger class, creates one if not provided. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        self.stages: list[PipelineStage] = stages
+        self.queue_size: int = max(queue_size, 1)
+        self.logger: Logger = logger or Logger(file_path = f"{os.path.dirname(__file__)}.log")
+
+
+    def log(self,
+            content: str) -> None:
+        '''
+            Logs content
+
+            :param content: :class:`str` Content to log
+        '''
+        self.logger.log(content)
+
+
+    async def __run_stage(self,
+                          stage: PipelineStage,
+                          inbox: asyncio.Queue,
+                          outbox: asyncio.Queue | None,
+                          next_workers: int) -> None:
+        '''
+            Runs the workers of a stage, then signals the next stage to finish
+
+            :param stage: :class:`PipelineStage` Stage to run
+            :param inbox: :class:`asyncio.Queue` Queue to read the items from
+            :param outbox: :class:`Union(asyncio.Queue, None)` Queue of the next stage, `None` for the last stage
+            :param next_workers: :class:`int` Number of workers of the next stage
+        ''' # pylint: disable=line-too-long
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers = stage.workers,
+                                thread_name_prefix = stage.name) as executor:
+            async def worker() -> None:
+                while (item := await inbox.get()) is not self.SENTINEL:
+                    try:
+                        results: list[any] | None = await loop.run_in_executor(executor,
+                                                                               stage.function,
+                                                                               item)
+                    except Exception as error: # pylint: disable=broad-exception-caught
+                        self.log(f"Error in '{stage.name}' stage: {error}")
+                        results = None
+                    if outbox is not None:
+                        for result in results or []:
+                            await outbox.put(result)
+            await asyncio.gather(*(worker() for _ in range(stage.workers)))
+        if outbox is not None:
+            for _ in range(next_workers):
+                await outbox.put(self.SENTINEL)
+
+
+    async def __feed(self,
+                     items: Iterable[any],
+                     queue: asyncio.Queue) -> None:
+        '''
+            Feeds the items to the first stage
+
+            :param items: :class:`Iterable[any]` Items to process
+            :param queue: :class:`asyncio.Queue` Queue of the first stage
+        '''
+        # the items may be listed lazily, so they are taken off the event loop
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        iterator: Iterator[any] = iter(items)
+        while True:
+            item: any = await loop.run_in_executor(None,
+                                                   next,
+                                                   iterator,
+                                                   self.SENTINEL)
+            if item is self.SENTINEL:
+                break
+            await queue.put(item)
+        for _ in range(self.stages[0].workers):
+            await queue.put(self.SENTINEL)
+
+
+    async def run_async(self,
+                        items: Iterable[any]) -> None:
+        '''
+            Runs the items through every stage
+
+            :param items: :class:`Iterable[any]` Items to process
+        '''
+        queues: list[asyncio.Queue] = [asyncio.Queue(maxsize = self.queue_size) for _ in self.stages]
+        tasks: list[asyncio.Task] = [asyncio.create_task(self.__feed(items,
+                                                                     queues[0]))]
+        for i, stage in enumerate(self.stages):
+            is_last: bool = i == len(self.stages) - 1
+            tasks.append(asyncio.create_task(self.__run_stage(stage = stage,
+                                                              inbox = queues[i],
+                                                              outbox = None if is_last else queues[i + 1], # pylint: disable=line-too-long
+                                                              next_workers = 0 if is_last else self.stages[i + 1].workers))) # pylint: disable=line-too-long
+        await asyncio.gather(*tasks)
+
+
+    def run(self,
+            items: Iterable[any]) -> None:
+        '''
+            Runs the items through every stage, blocks until all finished
+
+            :param items: :class:`Iterable[any]` Items to process
+        '''
+        self.log("Pipeline stages: " + ", ".join(f"{stage.name} ({stage.workers})" for stage in self.stages)) # pylint: disable=line-too-long
+        asyncio.run(self.run_async(items))
@@ -0,0 +1,215 @@
+'''
+    Profiler module
+'''
+
+import os
+import sys
+import pstats
+from cProfile import Profile
+from threading import Lock, local, get_ident
+from collections.abc import Callable
+from villog import Logger
+from config import PROFILE_TOP_FUNCTIONS
+
+class Profiler:
+    '''
+        cProfile in every worker (process or thread), each writes its own `.pstats` file to `directory`, merged by `report`
+    ''' # pylint: disable=line-too-long
+    EXTENSION: str = ".pstats"
+    REPORT_NAME: str = "report.txt"
+    SHARED: bool = sys.version_info >= (3, 12)
+    ''' From Python 3.12 a profiler sees every thread and only one may be enabled, so the workers of a process share one ''' # pylint: disable=line-too-long
+
+    __slots__: list[str] = ["directory",
+                            "local",
+                            "lock",
+                            "shared",
+                            "users",
+                            "unprofiled",
+                            "logger"]
+
+    def __init__(self,
+                 directory: str | None = None,
+                 logger: Logger | None = None) -> None:
+        '''
+            Profiler class, disabled without `directory`
+
+            :param directory: :class:`Optional(Union(str, None))` Directory of the `.pstats` files and the report. Defaults to `None`
+            :param logger: :class:`Optional(Union(Logger, None))` Logger class, creates one if not provided. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        self.directory: str | None = directory
+        self.local: local = local()
+        self.lock: Lock = Lock()
+        self.shared: Profile | None = None
+        self.users: int = 0
+        self.unprofiled: bool = False
+        self.logger: Logger = logger or Logger(file_path = f"{os.path.dirname(__file__)}.log")
+        if self.directory:
+            os.makedirs(self.directory,
+                        exist_ok = True)
+
+
+    def __getstate__(self) -> dict:
+        return {"directory": self.directory,
+                "logger": self.logger}
+
+
+    def __setstate__(self,
+                     state: dict) -> None:
+        self.directory = state["directory"]
+        self.logger = state["logger"]
+        self.local = local()
+        self.lock = Lock()
+        self.shared = None
+        self.users = 0
+        self.unprofiled = False
+
+
+    def log(self,
+            content: str) -> None:
+        '''
+            Logs content
+
+            :param content: :class:`str` Content to log
+        '''
+        self.logger.log(content)
+
+
+    @property
+    def enabled(self) -> bool:
+        '''
+            Profiling is on
+        '''
+        return bool(self.directory)
+
+
+    def call(self,
+             function: Callable,
+             *args,
+             **kwargs) -> any:
+        '''
+            Calls the function, profiled on this worker if enabled, and dumps the stats of the worker
+
+            :param function: :class:`Callable`
+        '''
+        if not self.directory or getattr(self.local, "active", False):
+            return function(*args, **kwargs)
+        self.local.active = True
+        try:
+            profile: Profile | None = self.__start()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                if profile is not None:
+                    self.__stop(profile)
+        finally:
+            self.local.active = False
+
+
+    def __start(self) -> Profile | None:
+        '''
+            Enables the profiler of the worker (of the process from Python 3.12), `None` if another profiling tool is active
+        ''' # pylint: disable=line-too-long
+        try:
+            if not self.SHARED:
+                profile: Profile | None = getattr(self.local, "profile", None)
+                if profile is None:
+                    profile = Profile()
+                    self.local.profile = profile
+                profile.enable()
+                return profile
+            with self.lock:
+                if self.shared is None:
+                    self.shared = Profile()
+                if not self.users:
+                    self.shared.enable()
+                self.users += 1
+                return self.shared
+        except ValueError as error:
+            # "Another profiling tool is already active"
+            if not self.unprofiled:
+                self.log(f"Running unprofiled: {error}")
+                self.unprofiled = True
+            return None
+
+
+    def __stop(self,
+               profile: Profile) -> None:
+        '''
+            Disables the profiler and dumps its stats, a shared one once its last worker stops
+
+            :param profile: :class:`Profile` Profiler returned by `__start`
+        '''
+        if not self.SHARED:
+            profile.disable()
+            self.__dump(profile,
+                        f"{os.getpid()}_{get_ident()}")
+            return
+        with self.lock:
+            self.users -= 1
+            if self.users:
+                return
+            profile.disable()
+            self.__dump(profile,
+                        str(os.getpid()))
+
+
+    def __dump(self,
+               profile: Profile,
+               name: str) -> None:
+        '''
+            Writes the stats of the profiler to `directory`
+
+            :param profile: :class:`Profile`
+            :param name: :class:`str` File name without extension
+        '''
+        try:
+            profile.dump_stats(os.path.join(self.directory,
+                                            f"{name}{self.EXTENSION}"))
+        except Exception as error: # pylint: disable=broad-exception-caught
+            self.log(f"Error writing profile: {error}")
+
+
+    def wrap(self,
+             function: Callable) -> Callable:
+        '''
+            Returns the function profiled by `call`, or the function itself if disabled
+
+            :param function: :class:`Callable`
+        '''
+        if not self.directory:
+            return function
+
+        def profiled(*args, **kwargs) -> any:
+            return self.call(function,
+                             *args,
+                             **kwargs)
+
+        return profiled
+
+
+    def report(self,
+               top: int = PROFILE_TOP_FUNCTIONS) -> str | None:
+        '''
+            Merges the `.pstats` files of the workers into a report of the hottest functions, returns its path
+
+            :param top: :class:`Optional(int)` Number of functions listed. Defaults to `PROFILE_TOP_FUNCTIONS`
+        ''' # pylint: disable=line-too-long
+        if not self.directory:
+            return None
+        files: list[str] = [os.path.join(self.directory, file) for file in sorted(os.listdir(self.directory)) if file.endswith(self.EXTENSION)] # pylint: disable=line-too-long
+        if not files:
+            self.log(f"No profile written to '{self.directory}'")
+            return None
+        report_path: str = os.path.join(self.directory,
+                                        self.REPORT_NAME)
+        with open(file = report_path,
+                  mode = "w",
+                  encoding = "utf-8") as report_file:
+            stats: pstats.Stats = pstats.Stats(*files,
+                                               stream = report_file)
+            report_file.write(f"{len(files)} worker profile{'' if len(files) == 1 else 's'} merged\n\n") # pylint: disable=line-too-long
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+        self.log(f"Profile of {len(files)} worker{'' if len(files) == 1 else 's'} merged to '{report_path}'") # pylint: disable=line-too-long
+        return report_path
@@ -0,0 +1,201 @@
+'''
+    Resource monitor module
+'''
+
+import os
+from collections import deque
+from villog import Logger
+from config import MEMORY_RESERVE_MB, DEFAULT_WORKER_MEMORY_MB, MAX_LOAD_PER_CPU
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MB: int = 1024 * 1024
+
+class ResourceMonitor:
+    '''
+        Measures free memory, worker memory and system load to decide how many workers may run
+
+        Uses `psutil` if installed, otherwise `/proc` and `os.getloadavg` where available.
+        If nothing can be measured every worker up to the ceiling is admitted.
+    ''' # pylint: disable=line-too-long
+    PEAK_HISTORY: int = 32
+    ''' Number of finished workers the memory estimate is based on '''
+    SAFETY_RATIO: float = 1.2
+    ''' Margin over the average measured peak worker memory '''
+    FILE_MEMORY_RATIO: float = 2.0
+    ''' Memory a job needs over a usual worker per byte of its file (parsed by `pypdf` and read whole for the backup) '''
+
+    __slots__: list[str] = ["reserve_mb",
+                            "max_load_per_cpu",
+                            "logger",
+                            "peaks",
+                            "finished_peaks",
+                            "limit"]
+
+    def __init__(self,
+                 reserve_mb: int = MEMORY_RESERVE_MB,
+                 max_load_per_cpu: float = MAX_LOAD_PER_CPU,
+                 logger: Logger | None = None) -> None:
+        '''
+            Resource monitor class
+
+            :param reserve_mb: :class:`Optional(int)` Memory (MB) kept free for the system. Defaults to `MEMORY_RESERVE_MB`
+            :param max_load_per_cpu: :class:`Optional(float)` Load average per CPU thread above which no worker is added. Defaults to `MAX_LOAD_PER_CPU`
+            :param logger: :class:`Optional(Union(Logger, None))` Logger class, creates one if not provided. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        self.reserve_mb: int = reserve_mb
+        self.max_load_per_cpu: float = max_load_per_cpu
+        self.logger: Logger = logger or Logger(file_path = f"{os.path.dirname(__file__)}.log")
+        self.peaks: dict[int, float] = {}
+        self.finished_peaks: deque[float] = deque(maxlen = self.PEAK_HISTORY)
+        self.limit: int | None = None
+        if psutil is None:
+            missing: list[str] = [name for name, value in (("memory", self.available_mb()),
+                                                           ("load", self.load_per_cpu())) if value is None] # pylint: disable=line-too-long
+            if missing:
+                self.log(f"WARNING: psutil is not installed and the {' and '.join(missing)} of the system can not be measured, workers are admitted up to the ceiling without that check") # pylint: disable=line-too-long
+
+
+    def log(self,
+            content: str) -> None:
+        '''
+            Logs content
+
+            :param content: :class:`str` Content to log
+        '''
+        self.logger.log(content)
+
+
+    @staticmethod
+    def available_mb() -> float | None:
+        '''
+            Available system memory in MB, `None` if it can not be measured
+        '''
+        if psutil is not None:
+            return psutil.virtual_memory().available / MB
+        try:
+            with open(file = "/proc/meminfo",
+                      mode = "r",
+                      encoding = "utf-8") as meminfo:
+                for line in meminfo:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return None
+
+
+    @staticmethod
+    def rss_mb(pid: int) -> float | None:
+        '''
+            Resident memory of a process in MB, `None` if it can not be measured
+
+            :param pid: :class:`int` Process id
+        '''
+        try:
+            if psutil is not None:
+                return psutil.Process(pid).memory_info().rss / MB
+            with open(file = f"/proc/{pid}/status",
+                      mode = "r",
+                      encoding = "utf-8") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except Exception: # pylint: disable=broad-exception-caught
+            pass
+        return None
+
+
+    @staticmethod
+    def load_per_cpu() -> float | None:
+        '''
+            1 minute load average per CPU thread, `None` if it can not be measured
+        '''
+        try:
+            return os.getloadavg()[0] / (os.cpu_count() or 1)
+        except (AttributeError, OSError):
+            return None
+
+
+    def sample(self,
+               pids: list[int]) -> None:
+        '''
+            Records the memory of the running workers
+
+            :param pids: :class:`list[int]` Process ids of the running workers
+        '''
+        for pid in pids:
+            rss: float | None = self.rss_mb(pid)
+            if rss is not None:
+                self.peaks[pid] = max(self.peaks.get(pid, 0.0),
+                                      rss)
+
+
+    def finished(self,
+                 pid: int | None) -> None:
+        '''
+            Moves the peak memory of a finished worker to the history
+
+            :param pid: :class:`Union(int, None)` Process id of the finished worker
+        '''
+        if pid in self.peaks:
+            self.finished_peaks.append(self.peaks.pop(pid))
+
+
+    def worker_mb(self) -> float:
+        '''
+            Estimated memory of a worker in MB
+        '''
+        peaks: list[float] = list(self.finished_peaks) + list(self.peaks.values())
+        if not peaks:
+            return float(DEFAULT_WORKER_MEMORY_MB)
+        return sum(peaks) / len(peaks) * self.SAFETY_RATIO
+
+
+    def allowed_workers(self,
+                        running: int,
+                        ceiling: int) -> int:
+        '''
+            Number of workers allowed to run now, between `1` and `ceiling`
+
+            :param running: :class:`int` Number of running workers
+            :param ceiling: :class:`int` Maximum number of workers
+        '''
+        allowed: int = ceiling
+        available: float | None = self.available_mb()
+        worker_mb: float = self.worker_mb()
+        if available is not None:
+            allowed = min(allowed,
+                          running + int((available - self.reserve_mb) // worker_mb))
+        load: float | None = self.load_per_cpu()
+        if load is not None and load > self.max_load_per_cpu:
+            allowed = min(allowed,
+                          running)
+        allowed = max(min(allowed, ceiling), 1)
+        if allowed != self.limit:
+            self.log(f"Worker limit: {allowed}/{ceiling} (available: {'?' if available is None else f'{available:.0f} MB'}, worker: ~{worker_mb:.0f} MB, load per CPU: {'?' if load is None else f'{load:.2f}'})") # pylint: disable=line-too-long
+            self.limit = allowed
+        return allowed
+
+
+    def admit(self,
+              running: int,
+              ceiling: int,
+              file_size: int = 0) -> bool:
+        '''
+            Checks if a new worker may start, a single worker is always admitted
+
+            :param running: :class:`int` Number of running workers
+            :param ceiling: :class:`int` Maximum number of workers
+            :param file_size: :class:`Optional(int)` Size of the file in bytes, large documents need headroom over a usual worker. Defaults to `0`
+        ''' # pylint: disable=line-too-long
+        if running == 0:
+            return True
+        if running >= self.allowed_workers(running = running,
+                                           ceiling = ceiling):
+            return False
+        available: float | None = self.available_mb()
+        return available is None or available - self.reserve_mb >= self.worker_mb() + file_size * self.FILE_MEMORY_RATIO / MB # pylint: disable=line-too-long
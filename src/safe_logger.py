@@ -0,0 +1,44 @@
+'''
+    Thread-safe logger module
+'''
+
+from threading import Lock
+from villog import Logger
+
+class SafeLogger(Logger):
+    '''
+        `Logger` writing one line at a time, so lines of parallel threads don't interleave.
+        The lock is recreated when the logger is sent to another process.
+    '''
+    def __init__(self,
+                 *args,
+                 **kwargs) -> None:
+        '''
+            Thread-safe logger class, takes the arguments of `Logger`
+        '''
+        super().__init__(*args,
+                         **kwargs)
+        self.lock: Lock = Lock()
+
+
+    def log(self,
+            content: str = "") -> None:
+        '''
+            Logs content
+
+            :param content: :class:`str` Content to log
+        '''
+        with self.lock:
+            super().log(content)
+
+
+    def __getstate__(self) -> dict:
+        state: dict = self.__dict__.copy()
+        state.pop("lock", None)
+        return state
+
+
+    def __setstate__(self,
+                     state: dict) -> None:
+        self.__dict__.update(state)
+        self.lock = Lock()
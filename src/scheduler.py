@@ -0,0 +1,192 @@
+'''
+    File scheduler module
+'''
+
+import os
+import heapq
+from threading import Thread
+from dataclasses import dataclass
+from villog import Logger
+from config import SCHEDULE_POLICIES, DEFAULT_SCHEDULE_POLICY, BYTES_PER_PAGE_ESTIMATE, IMAGE_EXTENSIONS, PAGE_COUNT_TIMEOUT # pylint: disable=line-too-long
+
+@dataclass(slots = True)
+class ScheduledFile:
+    '''
+        `ScheduledFile` class
+    '''
+    path: str
+    size: int = 0
+    mtime: float = 0.0
+    pages: int | None = None
+
+    @property
+    def cost(self) -> float:
+        '''
+            Estimated work of the file in pages
+        '''
+        if self.pages is not None:
+            return float(self.pages)
+        return max(self.size / BYTES_PER_PAGE_ESTIMATE, 1.0)
+
+
+class SchedulerException(Exception):
+    '''
+        Scheduler exception class
+    '''
+    def __init__(self,
+                 message: str | None = None):
+        '''
+            Scheduler exception class
+
+            :param message: :class:`Optional(Union(str, None))` Message to the exception. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        super().__init__(message or "Unknown scheduler exception")
+
+
+class Scheduler:
+    '''
+        Orders the files before dispatching them to the workers
+    '''
+    __slots__: list[str] = ["policy",
+                            "logger"]
+
+    def __init__(self,
+                 policy: str = DEFAULT_SCHEDULE_POLICY,
+                 logger: Logger | None = None) -> None:
+        '''
+            Scheduler class
+
+            :param policy: :class:`Optional(str)` `longest`, `oldest` or `fifo`. Defaults to `DEFAULT_SCHEDULE_POLICY`
+            :param logger: :class:`Optional(Union(Logger, None))` Logger class, creates one if not provided. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        self.policy: str = str(policy).strip().lower()
+        if self.policy not in SCHEDULE_POLICIES:
+            raise SchedulerException(f"Unknown schedule policy: '{self.policy}', options: {', '.join(SCHEDULE_POLICIES)}") # pylint: disable=line-too-long
+        self.logger: Logger = logger or Logger(file_path = f"{os.path.dirname(__file__)}.log")
+
+
+    def log(self,
+            content: str) -> None:
+        '''
+            Logs content
+
+            :param content: :class:`str` Content to log
+        '''
+        self.logger.log(content)
+
+
+    @staticmethod
+    def read_page_count(path: str) -> int | None:
+        '''
+            Reads `/Root/Pages/Count` (the frames of an image) only, through an open file so just the trailer and the objects on the way are read, `None` if it can not be read
+
+            :param path: :class:`str` File path
+        ''' # pylint: disable=line-too-long
+        try:
+            if path.lower().endswith(tuple(IMAGE_EXTENSIONS)):
+                from PIL.Image import open as open_image # pylint: disable=import-outside-toplevel
+                with open_image(path) as image:
+                    return getattr(image, "n_frames", 1)
+            from pypdf import PdfReader # pylint: disable=import-outside-toplevel
+            with open(file = path,
+                      mode = "rb") as pdf_file:
+                return int(PdfReader(pdf_file).trailer["/Root"]["/Pages"]["/Count"])
+        except Exception: # pylint: disable=broad-exception-caught
+            return None
+
+
+    @staticmethod
+    def page_count(path: str,
+                   timeout: float | None = PAGE_COUNT_TIMEOUT) -> int | None:
+        '''
+            `read_page_count` within `timeout` seconds, `None` if over. A file that hangs the parser is left to a daemon thread instead of stalling the caller
+
+            :param path: :class:`str` File path
+            :param timeout: :class:`Optional(Union(float, None))` Seconds allowed, no limit if `None`. Defaults to `PAGE_COUNT_TIMEOUT`
+        ''' # pylint: disable=line-too-long
+        if not timeout:
+            return Scheduler.read_page_count(path)
+        result: list[int | None] = [None]
+
+        def read() -> None:
+            result[0] = Scheduler.read_page_count(path)
+
+        thread: Thread = Thread(target = read,
+                                name = "page_count",
+                                daemon = True)
+        thread.start()
+        thread.join(timeout)
+        return None if thread.is_alive() else result[0]
+
+
+    def describe(self,
+                 path: str) -> ScheduledFile:
+        '''
+            Collects what the policy needs about the file
+
+            :param path: :class:`str` File path
+        '''
+        scheduled_file: ScheduledFile = ScheduledFile(path = path)
+        try:
+            stat: os.stat_result = os.stat(path)
+            scheduled_file.size = stat.st_size
+            scheduled_file.mtime = stat.st_mtime
+        except OSError:
+            pass
+        if self.policy == "longest":
+            scheduled_file.pages = self.page_count(path)
+        return scheduled_file
+
+
+    def order(self,
+              files: list[str]) -> list[ScheduledFile]:
+        '''
+            Orders the files by `self.policy`
+
+            :param files: :class:`list[str]` File paths
+        '''
+        scheduled_files: list[ScheduledFile] = [self.describe(path) for path in files]
+        match self.policy:
+            case "longest":
+                scheduled_files.sort(key = lambda scheduled_file: scheduled_file.cost,
+                                     reverse = True)
+            case "oldest":
+                scheduled_files.sort(key = lambda scheduled_file: scheduled_file.mtime)
+            case _:
+                pass
+        return scheduled_files
+
+
+    @staticmethod
+    def estimate_makespan(scheduled_files: list[ScheduledFile],
+                          workers: int) -> float:
+        '''
+            Estimated makespan in pages if the files are dispatched in the given order to the first free worker
+
+            :param scheduled_files: :class:`list[ScheduledFile]` Files in dispatch order
+            :param workers: :class:`int` Number of workers
+        ''' # pylint: disable=line-too-long
+        loads: list[float] = [0.0] * max(workers, 1)
+        for scheduled_file in scheduled_files:
+            heapq.heapreplace(loads,
+                              loads[0] + scheduled_file.cost)
+        return max(loads)
+
+
+    def log_schedule(self,
+                     scheduled_files: list[ScheduledFile],
+                     workers: int,
+                     listed_files: list[str] | None = None) -> None:
+        '''
+            Logs the dispatch order and its estimated makespan compared to the listing order
+
+            :param scheduled_files: :class:`list[ScheduledFile]` Files in dispatch order
+            :param workers: :class:`int` Number of workers
+            :param listed_files: :class:`Optional(Union(list[str], None))` File paths in listing order. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        self.log(f"Schedule ({self.policy}): " + ", ".join(f"{os.path.basename(scheduled_file.path)} ({scheduled_file.pages if scheduled_file.pages is not None else '~' + str(round(scheduled_file.cost))} p)" for scheduled_file in scheduled_files)) # pylint: disable=line-too-long
+        makespan: str = f"Estimated makespan with {workers} worker{'' if workers == 1 else 's'}: {self.estimate_makespan(scheduled_files, workers):.0f} pages ({self.policy})" # pylint: disable=line-too-long
+        if listed_files:
+            by_path: dict[str, ScheduledFile] = {scheduled_file.path: scheduled_file for scheduled_file in scheduled_files} # pylint: disable=line-too-long
+            makespan += f", {self.estimate_makespan([by_path[path] for path in listed_files if path in by_path], workers):.0f} pages (listing order)" # pylint: disable=line-too-long
+        self.log(makespan)
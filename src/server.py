@@ -0,0 +1,478 @@
+'''
+    HTTP server module
+'''
+
+import os
+import json
+from itertools import count
+from queue import Empty
+from io import BytesIO
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from multiprocessing import Pool, Queue, TimeoutError as PoolTimeoutError
+from multiprocessing.pool import Pool as ProcessPool
+from multiprocessing.queues import Queue as ProcessQueue
+from threading import BoundedSemaphore, Lock
+from urllib.parse import urlparse, parse_qs
+from zipfile import ZipFile, ZIP_DEFLATED
+from villog import Logger
+from src.classes.path_config import PathConfig
+from src.classes.decoder_config import DecoderConfig
+from src.classes.split_options import SplitOptions
+from src.classes.split_page import SplitPage
+from src.manager import PdfManager
+from src.page_classifier import PageClassifier
+from src.profiler import Profiler
+from src.watchdog import Watchdog, own_process_group, kill_worker
+from config import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_REQUEST_TIMEOUT, MAX_UPLOAD_SIZE
+
+worker_manager: PdfManager | None = None
+''' `PdfManager` of the current pool worker, created once by `init_worker` '''
+
+worker_jobs: ProcessQueue | None = None
+''' Queue the pool worker reports `(job id, pid)` to when it starts a job, so a stuck job can be killed '''
+
+def init_worker(path_config: PathConfig,
+                ocr_prefixes: list[str] | None,
+                ratio: float | None,
+                decoder_config: DecoderConfig,
+                split_options: SplitOptions,
+                page_classifier: PageClassifier,
+                profiler: Profiler,
+                watchdog: Watchdog,
+                log_path: str,
+                jobs: ProcessQueue | None = None,
+                use_ocr: bool = False) -> None:
+    '''
+        Creates the `PdfManager` of a pool worker, so imports and setup are paid once per worker, in a process group of its own so a stuck worker is killed with its subprocesses
+
+        :param path_config: :class:`PathConfig`
+        :param ocr_prefixes: :class:`Union(list[str], None)`
+        :param ratio: :class:`Union(float, None)`
+        :param decoder_config: :class:`DecoderConfig`
+        :param split_options: :class:`SplitOptions`
+        :param page_classifier: :class:`PageClassifier`
+        :param profiler: :class:`Profiler`
+        :param watchdog: :class:`Watchdog`
+        :param log_path: :class:`str` Log file of the worker
+        :param jobs: :class:`Optional(Union(Queue, None))` Queue the started jobs are reported to. Defaults to `None`
+        :param use_ocr: :class:`Optional(bool)` Opts in to the OCR fallback. Defaults to `False`
+    ''' # pylint: disable=line-too-long
+    global worker_manager, worker_jobs # pylint: disable=global-statement
+    own_process_group()
+    worker_jobs = jobs
+    logger: Logger = Logger(file_path = log_path)
+    page_classifier.logger = logger
+    profiler.logger = logger
+    watchdog.logger = logger
+    worker_manager = PdfManager(path_config = path_config,
+                                ocr_prefixes = ocr_prefixes,
+                                ratio = ratio,
+                                decoder_config = decoder_config,
+                                logger = logger,
+                                split_options = split_options,
+                                page_classifier = page_classifier,
+                                profiler = profiler,
+                                watchdog = watchdog,
+                                use_ocr = use_ocr)
+
+
+def warm_up(_: int) -> int:
+    '''
+        No-op task to wait for a worker to start, returns its pid
+    '''
+    return os.getpid()
+
+
+def split_in_worker(job_id: int,
+                    pdf_data: bytes,
+                    name: str) -> list[SplitPage]:
+    '''
+        Splits and decodes a PDF in memory in the pool worker
+
+        :param job_id: :class:`int` Id of the job, reported with the pid of the worker
+        :param pdf_data: :class:`bytes` Content of the PDF file
+        :param name: :class:`str` Name of the PDF file
+    '''
+    if worker_jobs is not None:
+        worker_jobs.put((job_id,
+                         os.getpid()))
+    return worker_manager.process_bytes(pdf_data = pdf_data,
+                                        name = name)
+
+
+class SplitServerException(Exception):
+    '''
+        Split server exception class
+    '''
+    def __init__(self,
+                 message: str | None = None):
+        '''
+            Split server exception class
+
+            :param message: :class:`Optional(Union(str, None))` Message to the exception. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        super().__init__(message or "Unknown split server exception")
+
+
+class SplitServer:
+    '''
+        HTTP server splitting uploaded PDF files on a pool of warm workers
+
+        - `POST /split?name=<file name>&format=<zip|json>` with the PDF as request body
+        - `GET /health`
+    '''
+    __slots__: list[str] = ["pdf_manager",
+                            "host",
+                            "port",
+                            "workers",
+                            "queue_size",
+                            "timeout",
+                            "max_upload_size",
+                            "pool",
+                            "jobs",
+                            "job_ids",
+                            "job_pids",
+                            "job_lock",
+                            "running",
+                            "waiting",
+                            "waiting_lock"]
+
+    def __init__(self,
+                 pdf_manager: PdfManager,
+                 host: str = DEFAULT_HOST,
+                 port: int = DEFAULT_PORT,
+                 workers: int = 1,
+                 queue_size: int = 8,
+                 timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                 max_upload_size: int = MAX_UPLOAD_SIZE) -> None:
+        '''
+            Split server class
+
+            :param pdf_manager: :class:`PdfManager` Settings of the workers are taken from it
+            :param host: :class:`Optional(str)` Address to listen on. Defaults to `DEFAULT_HOST`
+            :param port: :class:`Optional(int)` Port to listen on. Defaults to `DEFAULT_PORT`
+            :param workers: :class:`Optional(int)` Number of warm worker processes. Defaults to `1`
+            :param queue_size: :class:`Optional(int)` Number of uploads waiting for a free worker before new ones are rejected. Defaults to `8`
+            :param timeout: :class:`Optional(float)` Seconds a single upload may take. Defaults to `DEFAULT_REQUEST_TIMEOUT`
+            :param max_upload_size: :class:`Optional(int)` Largest accepted upload in bytes. Defaults to `MAX_UPLOAD_SIZE`
+        ''' # pylint: disable=line-too-long
+        self.pdf_manager: PdfManager = pdf_manager
+        self.host: str = host
+        self.port: int = port
+        self.workers: int = max(workers, 1)
+        self.queue_size: int = max(queue_size, 0)
+        self.timeout: float = timeout
+        self.max_upload_size: int = max_upload_size
+        self.pool: ProcessPool | None = None
+        self.jobs: ProcessQueue | None = None
+        self.job_ids: count = count()
+        self.job_pids: dict[int, int | None] = {}
+        self.job_lock: Lock = Lock()
+        self.running: BoundedSemaphore = BoundedSemaphore(self.workers)
+        self.waiting: int = 0
+        self.waiting_lock: Lock = Lock()
+
+
+    def log(self,
+            content: str) -> None:
+        '''
+            Logs content
+
+            :param content: :class:`str` Content to log
+        '''
+        self.pdf_manager.log(content)
+
+
+    def __start_pool(self) -> None:
+        '''
+            Starts the worker pool and waits until every worker is warm
+        '''
+        # forked workers must not import while a server thread holds the import lock
+        self.pdf_manager.preload()
+        self.jobs = Queue()
+        self.pool = Pool(processes = self.workers,
+                         initializer = init_worker,
+                         initargs = (self.pdf_manager.config,
+                                     self.pdf_manager.ocr_prefixes,
+                                     self.pdf_manager.ratio,
+                                     self.pdf_manager.decoder_config,
+                                     self.pdf_manager.split_options,
+                                     self.pdf_manager.page_classifier,
+                                     self.pdf_manager.profiler,
+                                     self.pdf_manager.watchdog,
+                                     self.pdf_manager.logger.file_path,
+                                     self.jobs,
+                                     self.pdf_manager.use_ocr))
+        pids: set[int] = set(self.pool.map(warm_up,
+                                           range(self.workers)))
+        self.log(f"{len(pids)} worker{'' if len(pids) == 1 else 's'} ready: {', '.join(str(pid) for pid in pids)}") # pylint: disable=line-too-long
+
+
+    def __admit(self) -> bool:
+        '''
+            Admits an upload if a worker or a queue slot is free
+        '''
+        with self.waiting_lock:
+            if self.waiting >= self.workers + self.queue_size:
+                return False
+            self.waiting += 1
+            return True
+
+
+    def __leave(self) -> None:
+        '''
+            Releases the slot of an admitted upload
+        '''
+        with self.waiting_lock:
+            self.waiting -= 1
+
+
+    def __job_pid(self,
+                  job_id: int) -> int | None:
+        '''
+            Pid of the worker running the job, `None` if it did not start
+
+            :param job_id: :class:`int`
+        '''
+        with self.job_lock:
+            while True:
+                try:
+                    started_id, pid = self.jobs.get_nowait()
+                except Empty:
+                    break
+                # jobs already finished are not kept
+                if started_id in self.job_pids:
+                    self.job_pids[started_id] = pid
+            return self.job_pids.get(job_id)
+
+
+    def __kill_job(self,
+                   job_id: int,
+                   name: str) -> None:
+        '''
+            Kills the worker running a job over the timeout, the pool starts a new worker in its place
+
+            :param job_id: :class:`int`
+            :param name: :class:`str` Name of the PDF file
+        ''' # pylint: disable=line-too-long
+        pid: int | None = self.__job_pid(job_id)
+        if pid is None:
+            self.log(f"Worker of {name} not found after {self.timeout} seconds")
+            return
+        try:
+            kill_worker(pid)
+            self.log(f"Killed worker {pid} splitting {name} for {self.timeout} seconds, the pool replaces it") # pylint: disable=line-too-long
+        except OSError as error:
+            self.log(f"Error killing worker {pid} of {name}: {error}")
+
+
+    def split(self,
+              pdf_data: bytes,
+              name: str) -> list[SplitPage] | None:
+        '''
+            Splits an upload on a worker, `None` if the server is busy.
+            The worker of an upload over the timeout is killed, so a stuck upload does not hold it.
+
+            :param pdf_data: :class:`bytes` Content of the PDF file
+            :param name: :class:`str` Name of the PDF file
+        ''' # pylint: disable=line-too-long
+        if not self.__admit():
+            return None
+        with self.job_lock:
+            job_id: int = next(self.job_ids)
+            self.job_pids[job_id] = None
+        try:
+            with self.running:
+                try:
+                    return self.pool.apply_async(split_in_worker,
+                                                 (job_id,
+                                                  pdf_data,
+                                                  name)).get(timeout = self.timeout)
+                except PoolTimeoutError:
+                    self.__kill_job(job_id,
+                                    name)
+                    raise
+        finally:
+            with self.job_lock:
+                self.job_pids.pop(job_id, None)
+            self.__leave()
+
+
+    @staticmethod
+    def manifest(name: str,
+                 split_pages: list[SplitPage]) -> dict:
+        '''
+            Page -> barcode manifest of a split upload
+
+            :param name: :class:`str` Name of the PDF file
+            :param split_pages: :class:`list[SplitPage]`
+        '''
+        return {"source": name,
+                "pages": [{"page": split_page.page,
+                           "name": split_page.name,
+                           "barcodes": [{"type": barcode.type,
+                                         "data": barcode.data,
+                                         "method": barcode.method} for barcode in split_page.barcodes]} for split_page in split_pages]} # pylint: disable=line-too-long
+
+
+    def zip_pages(self,
+                  name: str,
+                  split_pages: list[SplitPage]) -> bytes:
+        '''
+            Zips the split pages with the manifest
+
+            :param name: :class:`str` Name of the PDF file
+            :param split_pages: :class:`list[SplitPage]`
+        '''
+        zip_data: BytesIO = BytesIO()
+        with ZipFile(zip_data,
+                     mode = "w",
+                     compression = ZIP_DEFLATED) as zip_file:
+            for split_page in split_pages:
+                zip_file.writestr(split_page.name,
+                                  split_page.data)
+            zip_file.writestr("manifest.json",
+                              json.dumps(self.manifest(name,
+                                                       split_pages),
+                                         ensure_ascii = False))
+        return zip_data.getvalue()
+
+
+    def __handler_class(self) -> type[BaseHTTPRequestHandler]:
+        '''
+            Request handler class bound to this server
+        '''
+        server: SplitServer = self
+
+        class SplitRequestHandler(BaseHTTPRequestHandler):
+            '''
+                Split request handler class
+            '''
+            def log_message(self, format: str, *args) -> None: # pylint: disable=redefined-builtin
+                server.log(f"{self.address_string()} {format % args}")
+
+
+            def send_body(self,
+                          status: HTTPStatus,
+                          body: bytes,
+                          content_type: str) -> None:
+                '''
+                    Sends a response with body
+                '''
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if status == HTTPStatus.SERVICE_UNAVAILABLE:
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(body)
+
+
+            def send_json(self,
+                          status: HTTPStatus,
+                          content: dict) -> None:
+                '''
+                    Sends a JSON response
+                '''
+                self.send_body(status,
+                               json.dumps(content,
+                                          ensure_ascii = False).encode("utf-8"),
+                               "application/json; charset=utf-8")
+
+
+            def do_GET(self) -> None: # pylint: disable=invalid-name
+                '''
+                    `GET /health`
+                '''
+                if urlparse(self.path).path != "/health":
+                    self.send_json(HTTPStatus.NOT_FOUND,
+                                   {"error": "Not found"})
+                    return
+                self.send_json(HTTPStatus.OK,
+                               {"status": "ok",
+                                "workers": server.workers,
+                                "queue_size": server.queue_size,
+                                "waiting": server.waiting})
+
+
+            def do_POST(self) -> None: # pylint: disable=invalid-name
+                '''
+                    `POST /split`
+                '''
+                url = urlparse(self.path)
+                if url.path != "/split":
+                    self.send_json(HTTPStatus.NOT_FOUND,
+                                   {"error": "Not found"})
+                    return
+                query: dict[str, list[str]] = parse_qs(url.query)
+                name: str = os.path.basename(query.get("name", [self.headers.get("X-Filename") or "upload.pdf"])[0]) # pylint: disable=line-too-long
+                output_format: str = query.get("format", ["zip"])[0].lower()
+                if output_format not in ("zip", "json"):
+                    self.send_json(HTTPStatus.BAD_REQUEST,
+                                   {"error": f"Unknown format: '{output_format}', options: zip, json"})
+                    return
+                length: str | None = self.headers.get("Content-Length")
+                if not length or not length.isdigit():
+                    self.send_json(HTTPStatus.LENGTH_REQUIRED,
+                                   {"error": "Content-Length is required"})
+                    return
+                if int(length) > server.max_upload_size:
+                    self.send_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                   {"error": f"Upload is larger than {server.max_upload_size} bytes"})
+                    return
+                pdf_data: bytes = self.rfile.read(int(length))
+                if not pdf_data.startswith(b"%PDF"):
+                    self.send_json(HTTPStatus.BAD_REQUEST,
+                                   {"error": "Request body is not a PDF file"})
+                    return
+                try:
+                    split_pages: list[SplitPage] | None = server.split(pdf_data,
+                                                                       name)
+                except PoolTimeoutError:
+                    self.send_json(HTTPStatus.GATEWAY_TIMEOUT,
+                                   {"error": f"Splitting took longer than {server.timeout} seconds"})
+                    return
+                except Exception as error: # pylint: disable=broad-exception-caught
+                    server.log(f"Error splitting {name}: {error}")
+                    self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR,
+                                   {"error": str(error)})
+                    return
+                if split_pages is None:
+                    self.send_json(HTTPStatus.SERVICE_UNAVAILABLE,
+                                   {"error": "Server is busy"})
+                    return
+                if output_format == "json":
+                    self.send_json(HTTPStatus.OK,
+                                   server.manifest(name,
+                                                   split_pages))
+                    return
+                self.send_body(HTTPStatus.OK,
+                               server.zip_pages(name,
+                                                split_pages),
+                               "application/zip")
+
+        return SplitRequestHandler
+
+
+    def serve(self) -> None:
+        '''
+            Starts the workers and serves until interrupted
+        '''
+        if self.port is None or not 0 < self.port < 65536:
+            raise SplitServerException(f"Invalid port: {self.port}")
+        http_server: ThreadingHTTPServer = ThreadingHTTPServer((self.host,
+                                                                self.port),
+                                                               self.__handler_class())
+        try:
+            self.__start_pool()
+            self.log(f"Listening on http://{self.host}:{self.port}")
+            http_server.serve_forever()
+        except KeyboardInterrupt:
+            self.log("Server interrupted")
+        finally:
+            http_server.server_close()
+            if self.pool is not None:
+                self.pool.terminate()
+                self.pool.join()
+            self.log("Server stopped")
@@ -9,3 +9,10 @@ def date_string() -> str:
         Return the current date as a string
     '''
     return datetime.now().strftime("%Y-%m-%d")
+
+
+def datetime_string() -> str:
+    '''
+        Return the current date and time as a string usable in file names
+    '''
+    return datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
@@ -0,0 +1,313 @@
+'''
+    Watchdog module
+'''
+
+import os
+import re
+import json
+import shutil
+import signal
+from time import time
+from collections.abc import Callable
+from hashlib import sha1
+from villog import Logger
+from config import STAGE_TIMEOUTS, FILE_TIMEOUT_PER_PAGE
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+class StageTimeoutException(Exception):
+    '''
+        Stage timeout exception class
+    '''
+    def __init__(self,
+                 message: str | None = None):
+        '''
+            Stage timeout exception class
+
+            :param message: :class:`Optional(Union(str, None))` Message to the exception. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        super().__init__(message or "Unknown stage timeout exception")
+
+
+class Journal:
+    '''
+        Progress of a file as JSON lines, a line is written when a stage starts, the last line tells the watchdog where the file is
+    ''' # pylint: disable=line-too-long
+    __slots__: list[str] = ["path"]
+
+    def __init__(self,
+                 path: str) -> None:
+        '''
+            Journal class
+
+            :param path: :class:`str` Path of the journal file
+        '''
+        self.path: str = path
+
+
+    def write(self,
+              stage: str,
+              page: int | None = None,
+              **details) -> None:
+        '''
+            Appends and flushes a line
+
+            :param stage: :class:`str` Stage starting (ex.: `"render"`)
+            :param page: :class:`Optional(Union(int, None))` Page number, from 1. Defaults to `None`
+        '''
+        with open(file = self.path,
+                  mode = "a",
+                  encoding = "utf-8") as journal_file:
+            journal_file.write(json.dumps({"time": time(),
+                                           "stage": stage,
+                                           "page": page,
+                                           **details},
+                                          ensure_ascii = False) + "\n")
+
+
+    def entries(self) -> list[dict]:
+        '''
+            Reads the lines written so far
+        '''
+        if not os.path.exists(self.path):
+            return []
+        entries: list[dict] = []
+        with open(file = self.path,
+                  mode = "r",
+                  encoding = "utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    pass
+        return entries
+
+
+    def last(self) -> dict | None:
+        '''
+            The last line written, `None` if there is none
+        '''
+        entries: list[dict] = self.entries()
+        return entries[-1] if entries else None
+
+
+    def remove(self) -> None:
+        '''
+            Removes the journal file
+        '''
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Watchdog:
+    '''
+        Time limits per stage (per page) and per file, stuck files are moved to the quarantine with their journal
+    ''' # pylint: disable=line-too-long
+    EXTENSION: str = ".journal.jsonl"
+
+    __slots__: list[str] = ["stage_timeouts",
+                            "file_timeout_per_page",
+                            "quarantine_dir",
+                            "logger"]
+
+    def __init__(self,
+                 stage_timeouts: dict[str, float] | None = None,
+                 file_timeout_per_page: float | None = FILE_TIMEOUT_PER_PAGE,
+                 quarantine_dir: str | None = None,
+                 logger: Logger | None = None) -> None:
+        '''
+            Watchdog class
+
+            :param stage_timeouts: :class:`Optional(Union(dict[str, float], None))` Seconds allowed per stage (per page for `render`, `decode`, `write`), no limit for `0` or a missing stage. Defaults to `STAGE_TIMEOUTS`
+            :param file_timeout_per_page: :class:`Optional(Union(float, None))` Seconds allowed for a whole file per page, on top of the `split` limit. Defaults to `FILE_TIMEOUT_PER_PAGE`
+            :param quarantine_dir: :class:`Optional(Union(str, None))` Directory of the stuck files, they are left in place if not given. Defaults to `None`
+            :param logger: :class:`Optional(Union(Logger, None))` Logger class, creates one if not provided. Defaults to `None`
+        ''' # pylint: disable=line-too-long
+        self.stage_timeouts: dict[str, float] = dict(STAGE_TIMEOUTS if stage_timeouts is None else stage_timeouts) # pylint: disable=line-too-long
+        self.file_timeout_per_page: float | None = file_timeout_per_page
+        self.quarantine_dir: str | None = quarantine_dir
+        self.logger: Logger = logger or Logger(file_path = f"{os.path.dirname(__file__)}.log")
+
+
+    def log(self,
+            content: str) -> None:
+        '''
+            Logs content
+
+            :param content: :class:`str` Content to log
+        '''
+        self.logger.log(content)
+
+
+    def limit(self,
+              stage: str) -> float | None:
+        '''
+            Seconds allowed for the stage, `None` if unlimited
+
+            :param stage: :class:`str`
+        '''
+        seconds: float | None = self.stage_timeouts.get(stage)
+        return seconds if seconds and seconds > 0 else None
+
+
+    def journal(self,
+                directory: str,
+                pdf_file: str) -> Journal:
+        '''
+            Journal of the file in the directory, named after the file and a hash of its full path, so same-named files of different directories get their own
+
+            :param directory: :class:`str` Directory of the journal (ex.: the temp directory)
+            :param pdf_file: :class:`str` File path
+        ''' # pylint: disable=line-too-long
+        digest: str = sha1(os.path.abspath(pdf_file).encode("utf-8")).hexdigest()[:12]
+        return Journal(os.path.join(directory,
+                                    f"{os.path.basename(pdf_file)}.{digest}{self.EXTENSION}"))
+
+
+    def expired(self,
+                journal: Journal,
+                elapsed: float,
+                pages: float = 1.0) -> str | None:
+        '''
+            Returns why the file is over its limit, `None` if it is not
+
+            :param journal: :class:`Journal` Journal of the file
+            :param elapsed: :class:`float` Seconds since the file started
+            :param pages: :class:`Optional(float)` Pages (estimated) of the file. Defaults to `1.0`
+        '''
+        now: float = time()
+        last: dict | None = journal.last()
+        if last is not None:
+            stage_limit: float | None = self.limit(str(last.get("stage")))
+            if stage_limit is not None and now - float(last.get("time", now)) > stage_limit:
+                page: str = "" if last.get("page") is None else f" of page {last.get('page')}"
+                return f"stage '{last.get('stage')}'{page} over {stage_limit:.0f}s"
+        if self.file_timeout_per_page:
+            file_limit: float = (self.limit("split") or 0.0) + self.file_timeout_per_page * max(pages, 1.0) # pylint: disable=line-too-long
+            if elapsed > file_limit:
+                return f"file over {file_limit:.0f}s"
+        return None
+
+
+    @staticmethod
+    def split_pages(entries: list[dict]) -> set[str]:
+        '''
+            Split pages of the journal: the `pdfs` of the `split` entries, the `pdf` of the others,
+            and the files named `<prefix><number>.pdf` left by a split that did not finish
+
+            :param entries: :class:`list[dict]` Lines of the journal
+        ''' # pylint: disable=line-too-long
+        pages: set[str] = {entry["pdf"] for entry in entries if entry.get("pdf")}
+        for entry in entries:
+            pages.update(entry.get("pdfs") or [])
+            prefix: str | None = entry.get("prefix")
+            directory: str = os.path.dirname(prefix or "") or "."
+            if prefix and os.path.isdir(directory):
+                pattern: re.Pattern = re.compile(rf"{re.escape(os.path.basename(prefix))}\d+\.pdf")
+                pages.update(os.path.join(directory, name) for name in os.listdir(directory) if pattern.fullmatch(name)) # pylint: disable=line-too-long
+        return pages
+
+
+    def __quarantine_path(self,
+                          file_path: str) -> str:
+        '''
+            Path of the file in the quarantine, numbered if the name is taken
+
+            :param file_path: :class:`str` File path
+        '''
+        name: str = os.path.basename(file_path)
+        quarantine_path: str = os.path.join(self.quarantine_dir,
+                                            name)
+        i: int = 1
+        while os.path.exists(quarantine_path):
+            quarantine_path = os.path.join(self.quarantine_dir,
+                                           f"{i}_{name}")
+            i += 1
+        return quarantine_path
+
+
+    def quarantine(self,
+                   pdf_file: str,
+                   journal: Journal,
+                   reason: str) -> None:
+        '''
+            Moves the file, its journal and the split pages not filed yet to the quarantine, removes the rendered images
+
+            :param pdf_file: :class:`str` File path
+            :param journal: :class:`Journal` Journal of the file
+            :param reason: :class:`str` Why the file is quarantined
+        ''' # pylint: disable=line-too-long
+        entries: list[dict] = journal.entries()
+        journal.write("quarantine",
+                      reason = reason)
+        for image in {entry["image"] for entry in entries if entry.get("image")}:
+            if os.path.exists(image):
+                os.remove(image)
+        if not self.quarantine_dir:
+            self.log(f"No quarantine directory, {pdf_file} is left in place: {reason}")
+            return
+        os.makedirs(self.quarantine_dir,
+                    exist_ok = True)
+        try:
+            for split_pdf in self.split_pages(entries):
+                if os.path.exists(split_pdf):
+                    shutil.move(split_pdf,
+                                self.__quarantine_path(split_pdf))
+            if os.path.exists(pdf_file):
+                shutil.move(pdf_file,
+                            self.__quarantine_path(pdf_file))
+            shutil.move(journal.path,
+                        self.__quarantine_path(journal.path))
+            self.log(f"Quarantined {pdf_file} to {self.quarantine_dir}: {reason}")
+        except Exception as error: # pylint: disable=broad-exception-caught
+            self.log(f"Error quarantining {pdf_file}: {error}")
+
+
+def own_process_group() -> None:
+    '''
+        Makes the calling worker the leader of a process group of its own (POSIX), so `kill_worker` reaches its poppler subprocesses too.
+        The worker no longer gets the Ctrl+C of the terminal, the parent stops it.
+    ''' # pylint: disable=line-too-long
+    if hasattr(os, "setpgrp"):
+        try:
+            os.setpgrp()
+        except OSError:
+            pass
+
+
+def run_in_process_group(function: Callable,
+                         *args) -> any:
+    '''
+        Target of a worker process: calls the function in a process group of its own
+
+        :param function: :class:`Callable`
+    '''
+    own_process_group()
+    return function(*args)
+
+
+def kill_worker(pid: int,
+                force: bool = False) -> None:
+    '''
+        Stops a stuck worker with its subprocesses (a `pdftoppm` would keep rendering otherwise):
+        its process group if it leads one (POSIX), else its children found with `psutil` if installed, then the worker
+
+        :param pid: :class:`int` Process id of the worker
+        :param force: :class:`Optional(bool)` Kills instead of terminating. Defaults to `False`
+    ''' # pylint: disable=line-too-long
+    sig: int = getattr(signal, "SIGKILL", signal.SIGTERM) if force else signal.SIGTERM
+    if hasattr(os, "killpg") and os.getpgid(pid) == pid:
+        os.killpg(pid,
+                  sig)
+        return
+    if psutil is not None:
+        try:
+            for child in psutil.Process(pid).children(recursive = True):
+                child.send_signal(sig)
+        except psutil.Error:
+            pass
+    os.kill(pid,
+            sig)
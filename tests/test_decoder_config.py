@@ -0,0 +1,83 @@
+'''
+    Tests of the decoder config and its checksums
+'''
+
+import pytest
+from src.classes.decoder_config import DecoderConfig, DecoderConfigException, luhn_checksum, mod10_checksum, mod43_checksum # pylint: disable=line-too-long
+
+@pytest.mark.parametrize("data, valid", [("79927398713", True),
+                                         ("4111111111111111", True),
+                                         ("0", False),
+                                         ("79927398710", False),
+                                         ("79927398731", False),
+                                         ("7992739871A", False),
+                                         ("", False)])
+def test_luhn(data: str,
+              valid: bool) -> None:
+    '''
+        The Luhn check digit, a swap of two digits or a letter fails
+    '''
+    assert luhn_checksum(data) is valid
+
+
+@pytest.mark.parametrize("data, valid", [("4006381333931", True),
+                                         ("036000291452", True),
+                                         ("96385074", True),
+                                         ("4006381333932", False),
+                                         ("79927398713", False),
+                                         ("400638133393X", False),
+                                         ("5", False)])
+def test_mod10(data: str,
+               valid: bool) -> None:
+    '''
+        The GS1 check digit of EAN-13, UPC-A and EAN-8, weighted 3-1 from the right
+    '''
+    assert mod10_checksum(data) is valid
+
+
+@pytest.mark.parametrize("data, valid", [("CODE 39R", True),
+                                         ("ABC-1234.$/+%K", True),
+                                         ("CODE 39S", False),
+                                         ("code 39R", False),
+                                         ("CODE_39R", False),
+                                         ("R", False)])
+def test_mod43(data: str,
+               valid: bool) -> None:
+    '''
+        The Code 39 mod 43 check character, lowercase and characters outside of Code 39 fail
+    '''
+    assert mod43_checksum(data) is valid
+
+
+def test_unknown_checksum() -> None:
+    '''
+        An unknown checksum is refused, the name is not case sensitive
+    '''
+    with pytest.raises(DecoderConfigException):
+        DecoderConfig(checksum = "crc32")
+    assert DecoderConfig(checksum = " Luhn ").checksum == "luhn"
+
+
+def test_invalid_pattern() -> None:
+    '''
+        A pattern that does not compile is refused
+    '''
+    with pytest.raises(DecoderConfigException):
+        DecoderConfig(pattern = "KSZ(")
+
+
+def test_is_valid() -> None:
+    '''
+        A barcode has to be of an allowed symbology, fully match the pattern and pass the checksum
+    ''' # pylint: disable=line-too-long
+    decoder_config: DecoderConfig = DecoderConfig(symbols = [" ean13 ", "code128", ""],
+                                                  pattern = r"\d{13}",
+                                                  checksum = "mod10")
+    assert decoder_config.symbols == ["EAN13", "CODE128"]
+    assert decoder_config.is_valid("EAN13", "4006381333931")
+    assert not decoder_config.is_valid("QRCODE", "4006381333931")
+    assert not decoder_config.is_valid("EAN13", "4006381333932")
+    assert not decoder_config.is_valid("EAN13", "40063813339310")
+    assert DecoderConfig(symbols = None,
+                         pattern = None,
+                         checksum = None).is_valid("QRCODE", "anything")
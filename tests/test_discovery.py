@@ -0,0 +1,139 @@
+'''
+    Tests of the source discovery
+'''
+
+import os
+import json
+import pytest
+from src.discovery import SourceDiscovery, SourceDiscoveryException
+
+def make_tree(root: str,
+              relative_paths: list[str]) -> None:
+    '''
+        Creates empty files under the root, with their directories
+
+        :param root: :class:`str` Root directory
+        :param relative_paths: :class:`list[str]` Paths relative to the root, separated by `/`
+    '''
+    for relative_path in relative_paths:
+        path: str = os.path.join(root, *relative_path.split("/"))
+        os.makedirs(os.path.dirname(path),
+                    exist_ok = True)
+        with open(file = path,
+                  mode = "wb") as tree_file:
+            tree_file.write(b"%PDF")
+
+
+def listed(discovery: SourceDiscovery,
+           source: str) -> list[str]:
+    '''
+        Paths of every batch relative to the source, separated by `/` and sorted
+
+        :param discovery: :class:`SourceDiscovery`
+        :param source: :class:`str` Source directory
+    '''
+    return sorted(os.path.relpath(path, source).replace(os.sep, "/") for batch in discovery.batches(source, [".pdf"]) for path in batch) # pylint: disable=line-too-long
+
+
+def test_invalid_batch_size() -> None:
+    '''
+        The batch size has to be a positive integer
+    '''
+    with pytest.raises(SourceDiscoveryException):
+        SourceDiscovery(batch_size = 0)
+
+
+def test_top_level_only(tmp_path) -> None:
+    '''
+        Without recursion only the files at the top of the source with an accepted extension are listed
+    ''' # pylint: disable=line-too-long
+    make_tree(str(tmp_path), ["a.pdf", "B.PDF", "notes.txt", "sub/c.pdf"])
+    assert listed(SourceDiscovery(), str(tmp_path)) == ["B.PDF", "a.pdf"]
+
+
+def test_recursive(tmp_path) -> None:
+    '''
+        With recursion the subdirectories are listed, except the skipped ones
+    '''
+    make_tree(str(tmp_path), ["a.pdf", "sub/c.pdf", "sub/deep/d.pdf", "done/e.pdf"])
+    discovery: SourceDiscovery = SourceDiscovery(recursive = True)
+    assert listed(discovery, str(tmp_path)) == ["a.pdf", "done/e.pdf", "sub/c.pdf", "sub/deep/d.pdf"]
+    files: list[str] = [path for batch in discovery.batches(str(tmp_path), [".pdf"], [str(tmp_path / "done")]) for path in batch] # pylint: disable=line-too-long
+    assert not any("e.pdf" in path for path in files)
+
+
+def test_include_exclude(tmp_path) -> None:
+    '''
+        Include globs select the relative paths, exclude globs skip files and whole directories
+    '''
+    make_tree(str(tmp_path), ["a.pdf", "a_draft.pdf", "scanner1/b.pdf", "scanner1/b_draft.pdf", "scanner2/c.pdf", "archive/scanner1/d.pdf"]) # pylint: disable=line-too-long
+    assert listed(SourceDiscovery(recursive = True,
+                                  include = ["scanner1/*"]), str(tmp_path)) == ["scanner1/b.pdf", "scanner1/b_draft.pdf"] # pylint: disable=line-too-long
+    assert listed(SourceDiscovery(recursive = True,
+                                  exclude = ["archive", "*_draft.pdf"]), str(tmp_path)) == ["a.pdf", "scanner1/b.pdf", "scanner2/c.pdf"] # pylint: disable=line-too-long
+    assert listed(SourceDiscovery(recursive = True,
+                                  include = ["scanner1\\*"],
+                                  exclude = ["*_draft.pdf"]), str(tmp_path)) == ["scanner1/b.pdf"]
+
+
+def test_batches(tmp_path) -> None:
+    '''
+        The files are yielded in batches of at most `batch_size`
+    '''
+    make_tree(str(tmp_path), [f"{i}.pdf" for i in range(5)])
+    sizes: list[int] = [len(batch) for batch in SourceDiscovery(batch_size = 2).batches(str(tmp_path), [".pdf"])] # pylint: disable=line-too-long
+    assert sizes == [2, 2, 1]
+
+
+def test_index_lists_only_new_or_changed(tmp_path) -> None:
+    '''
+        Files marked done are not listed again while unchanged, failed (never marked) and changed files are
+    ''' # pylint: disable=line-too-long
+    source: str = str(tmp_path / "source")
+    make_tree(source, ["done.pdf", "failed.pdf", "changed.pdf"])
+    index_path: str = str(tmp_path / "log" / "seen_index.json")
+    discovery: SourceDiscovery = SourceDiscovery(index_path = index_path)
+    for batch in discovery.batches(source, [".pdf"]):
+        for path in batch:
+            if not path.endswith("failed.pdf"):
+                discovery.mark_done(path,
+                                    SourceDiscovery.signature(path))
+    assert os.path.exists(f"{index_path}{SourceDiscovery.DONE_EXTENSION}")
+    with open(file = os.path.join(source, "changed.pdf"),
+              mode = "ab") as changed_file:
+        changed_file.write(b"more")
+    assert listed(discovery, source) == ["changed.pdf", "failed.pdf"]
+    # the appended lines are merged into the index and the log is removed
+    assert not os.path.exists(f"{index_path}{SourceDiscovery.DONE_EXTENSION}")
+    with open(file = index_path,
+              mode = "r",
+              encoding = "utf-8") as index_file:
+        assert list(json.load(index_file)) == [os.path.join(source, "done.pdf")]
+
+
+def test_index_skips_broken_lines(tmp_path) -> None:
+    '''
+        A line cut by a killed worker is skipped, the other lines are merged
+    '''
+    index_path: str = str(tmp_path / "seen_index.json")
+    discovery: SourceDiscovery = SourceDiscovery(index_path = index_path)
+    discovery.mark_done("a.pdf",
+                        [1.0, 10])
+    discovery.mark_done("b.pdf",
+                        None)
+    with open(file = f"{index_path}{SourceDiscovery.DONE_EXTENSION}",
+              mode = "a",
+              encoding = "utf-8") as done_file:
+        done_file.write('["c.pdf", 2.0')
+    assert discovery.load_index() == {"a.pdf": [1.0, 10]}
+
+
+def test_no_index() -> None:
+    '''
+        Without an index path nothing is read or written
+    '''
+    discovery: SourceDiscovery = SourceDiscovery()
+    discovery.mark_done("a.pdf",
+                        [1.0, 10])
+    assert discovery.load_index() == {}
+    assert not discovery.save_index({"a.pdf": [1.0, 10]})
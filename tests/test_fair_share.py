@@ -0,0 +1,113 @@
+'''
+    Tests of the weighted fair-share queue of the inboxes
+'''
+
+from collections import Counter
+from src.inboxes import FairShare
+from src.scheduler import ScheduledFile
+
+def files(name: str,
+          count: int,
+          pages: int = 1) -> list[ScheduledFile]:
+    '''
+        Scheduled files of an inbox
+
+        :param name: :class:`str` Name of the inbox
+        :param count: :class:`int` Number of files
+        :param pages: :class:`Optional(int)` Pages per file. Defaults to `1`
+    '''
+    return [ScheduledFile(path = f"{name}/{i}.pdf",
+                          pages = pages) for i in range(count)]
+
+
+def take(fair_share: FairShare,
+         count: int) -> list[str]:
+    '''
+        Inbox names of the next files
+
+        :param fair_share: :class:`FairShare`
+        :param count: :class:`int` Number of files to take
+    '''
+    return [fair_share.next()[0] for _ in range(count)]
+
+
+def test_empty() -> None:
+    '''
+        Nothing to take from empty inboxes, pushing no files changes nothing
+    '''
+    fair_share: FairShare = FairShare({"a": 1.0})
+    fair_share.push("a",
+                    [])
+    assert fair_share.pending("a") == 0
+    assert fair_share.next() is None
+
+
+def test_weights() -> None:
+    '''
+        Busy inboxes get pages in proportion of their weights
+    '''
+    fair_share: FairShare = FairShare({"a": 1.0,
+                                       "b": 2.0})
+    fair_share.push("a",
+                    files("a", 30))
+    fair_share.push("b",
+                    files("b", 30))
+    assert Counter(take(fair_share, 30)) == {"a": 10,
+                                             "b": 20}
+
+
+def test_pages_are_the_cost() -> None:
+    '''
+        A large file advances its inbox by its pages, the other inbox catches up in files
+    '''
+    fair_share: FairShare = FairShare({"a": 1.0,
+                                       "b": 1.0})
+    fair_share.push("a",
+                    files("a", 2, pages = 5))
+    fair_share.push("b",
+                    files("b", 10))
+    assert take(fair_share, 7) == ["a"] + ["b"] * 5 + ["a"]
+
+
+def test_order_within_inbox() -> None:
+    '''
+        The files of an inbox keep their dispatch order
+    '''
+    fair_share: FairShare = FairShare({"a": 1.0})
+    fair_share.push("a",
+                    files("a", 3))
+    assert [fair_share.next()[1].path for _ in range(3)] == ["a/0.pdf", "a/1.pdf", "a/2.pdf"]
+    assert fair_share.next() is None
+
+
+def test_idle_inbox_rejoins_without_credit() -> None:
+    '''
+        An inbox idle while another was busy starts from the busy virtual time, it does not take a run of files to catch up
+    ''' # pylint: disable=line-too-long
+    fair_share: FairShare = FairShare({"a": 1.0,
+                                       "b": 1.0})
+    fair_share.push("a",
+                    files("a", 20))
+    assert take(fair_share, 10) == ["a"] * 10
+    fair_share.push("b",
+                    files("b", 10))
+    assert fair_share.virtual_times["b"] == fair_share.virtual_times["a"]
+    assert Counter(take(fair_share, 10)) == {"a": 5,
+                                             "b": 5}
+
+
+def test_rejoin_keeps_own_virtual_time_if_ahead() -> None:
+    '''
+        An inbox that ran ahead keeps its virtual time when it gets new files
+    '''
+    fair_share: FairShare = FairShare({"a": 1.0,
+                                       "b": 1.0})
+    fair_share.push("b",
+                    files("b", 1, pages = 10))
+    take(fair_share, 1)
+    fair_share.push("a",
+                    files("a", 5))
+    fair_share.push("b",
+                    files("b", 5))
+    assert fair_share.virtual_times["b"] == 10.0
+    assert take(fair_share, 5) == ["a"] * 5
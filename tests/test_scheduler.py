@@ -0,0 +1,101 @@
+'''
+    Tests of the file scheduler
+'''
+
+import os
+import pytest
+from src.scheduler import Scheduler, ScheduledFile, SchedulerException
+from config import BYTES_PER_PAGE_ESTIMATE
+
+def write_pdf(path: str,
+              pages: int) -> str:
+    '''
+        Writes a PDF of blank pages, returns its path
+
+        :param path: :class:`str` File path
+        :param pages: :class:`int` Number of pages
+    '''
+    from pypdf import PdfWriter # pylint: disable=import-outside-toplevel
+    writer: PdfWriter = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width = 100,
+                              height = 100)
+    with open(file = path,
+              mode = "wb") as pdf_file:
+        writer.write(pdf_file)
+    return path
+
+
+def test_unknown_policy() -> None:
+    '''
+        An unknown policy is refused
+    '''
+    with pytest.raises(SchedulerException):
+        Scheduler(policy = "random")
+
+
+def test_cost() -> None:
+    '''
+        The cost is the page count, or the size estimate (at least 1 page) if it is unknown
+    '''
+    assert ScheduledFile(path = "a.pdf",
+                         pages = 7).cost == 7.0
+    assert ScheduledFile(path = "a.pdf",
+                         size = 3 * BYTES_PER_PAGE_ESTIMATE).cost == 3.0
+    assert ScheduledFile(path = "a.pdf",
+                         size = 10).cost == 1.0
+
+
+def test_page_count(tmp_path) -> None:
+    '''
+        The page count is read from the PDF, `None` if it is not one
+    '''
+    assert Scheduler.page_count(write_pdf(str(tmp_path / "a.pdf"), 4)) == 4
+    (tmp_path / "b.pdf").write_bytes(b"not a pdf")
+    assert Scheduler.page_count(str(tmp_path / "b.pdf")) is None
+    assert Scheduler.page_count(str(tmp_path / "missing.pdf")) is None
+
+
+def test_longest_first(tmp_path) -> None:
+    '''
+        `longest` orders by page count, most first
+    '''
+    files: list[str] = [write_pdf(str(tmp_path / f"{pages}.pdf"), pages) for pages in (2, 9, 5)]
+    assert [scheduled_file.pages for scheduled_file in Scheduler(policy = "longest").order(files)] == [9, 5, 2] # pylint: disable=line-too-long
+
+
+def test_oldest_first(tmp_path) -> None:
+    '''
+        `oldest` orders by modification time, oldest first, without reading the pages
+    '''
+    files: list[str] = [write_pdf(str(tmp_path / f"{name}.pdf"), 1) for name in ("a", "b", "c")]
+    for mtime, path in zip((300, 100, 200), files):
+        os.utime(path,
+                 (mtime, mtime))
+    scheduled_files: list[ScheduledFile] = Scheduler(policy = "oldest").order(files)
+    assert [os.path.basename(scheduled_file.path) for scheduled_file in scheduled_files] == ["b.pdf", "c.pdf", "a.pdf"] # pylint: disable=line-too-long
+    assert all(scheduled_file.pages is None for scheduled_file in scheduled_files)
+
+
+def test_fifo_keeps_listing_order(tmp_path) -> None:
+    '''
+        `fifo` keeps the listing order
+    '''
+    files: list[str] = [write_pdf(str(tmp_path / f"{pages}.pdf"), pages) for pages in (2, 9, 5)]
+    assert [scheduled_file.path for scheduled_file in Scheduler(policy = "fifo").order(files)] == files # pylint: disable=line-too-long
+
+
+def test_estimate_makespan() -> None:
+    '''
+        The files go to the first free worker, the makespan is the load of the busiest one
+    '''
+    def scheduled(*pages: int) -> list[ScheduledFile]:
+        return [ScheduledFile(path = f"{i}.pdf",
+                              pages = count) for i, count in enumerate(pages)]
+
+    assert Scheduler.estimate_makespan([], 2) == 0.0
+    assert Scheduler.estimate_makespan(scheduled(3, 3, 3), 1) == 9.0
+    # a long file last finishes late, first it is spread out
+    assert Scheduler.estimate_makespan(scheduled(1, 1, 1, 1, 8), 2) == 10.0
+    assert Scheduler.estimate_makespan(scheduled(8, 1, 1, 1, 1), 2) == 8.0
+    assert Scheduler.estimate_makespan(scheduled(5), 0) == 5.0